@@ -15,6 +15,7 @@ from limiter import limiter  # Import the Limiter instance
 from cors import cors        # Import the CORS instance
 from csp import apply_csp_middleware  # Import the CSP middleware
 from utils.version import get_version  # Import version management
+from utils.json_provider import OrjsonProvider  # Import orjson-backed JSON provider
 from utils.latency_monitor import init_latency_monitoring  # Import latency monitoring
 from utils.traffic_logger import init_traffic_logging  # Import traffic logging
 from utils.security_middleware import init_security_middleware  # Import security middleware
@@ -68,7 +69,7 @@ from database.strategy_db import init_db as ensure_strategy_tables_exists
 from database.sandbox_db import init_db as ensure_sandbox_tables_exists
 from database.action_center_db import init_db as ensure_action_center_tables_exists
 
-from utils.plugin_loader import load_broker_auth_functions
+from utils.plugin_loader import load_broker_auth_functions, load_broker_order_functions
 
 import os
 import atexit
@@ -104,6 +105,7 @@ def signal_handler(signum, frame):
 def create_app():
     # Initialize Flask application
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)  # orjson for jsonify() and request.json
 
     # Initialize SocketIO
     socketio.init_app(app)  # Link SocketIO to the Flask app
@@ -311,7 +313,8 @@ def create_app():
                  finally:
                      loop.close()
 
-             if os.getenv("TELEGRAM_API_ID"):
+             from database.telegram_db import get_listener_config
+             if os.getenv("TELEGRAM_API_ID") or get_listener_config().get('api_id'):
                  thread = threading.Thread(target=start_listener_loop, daemon=True)
                  thread.start()
                  logger.info("Telegram Signal Listener started in background")
@@ -409,6 +412,7 @@ def setup_environment(app):
     with app.app_context():
         #load broker plugins
         app.broker_auth_functions = load_broker_auth_functions()
+        app.config['BROKER_MODULES'] = load_broker_order_functions()
 
         # Initialize all databases in parallel for faster startup
         from concurrent.futures import ThreadPoolExecutor, as_completed
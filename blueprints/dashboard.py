@@ -1,5 +1,12 @@
-from flask import Blueprint, render_template, session, redirect, url_for, jsonify
-from functools import wraps
+from flask import Blueprint, render_template, session, redirect, url_for, jsonify, Response, request
+import hashlib
+import logging
+import orjson
+from functools import wraps, lru_cache
+from datetime import datetime, date
+from threading import Lock, Event
+from concurrent.futures import ThreadPoolExecutor, Future
+from cachetools import TTLCache
 from database.auth_db import get_auth_token, get_api_key_for_tradingview
 from database.settings_db import get_analyze_mode
 from services.funds_service import get_funds
@@ -9,6 +16,12 @@ from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+try:
+    from services.telegram_listener_service import telegram_listener
+except Exception as e:
+    logger.warning(f"Telegram listener unavailable for dashboard status: {e}")
+    telegram_listener = None
+
 def safe_dashboard_view(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -20,9 +33,78 @@ def safe_dashboard_view(f):
     return decorated_function
 
 
+def _json_response(data, conditional=False):
+    """
+    JSON response serialized with orjson, for the polled dashboard endpoints.
+
+    With conditional=True the response carries an ETag of the body and becomes
+    a bodiless 304 when the client's If-None-Match already matches it.
+    """
+    body = orjson.dumps(data)
+    response = Response(body, mimetype='application/json')
+    if conditional:
+        response.set_etag(hashlib.blake2b(body, digest_size=8).hexdigest())
+        response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+    return response
+
+
 dashboard_bp = Blueprint('dashboard_bp', __name__, url_prefix='/')
 scalper_process = None
 
+# Short-lived per-user caches, bounded and lock-guarded since Flask serves requests from multiple threads
+# _API_CACHE: {(user_id, endpoint): response_data}
+# _QUOTES_CACHE: {(user_id, broker): (indices_data, stocks_data, mcx_data, results_map)}
+CACHE_TTL = 1  # 1 second cache
+_API_CACHE = TTLCache(maxsize=10000, ttl=CACHE_TTL)
+_QUOTES_CACHE = TTLCache(maxsize=10000, ttl=CACHE_TTL)
+_cache_lock = Lock()
+
+# _FUNDS_CACHE: {(user_id, broker, analyze_mode): margin_data}
+# Long enough for the page's /api/dashboard/funds call to reuse the render-time prefetch,
+# short enough that margin reflects a just-placed or closed order on the next load
+FUNDS_CACHE_TTL = 5  # 5 second cache
+_FUNDS_CACHE = TTLCache(maxsize=10000, ttl=FUNDS_CACHE_TTL)
+# Fund lookups in progress: {(user_id, broker, analyze_mode): Future}
+_FUNDS_INFLIGHT = {}
+FUNDS_TIMEOUT = 30  # seconds /api/dashboard/funds waits for the broker
+
+# Worker pool for broker calls that run alongside the request thread (I/O bound)
+_DASH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='dashboard')
+
+# Quote fetches in progress: {(user_id, broker): {'event': Event, 'result': quotes}}
+_QUOTES_INFLIGHT = {}
+INFLIGHT_TIMEOUT = 10  # seconds a coalesced request waits for the in-flight fetch
+
+# NSE/BSE Indices
+_INDICES_SYMBOLS = (
+    {'symbol': 'NIFTY', 'exchange': 'NSE_INDEX'},
+    {'symbol': 'BANKNIFTY', 'exchange': 'NSE_INDEX'},
+    {'symbol': 'FINNIFTY', 'exchange': 'NSE_INDEX'},
+    {'symbol': 'SENSEX', 'exchange': 'BSE_INDEX'},
+    {'symbol': 'BANKEX', 'exchange': 'BSE_INDEX'}
+)
+
+# Top 10 NSE Stocks
+_STOCKS_SYMBOLS = (
+    {'symbol': 'RELIANCE', 'exchange': 'NSE'},
+    {'symbol': 'HDFCBANK', 'exchange': 'NSE'},
+    {'symbol': 'INFY', 'exchange': 'NSE'},
+    {'symbol': 'TCS', 'exchange': 'NSE'},
+    {'symbol': 'ICICIBANK', 'exchange': 'NSE'},
+    {'symbol': 'KOTAKBANK', 'exchange': 'NSE'},
+    {'symbol': 'LT', 'exchange': 'NSE'},
+    {'symbol': 'AXISBANK', 'exchange': 'NSE'},
+    {'symbol': 'ITC', 'exchange': 'NSE'},
+    {'symbol': 'SBIN', 'exchange': 'NSE'}
+)
+
+# MCX commodities shown on the dashboard (nearest active future of each)
+_MCX_COMMODITIES = ('CRUDEOIL', 'GOLD', 'NATURALGAS')
+
+# Static part of the dashboard quote request; MCX futures are appended per day
+_STATIC_FETCH = _INDICES_SYMBOLS + _STOCKS_SYMBOLS
+
 @dashboard_bp.route('/dashboard')
 @check_session_validity
 @safe_dashboard_view
@@ -31,104 +113,35 @@ def dashboard():
     AUTH_TOKEN = get_auth_token(login_username)
 
     # Initialize empty data structures
+    # margin_data is rendered when it is already cached or fetched by the time the
+    # quotes are ready; otherwise the page fills it in via /api/dashboard/funds so
+    # slow broker fund calls don't hold up the initial render
     margin_data = {}
     indices_data = []
     mcx_data = []
     stocks_data = []
     telegram_status = {}
     
-    # Try to fetch data if authenticated
-    if AUTH_TOKEN:
-        broker = session.get('broker')
-        if broker:
-            if get_analyze_mode():
-                api_key = get_api_key_for_tradingview(login_username)
-                if api_key:
-                    success, response, status_code = get_funds(api_key=api_key)
-                    if success:
-                        margin_data = response.get('data', {})
-            else:
-                success, response, status_code = get_funds(auth_token=AUTH_TOKEN, broker=broker)
-                if success:
-                    margin_data = response.get('data', {})
-    
-    # Get symbols using shared helper
-    indices_symbols, stocks_symbols, mcx_symbols = get_dashboard_symbols()
-    
     try:
-        # Combine all for a single fetch
-        all_symbols_to_fetch = indices_symbols + stocks_symbols + [{'symbol': s['symbol'], 'exchange': s['exchange']} for s in mcx_symbols]
-        
-        # Fetch quotes
-        # Fetch quotes
-        qt_success, qt_response, _ = get_multiquotes(
-            symbols=all_symbols_to_fetch,
-            auth_token=AUTH_TOKEN,
-            broker=session.get('broker')
-        )
-
-        # DEBUG LOGGING for MCX
-        logger.info(f"DEBUG: Dashboard fetching {len(mcx_symbols)} MCX symbols")
-        if mcx_symbols:
-            logger.info(f"DEBUG: MCX Request Symbols: {[s['symbol'] for s in mcx_symbols]}")
-
-        if qt_success:
-            all_results = qt_response.get('results', [])
-            # Map results by "exchange:symbol" for easy lookup
-            results_map = {}
-            for r in all_results:
-                # Handle cases where result keys might vary
-                key_sym = r.get('symbol', '')
-                key_exc = r.get('exchange', '').upper()
-                results_map[f"{key_exc}:{key_sym}"] = r
-                
-                # DEBUG Log for MCX results
-                if key_exc == 'MCX':
-                    logger.info(f"DEBUG: MCX Result: {key_sym} -> Data present: {r.get('data') is not None}")
-
-            
-            # Populate NSE/BSE Indices
-            for req in indices_symbols:
-                key = f"{req['exchange']}:{req['symbol']}"
-                if key in results_map:
-                    indices_data.append(results_map[key])
-            
-            # Populate Stocks
-            for req in stocks_symbols:
-                key = f"{req['exchange']}:{req['symbol']}"
-                if key in results_map:
-                    stocks_data.append(results_map[key])
-
-            # Populate MCX (map back to friendly names)
-            for req in mcx_symbols:
-                # Try MCX first
-                key = f"{req['exchange']}:{req['symbol']}"
-                
-                # Fallback to MCX_FO if not found (common Broker response vs Request mismatch)
-                if key not in results_map and req['exchange'] == 'MCX':
-                     key = f"MCX_FO:{req['symbol']}"
-                     
-                if key in results_map:
-                    data = results_map[key]
-                    data['display_name'] = req.get('display_name', req['symbol'])
-                    mcx_data.append(data)
-                    
-        else:
-            logger.warning(f"Failed to fetch indices: {qt_response.get('message')}")
-            
+        if AUTH_TOKEN:
+            broker = session.get('broker')
+            # Start the fund lookup in parallel with the quote fetch so the page's
+            # /api/dashboard/funds call finds it already cached or in flight
+            funds = _submit_margin_data(login_username, AUTH_TOKEN, broker, get_analyze_mode())
+            quotes = _fetch_dashboard_quotes(login_username, AUTH_TOKEN, broker)
+            if quotes:
+                indices_data, stocks_data, mcx_data, _ = quotes
+            if not isinstance(funds, Future):
+                margin_data = funds
+            elif funds.done() and funds.exception() is None:
+                margin_data = funds.result()
     except Exception as e:
         logger.error(f"Error fetching dashboard data: {e}", exc_info=True)
 
-    # Debug Margin Data
-    logger.info(f"Dashboard Margin Data for {login_username}: {margin_data}")
-
     try:
-        from services.telegram_listener_service import telegram_listener
         # Resolve channel names for display
-        display_channels = []
-        if telegram_listener and hasattr(telegram_listener, 'channels') and telegram_listener.channels:
-            for c in telegram_listener.channels:
-                display_channels.append(telegram_listener.channel_map.get(c, str(c)))
+        channels = getattr(telegram_listener, 'channels', None)
+        display_channels = [telegram_listener.channel_map.get(c, str(c)) for c in channels] if channels else []
 
         telegram_status = {
             'is_running': getattr(telegram_listener, 'is_running', False),
@@ -151,102 +164,198 @@ def dashboard():
         raise e
 
 
+def _fetch_dashboard_quotes(login_username, auth_token, broker):
+    """
+    Fetch quotes for all dashboard symbols, shared by the page and the price poll.
+
+    Returns (indices_data, stocks_data, mcx_data, results_map), or None if the
+    quote fetch failed. Successful results are cached per user for CACHE_TTL,
+    and concurrent misses for the same user share a single broker call.
+    """
+    cache_key = (login_username, broker)
+    with _cache_lock:
+        cached = _QUOTES_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        inflight = _QUOTES_INFLIGHT.get(cache_key)
+        is_leader = inflight is None
+        if is_leader:
+            inflight = _QUOTES_INFLIGHT[cache_key] = {'event': Event(), 'result': None}
+
+    if not is_leader:
+        # Another request (e.g. a second browser tab) is already fetching - wait for its result
+        inflight['event'].wait(timeout=INFLIGHT_TIMEOUT)
+        return inflight['result']
+
+    try:
+        quotes = _load_dashboard_quotes(auth_token, broker)
+        inflight['result'] = quotes
+        if quotes is not None:
+            with _cache_lock:
+                _QUOTES_CACHE[cache_key] = quotes
+        return quotes
+    finally:
+        with _cache_lock:
+            _QUOTES_INFLIGHT.pop(cache_key, None)
+        inflight['event'].set()
+
+
+def _load_dashboard_quotes(auth_token, broker):
+    """Fetch and map quotes for the dashboard symbols from the broker (uncached)"""
+    # Get symbols using shared helper
+    indices_symbols, stocks_symbols, mcx_symbols = get_dashboard_symbols()
+
+    # Combine all for a single fetch (quotes service strips the extra MCX display_name key)
+    all_symbols_to_fetch = [*_STATIC_FETCH, *mcx_symbols]
+
+    qt_success, qt_response, _ = get_multiquotes(
+        symbols=all_symbols_to_fetch,
+        auth_token=auth_token,
+        broker=broker
+    )
+
+    # DEBUG LOGGING for MCX (lazy %-formatting; the symbol list is only built when DEBUG is on)
+    logger.debug("Dashboard fetching %d MCX symbols", len(mcx_symbols))
+    if mcx_symbols and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("MCX Request Symbols: %s", [s['symbol'] for s in mcx_symbols])
+
+    if not qt_success:
+        logger.warning(f"Failed to fetch indices: {qt_response.get('message')}")
+        return None
+
+    all_results = qt_response.get('results', [])
+    # Map results by "exchange:symbol" for easy lookup
+    results_map = _build_results_map(all_results)
+
+    # DEBUG Log for MCX results
+    if logger.isEnabledFor(logging.DEBUG):
+        for r in all_results:
+            if (r.get('exchange') or '').upper() == 'MCX':
+                logger.debug("MCX Result: %s -> Data present: %s", r.get('symbol', ''), r.get('data') is not None)
+
+    # Populate NSE/BSE Indices, Stocks and MCX in a single pass
+    dashboard_data = {'indices': [], 'stocks': [], 'mcx': []}
+    for category, symbols in (('indices', indices_symbols), ('stocks', stocks_symbols), ('mcx', mcx_symbols)):
+        for req in symbols:
+            key = f"{req['exchange']}:{req['symbol']}"
+            data = results_map.get(key)
+
+            # Fallback to MCX_FO if not found (common Broker response vs Request mismatch)
+            if data is None and req['exchange'] == 'MCX':
+                key = f"MCX_FO:{req['symbol']}"
+                data = results_map.get(key)
+
+            if data is None:
+                if category == 'mcx':
+                    logger.debug("MCX Symbol %s not found in results map. Keys tried: %s", req['symbol'], key)
+                continue
+
+            if category == 'mcx':
+                # Map back to friendly names
+                data['display_name'] = req.get('display_name', req['symbol'])
+            dashboard_data[category].append(data)
+
+    return dashboard_data['indices'], dashboard_data['stocks'], dashboard_data['mcx'], results_map
+
+
+def _build_results_map(all_results):
+    """Map quote results by "EXCHANGE:symbol" (exchange normalized to upper case)"""
+    return {
+        f"{(r.get('exchange') or '').upper()}:{r.get('symbol', '')}": r
+        for r in all_results
+    }
+
+
 def get_dashboard_symbols():
     """Helper to get the list of symbols to display on dashboard"""
-    # NSE/BSE Indices
-    indices_symbols = [
-        {'symbol': 'NIFTY', 'exchange': 'NSE_INDEX'},
-        {'symbol': 'BANKNIFTY', 'exchange': 'NSE_INDEX'},
-        {'symbol': 'FINNIFTY', 'exchange': 'NSE_INDEX'},
-        {'symbol': 'SENSEX', 'exchange': 'BSE_INDEX'},
-        {'symbol': 'BANKEX', 'exchange': 'BSE_INDEX'}
-    ]
-    
-    # Top 10 NSE Stocks
-    stocks_symbols = [
-        {'symbol': 'RELIANCE', 'exchange': 'NSE'},
-        {'symbol': 'HDFCBANK', 'exchange': 'NSE'},
-        {'symbol': 'INFY', 'exchange': 'NSE'},
-        {'symbol': 'TCS', 'exchange': 'NSE'},
-        {'symbol': 'ICICIBANK', 'exchange': 'NSE'},
-        {'symbol': 'KOTAKBANK', 'exchange': 'NSE'},
-        {'symbol': 'LT', 'exchange': 'NSE'},
-        {'symbol': 'AXISBANK', 'exchange': 'NSE'},
-        {'symbol': 'ITC', 'exchange': 'NSE'},
-        {'symbol': 'SBIN', 'exchange': 'NSE'}
-    ]
-    
-    # MCX Indices (Active Futures)
+    # MCX Indices (Active Futures) - contracts only roll over once a day
+    mcx_symbols = list(_resolve_mcx_active(datetime.now().date().isoformat()))
+    if not mcx_symbols:
+        # Don't pin an empty result for the whole day (e.g. master contract not downloaded yet)
+        _resolve_mcx_active.cache_clear()
+
+    return _INDICES_SYMBOLS, _STOCKS_SYMBOLS, mcx_symbols
+
+
+@lru_cache(maxsize=512)
+def _parse_expiry(expiry):
+    """Parse an MCX expiry string (e.g. 19-FEB-2026 or 19-FEB-26), cached per raw string"""
+    # Try standard 4-digit year first, then 2-digit year (common in MCX data)
+    for fmt in ('%d-%b-%Y', '%d-%b-%y'):
+        try:
+            return datetime.strptime(expiry, fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+@lru_cache(maxsize=2)
+def _mcx_futcom_snapshot(today_iso):
+    """Load (symbol, expiry) for all MCX FUTCOM contracts once per trading day"""
+    from sqlalchemy import select
+    from database.symbol import db_session, SymToken
+
+    # Only (symbol, expiry) are needed, so select the columns instead of hydrating ORM rows
+    return tuple(db_session.execute(
+        select(SymToken.symbol, SymToken.expiry).where(
+            SymToken.exchange == 'MCX',
+            SymToken.instrumenttype == 'FUTCOM'
+        )
+    ).all())
+
+
+def _get_mcx_futcom_rows():
+    """Today's MCX FUTCOM snapshot; an empty snapshot is not kept so it is retried on the next call"""
+    rows = _mcx_futcom_snapshot(datetime.now().date().isoformat())
+    if not rows:
+        _mcx_futcom_snapshot.cache_clear()
+    return rows
+
+
+@lru_cache(maxsize=4)
+def _resolve_mcx_active(today_iso):
+    """Resolve the nearest active MCX futures for the dashboard, memoized per trading day"""
     mcx_symbols = []
     try:
-        from database.symbol import db_session, SymToken
-        from datetime import datetime
-        
-        # Helper to find nearest active future
-        def get_active_future(base_symbol):
-            # Query database directly for futures
-            try:
-                # Search for symbols starting with base_symbol and ending with FUT or FUTCOM
-                results = db_session.query(SymToken).filter(
-                    SymToken.symbol.like(f'{base_symbol}%FUT'),
-                    SymToken.exchange == 'MCX',
-                    SymToken.instrumenttype == 'FUTCOM'
-                ).limit(30).all()
-                
-                if not results:
-                    return None
-                
-                today = datetime.now().date()
-                active_futures = []
-                
-                for fut in results:
-                    if fut.expiry:
-                        expiry_date = None
-                        try:
-                            # Try standard 4-digit year first
-                            expiry_date = datetime.strptime(fut.expiry, '%d-%b-%Y').date()
-                        except ValueError:
-                            try:
-                                # Fallback to 2-digit year (common in MCX data)
-                                expiry_date = datetime.strptime(fut.expiry, '%d-%b-%y').date()
-                            except ValueError:
-                                continue
-
-                        if expiry_date and expiry_date >= today:
-                            active_futures.append({
-                                'symbol': fut.symbol,
-                                'expiry': expiry_date
-                            })
-                
-                if not active_futures:
-                    return None
-                
-                # Sort by expiry (nearest first)
-                active_futures.sort(key=lambda x: x['expiry'])
-                
-                # Logic to prefer specific active contracts if needed, else nearest
-                nearest = active_futures[0]
-                
-                return {
-                    'symbol': nearest['symbol'],
-                    'exchange': 'MCX', 
-                    'display_name': base_symbol.title()
-                }
-            except Exception as e:
-                logger.error(f"Error checking MCX future for {base_symbol}: {e}")
-                return None
-
-        for commodity in ['CRUDEOIL', 'GOLD', 'NATURALGAS']:
-            future = get_active_future(commodity)
-            if future:
-                # Angel One specific adjustment if needed, usually 'MCX' works for quote fetch
-                future['exchange'] = 'MCX' 
-                mcx_symbols.append(future)
-                
+        rows = _get_mcx_futcom_rows()
+        if not rows:
+            # No MCX contracts loaded (e.g. master contract not downloaded yet)
+            return ()
+
+        today = date.fromisoformat(today_iso)
+
+        # Bucket active contracts by commodity: symbols starting with the base and ending with FUT
+        active_futures = {c: [] for c in _MCX_COMMODITIES}
+        for symbol, expiry in rows:
+            if not expiry or not symbol.endswith('FUT'):
+                continue
+            base_symbol = next((c for c in _MCX_COMMODITIES if symbol.startswith(c)), None)
+            if base_symbol is None:
+                continue
+
+            expiry_date = _parse_expiry(expiry)
+            if expiry_date is None:
+                continue
+
+            if expiry_date >= today:
+                active_futures[base_symbol].append((expiry_date, symbol))
+
+        for commodity in _MCX_COMMODITIES:
+            if not active_futures[commodity]:
+                continue
+            # Nearest expiry first
+            _, symbol = min(active_futures[commodity])
+            # Angel One specific adjustment if needed, usually 'MCX' works for quote fetch
+            mcx_symbols.append({
+                'symbol': symbol,
+                'exchange': 'MCX',
+                'display_name': commodity.title()
+            })
+
     except Exception as e:
         logger.error(f"Error generating MCX symbols: {e}")
-        
-    return indices_symbols, stocks_symbols, mcx_symbols
+
+    return tuple(mcx_symbols)
 
 
 @dashboard_bp.route('/api/mcx/expiries/<commodity>')
@@ -254,54 +363,35 @@ def get_dashboard_symbols():
 def get_mcx_expiries(commodity):
     """API endpoint to get all available expiries for an MCX commodity"""
     try:
-        from datetime import datetime
-        from database.symbol import db_session, SymToken
-        
-        # Query all FUTCOM contracts for this commodity
-        results = db_session.query(SymToken).filter(
-            SymToken.symbol.like(f'{commodity.upper()}%FUT'),
-            SymToken.exchange == 'MCX',
-            SymToken.instrumenttype == 'FUTCOM'
-        ).all()
-        
-        if not results:
+        # All FUTCOM contracts for this commodity with a parseable expiry, nearest first
+        prefix = commodity.upper()
+        contracts = sorted(
+            (expiry_date, symbol) for symbol, expiry in _get_mcx_futcom_rows()
+            if symbol.startswith(prefix) and symbol.endswith('FUT')
+            and expiry and (expiry_date := _parse_expiry(expiry)) is not None
+        )
+
+        if not contracts:
             return jsonify({'error': f'No contracts found for {commodity}'}), 404
-        
-        # Parse and format expiries
-        expiries = []
+
         today = datetime.now().date()
-        
-        for contract in results:
-            try:
-                if contract.expiry:
-                    try:
-                        expiry_date = datetime.strptime(contract.expiry, '%d-%b-%Y').date()
-                    except ValueError:
-                         expiry_date = datetime.strptime(contract.expiry, '%d-%b-%y').date()
-                    
-                    is_active = expiry_date >= today
-                    
-                    # Format display name (e.g., "FEB 2026")
-                    display_name = expiry_date.strftime('%b %Y').upper()
-                    
-                    expiries.append({
-                        'symbol': contract.symbol,
-                        'expiry_date': expiry_date.isoformat(),
-                        'display_name': display_name,
-                        'is_active': is_active
-                    })
-            except (ValueError, TypeError):
-                continue
-        
-        # Sort by expiry date
-        expiries.sort(key=lambda x: x['expiry_date'])
-        
+        expiries = [
+            {
+                'symbol': symbol,
+                'expiry_date': expiry_date.isoformat(),
+                # Format display name (e.g., "FEB 2026")
+                'display_name': expiry_date.strftime('%b %Y').upper(),
+                'is_active': expiry_date >= today
+            }
+            for expiry_date, symbol in contracts
+        ]
+
         # Mark nearest active
-        active_expiries = [e for e in expiries if e['is_active']]
-        if active_expiries:
-            active_expiries[0]['is_nearest'] = True
-        
-        return jsonify({
+        nearest = next((e for e in expiries if e['is_active']), None)
+        if nearest:
+            nearest['is_nearest'] = True
+
+        return _json_response({
             'commodity': commodity.upper(),
             'expiries': expiries
         })
@@ -311,11 +401,86 @@ def get_mcx_expiries(commodity):
         return jsonify({'error': str(e)}), 500
 
 
-import time
+def _lp(data):
+    """Extract last price from a quote result: 'lp' or 'ltp', top-level or nested under 'data'"""
+    val = data.get('lp') or data.get('ltp')
+    if val is None:
+        nested = data.get('data')
+        if nested:
+            val = nested.get('lp') or nested.get('ltp')
+    return val or 0
+
+
+def _load_margin_data(cache_key, login_username, auth_token, broker, analyze_mode):
+    """Fetch margin data from the broker (or sandbox in analyze mode) and cache it; runs on _DASH_POOL"""
+    try:
+        margin_data = {}
+        if broker:
+            if analyze_mode:
+                api_key = get_api_key_for_tradingview(login_username)
+                if api_key:
+                    success, response, status_code = get_funds(api_key=api_key)
+                    if success:
+                        margin_data = response.get('data', {})
+            else:
+                success, response, status_code = get_funds(auth_token=auth_token, broker=broker)
+                if success:
+                    margin_data = response.get('data', {})
+
+        # Debug Margin Data
+        logger.debug("Dashboard Margin Data for %s: %s", login_username, margin_data)
+
+        # Update Cache (failed fetches are retried on the next call)
+        if margin_data:
+            with _cache_lock:
+                _FUNDS_CACHE[cache_key] = margin_data
+        return margin_data
+    finally:
+        with _cache_lock:
+            _FUNDS_INFLIGHT.pop(cache_key, None)
+
+
+def _submit_margin_data(login_username, auth_token, broker, analyze_mode):
+    """
+    Return cached margin data, or a Future for the fund lookup.
+
+    Concurrent callers for the same user (the dashboard prefetch and the
+    page's /api/dashboard/funds call) share one in-flight lookup.
+    """
+    cache_key = (login_username, broker, analyze_mode)
+    with _cache_lock:
+        cached = _FUNDS_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        future = _FUNDS_INFLIGHT.get(cache_key)
+        if future is None:
+            future = _FUNDS_INFLIGHT[cache_key] = _DASH_POOL.submit(
+                _load_margin_data, cache_key, login_username, auth_token, broker, analyze_mode
+            )
+    return future
+
+
+@dashboard_bp.route('/api/dashboard/funds')
+@check_session_validity
+def get_dashboard_funds():
+    """API endpoint for the dashboard margin panel, loaded after the page renders"""
+    try:
+        login_username = session['user']
+        AUTH_TOKEN = get_auth_token(login_username)
+
+        if AUTH_TOKEN is None:
+            return jsonify({'error': 'No auth token'}), 401
+
+        margin_data = _submit_margin_data(login_username, AUTH_TOKEN, session.get('broker'), get_analyze_mode())
+        if isinstance(margin_data, Future):
+            margin_data = margin_data.result(timeout=FUNDS_TIMEOUT)
+
+        return _json_response(margin_data)
+
+    except Exception as e:
+        logger.error(f"Error fetching funds API: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
 
-# Simple in-memory cache: {(user_id, endpoint): {'data': response_data, 'timestamp': time.time()}}
-API_CACHE = {}
-CACHE_TTL = 1  # 1 second cache
 
 @dashboard_bp.route('/api/dashboard/prices')
 @check_session_validity
@@ -326,39 +491,21 @@ def get_dashboard_prices():
         
         # Check Cache
         cache_key = (login_username, 'dashboard_prices')
-        cached = API_CACHE.get(cache_key)
-        if cached and (time.time() - cached['timestamp'] < CACHE_TTL):
-            return jsonify(cached['data'])
+        with _cache_lock:
+            cached = _API_CACHE.get(cache_key)
+        if cached is not None:
+            return _json_response(cached, conditional=True)
 
         AUTH_TOKEN = get_auth_token(login_username)
         
         if AUTH_TOKEN is None:
             return jsonify({'error': 'No auth token'}), 401
         
-        # Get symbols using shared helper
-        indices_symbols, stocks_symbols, mcx_symbols = get_dashboard_symbols()
-        
-        # Combine all symbols
-        all_symbols_to_fetch = indices_symbols + stocks_symbols + [{'symbol': s['symbol'], 'exchange': s['exchange']} for s in mcx_symbols]
-        
-        # Fetch quotes
-        qt_success, qt_response, _ = get_multiquotes(
-            symbols=all_symbols_to_fetch,
-            auth_token=AUTH_TOKEN,
-            broker=session.get('broker')
-        )
-        
-        if not qt_success:
+        quotes = _fetch_dashboard_quotes(login_username, AUTH_TOKEN, session.get('broker'))
+        if quotes is None:
             return jsonify({'error': 'Failed to fetch quotes'}), 500
-        
-        all_results = qt_response.get('results', [])
-        results_map = {}
-        for r in all_results:
-             key_sym = r.get('symbol', '')
-             key_exc = r.get('exchange', '')
-             results_map[f"{key_exc}:{key_sym}"] = r
-             # Also try relaxed key (just symbol) for easier matching if exchange is ambiguous
-             results_map[key_sym] = r
+
+        indices_data, stocks_data, mcx_data, _ = quotes
 
         # Structure response
         response_data = {
@@ -368,70 +515,39 @@ def get_dashboard_prices():
         }
         
         # Process indices
-        for req in indices_symbols:
-            key = f"{req['exchange']}:{req['symbol']}"
-            data = results_map.get(key)
-            if data:
-                # Handle 'lp' or 'ltp' or nested 'd'
-                val = data.get('lp') or data.get('ltp')
-                if val is None and 'data' in data:
-                     val = data['data'].get('lp') or data['data'].get('ltp')
-                     
-                response_data['indices'].append({
-                    'symbol': req['symbol'],
-                    'lp': val if val else 0,
-                    'pc': data.get('pc', data.get('percentChange', 0))
-                })
+        for data in indices_data:
+            response_data['indices'].append({
+                'symbol': data.get('symbol'),
+                'lp': _lp(data),
+                'pc': data.get('pc', data.get('percentChange', 0))
+            })
         
         # Process stocks
-        for req in stocks_symbols:
-            key = f"{req['exchange']}:{req['symbol']}"
-            data = results_map.get(key)
-            if data:
-                val = data.get('lp') or data.get('ltp')
-                if val is None and 'data' in data:
-                     val = data['data'].get('lp') or data['data'].get('ltp')
-
-                response_data['stocks'].append({
-                    'symbol': req['symbol'],
-                    'lp': val if val else 0,
-                    'pc': data.get('pc', data.get('percentChange', 0))
-                })
+        for data in stocks_data:
+            response_data['stocks'].append({
+                'symbol': data.get('symbol'),
+                'lp': _lp(data),
+                'pc': data.get('pc', data.get('percentChange', 0))
+            })
         
         # Process MCX
-        for req in mcx_symbols:
-            key = f"{req['exchange']}:{req['symbol']}"
-            
-            # Fallback logic parity with dashboard() route
-            if key not in results_map and req['exchange'] == 'MCX':
-                 key_fo = f"MCX_FO:{req['symbol']}"
-                 if key_fo in results_map:
-                     key = key_fo
-
-            data = results_map.get(key)
-            if data:
-                val = data.get('lp') or data.get('ltp')
-                if val is None and 'data' in data:
-                     val = data['data'].get('lp') or data['data'].get('ltp')
-
-                response_data['mcx'].append({
-                    'symbol': req.get('display_name', req['symbol']),
-                    'lp': val if val else 0,
-                    'pc': data.get('pc', data.get('percentChange', 0))
-                })
-            else:
-                 logger.debug(f"DEBUG API: MCX Symbol {req['symbol']} not found in results map. Keys tried: {key}")
+        for data in mcx_data:
+            response_data['mcx'].append({
+                'symbol': data['display_name'],
+                'lp': _lp(data),
+                'pc': data.get('pc', data.get('percentChange', 0))
+            })
         
         # Update Cache
-        API_CACHE[cache_key] = {'data': response_data, 'timestamp': time.time()}
+        with _cache_lock:
+            _API_CACHE[cache_key] = response_data
 
-        return jsonify(response_data)
+        return _json_response(response_data, conditional=True)
         
     except Exception as e:
         logger.error(f"Error fetching prices API: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
-from flask import request
 from database.settings_db import get_trading_lots, set_trading_lots
 
 @dashboard_bp.route('/api/settings/lots', methods=['GET', 'POST'])
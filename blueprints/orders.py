@@ -1,10 +1,20 @@
-from flask import Blueprint, jsonify, request, render_template, session, redirect, url_for, Response
+from flask import Blueprint, jsonify, request, render_template, session, redirect, url_for, Response, g, current_app
+from functools import lru_cache
 from importlib import import_module
+from itertools import islice
 from database.auth_db import get_auth_token, get_api_key_for_tradingview
 from database.settings_db import get_analyze_mode
 from utils.session import check_session_validity
 from services.place_smart_order_service import place_smart_order
 from services.close_position_service import close_position
+from services.cancel_all_order_service import cancel_all_orders
+from services.action_center_service import get_action_center_data
+from services.pending_order_execution_service import execute_approved_order
+from database.action_center_db import (
+    get_pending_orders, get_pending_count, approve_pending_order,
+    bulk_approve_pending_orders, reject_pending_order, delete_pending_order
+)
+from extensions import socketio
 from services.orderbook_service import get_orderbook
 from services.tradebook_service import get_tradebook
 from services.positionbook_service import get_positionbook
@@ -12,10 +22,18 @@ from services.holdings_service import get_holdings
 from services.position_monitor_service import position_monitor
 from services.quotes_service import get_quotes, get_multiquotes
 from utils.logging import get_logger
-from limiter import limiter
+from limiter import limiter, get_user_or_remote_address
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import csv
+import gzip
+import hashlib
 import io
+import logging
+import orjson
 import os
+import threading
+import zlib
 
 logger = get_logger(__name__)
 
@@ -25,183 +43,351 @@ API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "50 per second")
 # Define the blueprint
 orders_bp = Blueprint('orders_bp', __name__, url_prefix='/')
 
+def _json(data, status=200):
+    """JSON response serialized with orjson (falls back to str() for types like Decimal, as jsonify does)"""
+    return Response(orjson.dumps(data, default=str), status=status, mimetype='application/json')
+
 @orders_bp.errorhandler(429)
 def ratelimit_handler(e):
     """Handle rate limit exceeded errors"""
-    return jsonify({
+    return _json({
         'status': 'error',
         'message': 'Rate limit exceeded. Please try again later.'
-    }), 429
+    }, 429)
 
-import time
+# Book payloads repeat the same keys per row and compress well; tiny bodies are sent as-is
+COMPRESS_MIN_SIZE = 500
+COMPRESS_LEVEL = 5
 
-# Simple in-memory cache: {(user_id, endpoint): {'data': response_data, 'timestamp': time.time()}}
-API_CACHE = {}
+def _json_response(data):
+    """
+    JSON response for the polled book endpoints, carrying an ETag of the body.
+    Becomes a bodiless 304 when the client's If-None-Match already matches it,
+    and is gzip-encoded for clients that accept it.
+    """
+    response = _json(data)
+    body = response.get_data()
+    response.set_etag(hashlib.blake2b(body, digest_size=8).hexdigest(), weak=True)
+    response.headers['Cache-Control'] = 'private, max-age=1'
+    response.vary.add('Accept-Encoding')
+    response = response.make_conditional(request)
+
+    if (response.status_code == 200 and len(body) >= COMPRESS_MIN_SIZE
+            and request.accept_encodings['gzip']):
+        response.set_data(gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def _analyze_mode():
+    """get_analyze_mode() memoized on flask.g for the current request"""
+    analyze = getattr(g, '_analyze', None)
+    if analyze is None:
+        analyze = g._analyze = get_analyze_mode()
+    return analyze
+
+def _auth_token(user):
+    """get_auth_token() (a Fernet decrypt even on cache hits) memoized on flask.g for the current request"""
+    tokens = getattr(g, '_auth_tokens', None)
+    if tokens is None:
+        tokens = g._auth_tokens = {}
+    if user not in tokens:
+        tokens[user] = get_auth_token(user)
+    return tokens[user]
+
+def _api_key(user):
+    """get_api_key_for_tradingview() memoized on flask.g for the current request"""
+    api_keys = getattr(g, '_api_keys', None)
+    if api_keys is None:
+        api_keys = g._api_keys = {}
+    if user not in api_keys:
+        api_keys[user] = get_api_key_for_tradingview(user)
+    return api_keys[user]
+
+# Short-lived response cache: {(user_id, endpoint): response_data}
+# Bounded so idle users are evicted instead of accumulating forever
 CACHE_TTL = 1  # 1 second cache
+API_CACHE = TTLCache(maxsize=int(os.getenv("API_CACHE_MAX", 10000)), ttl=CACHE_TTL)
+_CACHE_LOCK = threading.RLock()
+
+def _cache_get(key):
+    """Return the cached response for key, or None if missing/expired"""
+    with _CACHE_LOCK:
+        return API_CACHE.get(key)
+
+def _cache_set(key, value):
+    """Store a response in the cache"""
+    with _CACHE_LOCK:
+        API_CACHE[key] = value
+
+# In-flight backend fetches: {(user_id, endpoint): threading.Event}
+_INFLIGHT = {}
+INFLIGHT_TIMEOUT = 2  # seconds a coalesced request waits for the in-flight fetch
+
+def _single_flight(cache_key, loader):
+    """
+    Serve cache_key from the cache, or run loader() once for concurrent misses.
+    loader returns the service-style (success, data, status_code) tuple and only
+    successful results are cached; callers that waited re-read the cache and
+    only fetch themselves if the leader failed.
+    """
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return True, cached, 200
+
+    with _CACHE_LOCK:
+        event = _INFLIGHT.get(cache_key)
+        is_leader = event is None
+        if is_leader:
+            event = _INFLIGHT[cache_key] = threading.Event()
+
+    if not is_leader:
+        event.wait(timeout=INFLIGHT_TIMEOUT)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            return True, cached, 200
+        return loader()
+
+    try:
+        success, data, status_code = loader()
+        if success:
+            _cache_set(cache_key, data)
+        return success, data, status_code
+    finally:
+        with _CACHE_LOCK:
+            _INFLIGHT.pop(cache_key, None)
+        event.set()
+
+def _fetch_orders(login_username, auth_token, broker, api_key=None):
+    """Orderbook enriched with LTP; shared by /orderbook and /api/orders and cached for CACHE_TTL"""
+    def load():
+        if api_key:
+            success, response, status_code = get_orderbook(api_key=api_key)
+        else:
+            success, response, status_code = get_orderbook(auth_token=auth_token, broker=broker)
+        if not success:
+            return success, response, status_code
+
+        data = response.get('data', {})
+        data['orders'] = enrich_orders_with_ltp(data.get('orders', []), login_username, auth_token, broker,
+                                                api_key=api_key)
+        return True, data, status_code
+
+    return _single_flight((login_username, 'orders'), load)
+
+def _fetch_trades(login_username, auth_token, broker, api_key=None):
+    """Tradebook rows; shared by /tradebook and /api/trades and cached for CACHE_TTL"""
+    def load():
+        if api_key:
+            success, response, status_code = get_tradebook(api_key=api_key)
+        else:
+            success, response, status_code = get_tradebook(auth_token=auth_token, broker=broker)
+        if not success:
+            return success, response, status_code
+        return True, response.get('data', []), status_code
+
+    return _single_flight((login_username, 'trades'), load)
+
+def _fetch_positions(login_username, auth_token, broker, api_key=None):
+    """Positions enriched with monitor SL/Target and LTP; shared by /positions and /api/positions"""
+    def load():
+        if api_key:
+            success, response, status_code = get_positionbook(api_key=api_key)
+        else:
+            success, response, status_code = get_positionbook(auth_token=auth_token, broker=broker)
+        if not success:
+            return success, response, status_code
+
+        positions = enrich_positions(response.get('data', []), login_username, auth_token, broker, api_key=api_key)
+        return True, positions, status_code
+
+    # Keyed on the monitor's version so an SL/target edit isn't hidden behind the cached response
+    return _single_flight((login_username, 'positions', position_monitor.lookup_version), load)
 
 @orders_bp.route('/api/orders')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def get_orders_api():
     """API endpoint to fetch orders (JSON) with Caching"""
     login_username = session['user']
-    
-    # Check Cache
-    cache_key = (login_username, 'orders')
-    cached = API_CACHE.get(cache_key)
-    if cached and (time.time() - cached['timestamp'] < CACHE_TTL):
-        return jsonify(cached['data'])
-
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
-        return jsonify({'status': 'error', 'message': 'Authentication failed'}), 401
+        return _json({'status': 'error', 'message': 'Authentication failed'}, 401)
 
     broker = session.get('broker')
     if not broker:
-        return jsonify({'status': 'error', 'message': 'Broker not set'}), 400
+        return _json({'status': 'error', 'message': 'Broker not set'}, 400)
 
-    if get_analyze_mode():
-        api_key = get_api_key_for_tradingview(login_username)
-        if api_key:
-            success, response, status_code = get_orderbook(api_key=api_key)
-        else:
-            return jsonify({'status': 'error', 'message': 'API key required'}), 400
-    else:
-        success, response, status_code = get_orderbook(auth_token=auth_token, broker=broker)
+    api_key = None
+    if _analyze_mode():
+        api_key = _api_key(login_username)
+        if not api_key:
+            return _json({'status': 'error', 'message': 'API key required'}, 400)
 
+    success, data, status_code = _fetch_orders(login_username, auth_token, broker, api_key)
     if not success:
-        return jsonify({'status': 'error', 'message': response.get('message', 'Failed to fetch orders')}), status_code
+        return _json({'status': 'error', 'message': data.get('message', 'Failed to fetch orders')}, status_code)
 
-    data = response.get('data', {})
-    orders = data.get('orders', [])
-    orders = enrich_orders_with_ltp(orders, login_username, auth_token, broker)
-    data['orders'] = orders
-    
-    # Update Cache
-    API_CACHE[cache_key] = {'data': data, 'timestamp': time.time()}
-    
-    return jsonify(data)
+    return _json_response(data)
 
 @orders_bp.route('/api/trades')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def get_trades_api():
     """API endpoint to fetch trades (JSON) with Caching"""
     login_username = session['user']
-    
-    # Check Cache
-    cache_key = (login_username, 'trades')
-    cached = API_CACHE.get(cache_key)
-    if cached and (time.time() - cached['timestamp'] < CACHE_TTL):
-        return jsonify(cached['data'])
-        
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
-        return jsonify({'status': 'error', 'message': 'Authentication failed'}), 401
+        return _json({'status': 'error', 'message': 'Authentication failed'}, 401)
 
     broker = session.get('broker')
     if not broker:
-        return jsonify({'status': 'error', 'message': 'Broker not set'}), 400
+        return _json({'status': 'error', 'message': 'Broker not set'}, 400)
 
-    if get_analyze_mode():
-        api_key = get_api_key_for_tradingview(login_username)
-        if api_key:
-            success, response, status_code = get_tradebook(api_key=api_key)
-        else:
-            return jsonify({'status': 'error', 'message': 'API key required'}), 400
-    else:
-        success, response, status_code = get_tradebook(auth_token=auth_token, broker=broker)
+    api_key = None
+    if _analyze_mode():
+        api_key = _api_key(login_username)
+        if not api_key:
+            return _json({'status': 'error', 'message': 'API key required'}, 400)
 
+    success, trades, status_code = _fetch_trades(login_username, auth_token, broker, api_key)
     if not success:
-        return jsonify({'status': 'error', 'message': response.get('message', 'Failed to fetch trades')}), status_code
-
-    trades = response.get('data', [])
-    # trades = enrich_trades_with_ltp(trades, login_username, auth_token, broker) # Removed
-    
-    response_data = {'trades': trades}
-    
-    # Update Cache
-    API_CACHE[cache_key] = {'data': response_data, 'timestamp': time.time()}
+        return _json({'status': 'error', 'message': trades.get('message', 'Failed to fetch trades')}, status_code)
 
-    return jsonify(response_data)
+    return _json_response({'trades': trades})
 
 @orders_bp.route('/api/positions')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def get_positions_api():
     """API endpoint to fetch positions (JSON) with Caching"""
     login_username = session['user']
-    
-    # Check Cache
-    cache_key = (login_username, 'positions')
-    cached = API_CACHE.get(cache_key)
-    if cached and (time.time() - cached['timestamp'] < CACHE_TTL):
-        return jsonify(cached['data'])
-        
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
-        return jsonify({'status': 'error', 'message': 'Authentication failed'}), 401
+        return _json({'status': 'error', 'message': 'Authentication failed'}, 401)
 
     broker = session.get('broker')
     if not broker:
-        return jsonify({'status': 'error', 'message': 'Broker not set'}), 400
+        return _json({'status': 'error', 'message': 'Broker not set'}, 400)
 
-    if get_analyze_mode():
-        api_key = get_api_key_for_tradingview(login_username)
-        if api_key:
-            success, response, status_code = get_positionbook(api_key=api_key)
-        else:
-            return jsonify({'status': 'error', 'message': 'API key required'}), 400
-    else:
-        success, response, status_code = get_positionbook(auth_token=auth_token, broker=broker)
+    api_key = None
+    if _analyze_mode():
+        api_key = _api_key(login_username)
+        if not api_key:
+            return _json({'status': 'error', 'message': 'API key required'}, 400)
 
+    success, positions, status_code = _fetch_positions(login_username, auth_token, broker, api_key)
     if not success:
-        return jsonify({'status': 'error', 'message': response.get('message', 'Failed to fetch positions')}), status_code
+        return _json({'status': 'error', 'message': positions.get('message', 'Failed to fetch positions')}, status_code)
 
-    positions = response.get('data', [])
-    
-    # Enrich positions with SL/Target from monitor
-    positions = enrich_positions_with_monitor(positions)
-    
-    # Enrich positions with real-time LTP data
-    positions = enrich_positions_with_ltp(positions, login_username, auth_token, broker)
-    
-    response_data = {'data': positions}
+    return _json_response({'data': positions})
+
+
+
+# Large books are quoted in parallel batches to stay under broker per-request symbol caps
+QUOTE_BATCH_SIZE = 50
+_QUOTE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='orders-quotes')
+
+def _get_multiquotes_batched(symbols_to_fetch, auth_token, broker, api_key=None):
+    """
+    get_multiquotes() for the enrichment helpers. Up to QUOTE_BATCH_SIZE symbols go
+    in a single call; larger lists are split into batches fetched concurrently and
+    their results merged. Succeeds if any batch succeeded.
+    """
+    if api_key:
+        fetch = lambda chunk: get_multiquotes(symbols=chunk, api_key=api_key)
+    else:
+        fetch = lambda chunk: get_multiquotes(symbols=chunk, auth_token=auth_token, broker=broker)
+
+    if len(symbols_to_fetch) <= QUOTE_BATCH_SIZE:
+        return fetch(symbols_to_fetch)
+
+    chunks = [symbols_to_fetch[i:i + QUOTE_BATCH_SIZE] for i in range(0, len(symbols_to_fetch), QUOTE_BATCH_SIZE)]
+    responses = list(_QUOTE_POOL.map(fetch, chunks))
+
+    results = []
+    for success, q_resp, _ in responses:
+        if success:
+            results.extend(q_resp.get('results', []))
+    if not any(success for success, _, _ in responses):
+        return responses[0]
+    return True, {'status': 'success', 'results': results}, 200
+
+def _fetch_ltp_map(records, auth_token, broker, api_key=None):
+    """
+    Quote the unique (symbol, exchange) pairs in records and return
+    {(SYMBOL, EXCHANGE): ltp}; empty if there is nothing to quote or the fetch failed.
+    """
+    # Collect unique symbols
+    unique_symbols = set() # (symbol, exchange)
+    for record in records:
+        s = record.get('symbol')
+        e = record.get('exchange')
+        if s and e:
+            # Coerce once here so the per-row lookups can assume str keys
+            if not isinstance(s, str):
+                record['symbol'] = s = str(s)
+            if not isinstance(e, str):
+                record['exchange'] = e = str(e)
+            unique_symbols.add((s, e))
     
-    # Update Cache
-    API_CACHE[cache_key] = {'data': response_data, 'timestamp': time.time()}
+    if not unique_symbols:
+        logger.info("No symbols to fetch for LTP enrichment")
+        return {}
 
-    return jsonify(response_data)
+    symbols_to_fetch = [{'symbol': s, 'exchange': e} for s, e in unique_symbols]
+    success, q_resp, _ = _get_multiquotes_batched(symbols_to_fetch, auth_token, broker, api_key)
 
+    if not success or 'results' not in q_resp:
+        logger.warning(f"Failed to fetch multiquotes for LTP enrichment: {q_resp}")
+        return {}
 
+    logger.info(f"LTP Enrichment: Multiquotes fetched {len(q_resp['results'])}/{len(symbols_to_fetch)} symbols")
+    ltp_map = {}
+    for item in q_resp['results']:
+        logger.debug("LTP Item: %s", item)
+        
+        val = None
+        if 'data' in item:
+            if 'ltp' in item['data']:
+                val = item['data']['ltp']
+            elif 'lp' in item['data']:
+                val = item['data']['lp']
+        elif 'ltp' in item:
+            val = item['ltp']
+        elif 'lp' in item:
+            val = item['lp']
+        
+        if val is not None:
+            # Canonical upper-case key; lookups normalize the same way
+            k_sym = item.get('symbol') or ''
+            k_exc = item.get('exchange') or ''
+            ltp_map[(k_sym.upper(), k_exc.upper())] = val
 
+    return ltp_map
+
+def enrich_positions(positions, login_username, auth_token, broker, api_key=None):
+    """
+    Enrich positions with SL/Target data from PositionMonitor and real-time LTP
+    in a single pass (api_key selects the sandbox quote path)
+    """
+    if not positions:
+        return positions
 
-def enrich_positions_with_monitor(positions):
-    """Enrich positions with SL/Target data from PositionMonitor"""
     try:
-        if not positions:
-            return positions
-            
-        active_monitored = position_monitor.get_active_positions()
-        # Create a lookup map: (symbol, product, exchange) -> position_data
-        monitor_map = {}
-        for pid, pdata in active_monitored.items():
-            sym = pdata.get('symbol')
-            prod = pdata.get('product', 'MIS')
-            exc = pdata.get('exchange')
-            
-            # Key 1: Strict match
-            monitor_map[(sym, prod, exc)] = pdata
-            
-            # Key 2: Relaxed match (ignore product) - Store if not already present
-            if (sym, exc) not in monitor_map:
-                monitor_map[(sym, exc)] = pdata
-        
-        logger.info(f"Monitor Map Keys: {list(monitor_map.keys())}")
-            
+        ltp_map = _fetch_ltp_map(positions, auth_token, broker, api_key)
+    except Exception as e:
+        logger.error(f"Error enriching positions with LTP: {e}", exc_info=True)
+        ltp_map = {}
+
+    try:
+        # Lookup maps are maintained by the monitor as positions are added/removed
+        strict_map, relaxed_map = position_monitor.get_lookup_maps()
+        # Count only: listing the keys would iterate a map the price-monitor thread may be mutating
+        logger.debug("Monitor map size: %d", len(strict_map))
+
         for pos in positions:
             sym = pos.get('symbol')
             prod = pos.get('product')
@@ -210,292 +396,186 @@ def enrich_positions_with_monitor(positions):
             key_strict = (sym, prod, exc)
             key_relaxed = (sym, exc)
             
-            m_pos = None
-            if key_strict in monitor_map:
-                m_pos = monitor_map[key_strict]
-                logger.info(f"Position Match (Strict): {key_strict}")
-            elif key_relaxed in monitor_map:
-                m_pos = monitor_map[key_relaxed]
-                logger.info(f"Position Match (Relaxed): {key_relaxed}")
-            else:
-                 logger.debug(f"Position No Match: {key_strict}")
-
-                
+            # Collect the added fields and merge them with one update() so each row grows once
+            m_pos = strict_map.get(key_strict) or relaxed_map.get(key_relaxed)
             if m_pos:
-                pos['current_sl'] = m_pos.get('current_sl')
-                pos['final_target'] = m_pos.get('final_target')
-                pos['targets'] = m_pos.get('targets', [])
-                logger.info(f"Enriched {sym}: SL={pos['current_sl']}, TGT={pos['final_target']} (Keys: Strict={key_strict in monitor_map}, Relaxed={key_relaxed in monitor_map})")
+                fields = {
+                    'current_sl': m_pos.get('current_sl'),
+                    'final_target': m_pos.get('final_target'),
+                    'targets': m_pos.get('targets', []),
+                }
+                logger.debug("Enriched %s: SL=%s, TGT=%s", sym, fields['current_sl'], fields['final_target'])
             else:
-                pos['current_sl'] = '-'
-                pos['final_target'] = '-'
-                pos['targets'] = []
-                
-    except Exception as e:
-        logger.error(f"Error enriching positions with monitor data: {e}")
-    
-    return positions
+                logger.debug("Position No Match: %s", key_strict)
+                fields = {'current_sl': '-', 'final_target': '-', 'targets': []}
 
+            # Rows without a quote are left without 'ltp'; clients render that as '-'
+            ltp = ltp_map.get((str(sym or '').upper(), str(exc or '').upper()))
+            if ltp is not None:
+                fields['ltp'] = ltp
 
-def enrich_positions_with_ltp(positions, login_username, auth_token, broker):
-    """Enrich positions with real-time LTP data"""
-    try:
-        if not positions:
-            return positions
-            
-        # Collect unique symbols
-        unique_symbols = {} # (symbol, exchange) -> None
-        for position in positions:
-            s = position.get('symbol')
-            e = position.get('exchange')
-            if s and e:
-                unique_symbols[(s, e)] = None
-        
-        symbols_to_fetch = [{'symbol': s, 'exchange': e} for s, e in unique_symbols.keys()]
-        
-        if symbols_to_fetch:
-            from services.quotes_service import get_multiquotes
-            from database.settings_db import get_analyze_mode
-            from database.auth_db import get_api_key_for_tradingview
-            
-            if get_analyze_mode():
-                api_key = get_api_key_for_tradingview(login_username)
-                success, q_resp, _ = get_multiquotes(symbols=symbols_to_fetch, api_key=api_key)
-            else:
-                success, q_resp, _ = get_multiquotes(symbols=symbols_to_fetch, auth_token=auth_token, broker=broker)
-                
-            if success and 'results' in q_resp:
-                logger.info(f"Positions MTM: Multiquotes fetched {len(q_resp['results'])}/{len(symbols_to_fetch)} symbols")
-                ltp_map = {} 
-                for item in q_resp['results']:
-                    val = None
-                    if 'data' in item:
-                        if 'ltp' in item['data']:
-                            val = item['data']['ltp']
-                        elif 'lp' in item['data']:
-                            val = item['data']['lp']
-                    elif 'ltp' in item:
-                        val = item['ltp']
-                    elif 'lp' in item:
-                        val = item['lp']
-                    
-                    if val is not None:
-                        k_sym = str(item.get('symbol', ''))
-                        k_exc = str(item.get('exchange', ''))
-                        ltp_map[(k_sym, k_exc)] = val
-                        ltp_map[(k_sym.upper(), k_exc.upper())] = val
-
-                for position in positions:
-                    s = str(position.get('symbol'))
-                    e = str(position.get('exchange'))
-                    
-                    # Try matching with different case combinations
-                    found_val = None
-                    if (s, e) in ltp_map: 
-                        found_val = ltp_map[(s, e)]
-                    elif (s.upper(), e.upper()) in ltp_map: 
-                        found_val = ltp_map[(s.upper(), e.upper())]
-                    
-                    if found_val is not None:
-                        position['ltp'] = found_val
-                    else:
-                        position['ltp'] = '-'
-            else:
-                # Set defaults on failure
-                for position in positions:
-                    position['ltp'] = '-'
-        else:
-            for position in positions:
-                position['ltp'] = '-'
-
+            pos.update(fields)
     except Exception as e:
-        logger.error(f"Error enriching positions with LTP: {e}", exc_info=True)
-        
+        # A monitor failure must not fail the positions response; serve the rows unenriched
+        logger.error(f"Error enriching positions with monitor data: {e}", exc_info=True)
+        for pos in positions:
+            pos.setdefault('current_sl', '-')
+            pos.setdefault('final_target', '-')
+            pos.setdefault('targets', [])
+
     return positions
 
-def enrich_orders_with_ltp(orders, login_username, auth_token, broker):
-    """Enrich orders with LTP data"""
+def enrich_orders_with_ltp(orders, login_username, auth_token, broker, api_key=None):
+    """Enrich orders with LTP data (api_key selects the sandbox quote path)"""
     try:
         if not orders:
             return orders
-            
-        # Collect unique symbols
-        unique_symbols = {} # (symbol, exchange) -> None
+
+        ltp_map = _fetch_ltp_map(orders, auth_token, broker, api_key)
+        if not ltp_map:
+            return orders
+
+        # Orders without a quote are left without 'ltp'; clients render that as '-'
         for order in orders:
-            s = order.get('symbol')
-            e = order.get('exchange')
-            if s and e:
-                unique_symbols[(s, e)] = None
-        
-        symbols_to_fetch = [{'symbol': s, 'exchange': e} for s, e in unique_symbols.keys()]
-        
-        if symbols_to_fetch:
-            if get_analyze_mode():
-                api_key = get_api_key_for_tradingview(login_username)
-                success, q_resp, _ = get_multiquotes(symbols=symbols_to_fetch, api_key=api_key)
-            else:
-                success, q_resp, _ = get_multiquotes(symbols=symbols_to_fetch, auth_token=auth_token, broker=broker)
-                
-            if success and 'results' in q_resp:
-                logger.info(f"LTP Enrichment: Got results for {len(q_resp['results'])} symbols")
-                ltp_map = {} 
-                for item in q_resp['results']:
-                    # Log the item structure for debugging
-                    logger.info(f"LTP Item: {item}")
-                    
-                    val = None
-                    if 'data' in item:
-                        if 'ltp' in item['data']:
-                            val = item['data']['ltp']
-                        elif 'lp' in item['data']:
-                            val = item['data']['lp']
-                    elif 'ltp' in item:
-                        val = item['ltp']
-                    elif 'lp' in item:
-                        val = item['lp']
-                    
-                    if val is not None:
-                        # Ensure keys match order data format (str)
-                        k_sym = str(item.get('symbol', ''))
-                        k_exc = str(item.get('exchange', ''))
-                        ltp_map[(k_sym, k_exc)] = val
-                        # Also try alternate key formats if needed
-                        ltp_map[(k_sym, k_exc.upper())] = val
-                        ltp_map[(k_sym.upper(), k_exc)] = val
-                        ltp_map[(k_sym.upper(), k_exc.upper())] = val
-
-                logger.info(f"LTP Map keys: {list(ltp_map.keys())}")
-
-                for order in orders:
-                    s = str(order.get('symbol'))
-                    e = str(order.get('exchange'))
-                    key = (s, e)
-                    
-                    # Try exhaustive matching
-                    found_val = None
-                    if (s, e) in ltp_map: found_val = ltp_map[(s, e)]
-                    elif (s, e.upper()) in ltp_map: found_val = ltp_map[(s, e.upper())]
-                    elif (s.upper(), e) in ltp_map: found_val = ltp_map[(s.upper(), e)]
-                    elif (s.upper(), e.upper()) in ltp_map: found_val = ltp_map[(s.upper(), e.upper())]
-                    
-                    if found_val is not None:
-                        order['ltp'] = found_val
-                    else:
-                        order['ltp'] = '-'
-                        logger.warning(f"LTP Missing for order: {s} ({e}) - Available keys: {list(ltp_map.keys())[:5]}...")
-            else:
-                logger.warning(f"Failed to fetch multiquotes for orderbook ltp enrichment: {q_resp}")
-                # Set defaults
-                for order in orders:
-                     order['ltp'] = '-'
-        else:
-             logger.info("No symbols to fetch for LTP enrichment")
-             for order in orders:
-                 order['ltp'] = '-'
+            s = order.get('symbol') or ''
+            e = order.get('exchange') or ''
+            ltp = ltp_map.get((s.upper(), e.upper()))
+            if ltp is not None:
+                order['ltp'] = ltp
 
     except Exception as e:
         logger.error(f"Error enriching orderbook with LTP: {e}", exc_info=True)
         
     return orders
 
+@lru_cache(maxsize=64)
+def _load_broker_functions(broker, module_name, function_names):
+    """Memoized resolver; raises on failure so a failed import is never cached"""
+    module = import_module(f'broker.{broker}.{module_name}')
+    return {name: getattr(module, name) for name in function_names}
+
 def dynamic_import(broker, module_name, function_names):
-    module_functions = {}
+    """
+    Resolve function_names (a tuple, so calls can be memoized) from broker.<broker>.<module_name>.
+    The returned dict is shared between callers and must not be mutated.
+    Returns None on failure; the next call retries the import.
+    """
     try:
-        # Import the module based on the broker name
-        module = import_module(f'broker.{broker}.{module_name}')
-        for name in function_names:
-            module_functions[name] = getattr(module, name)
-        return module_functions
+        return _load_broker_functions(broker, module_name, function_names)
     except (ImportError, AttributeError) as e:
         logger.error(f"Error importing functions {function_names} from {module_name} for broker {broker}: {e}")
 
         return None
-def generate_orderbook_csv(order_data):
-    """Generate CSV file from orderbook data"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers matching the terminal display
-    headers = ['Trading Symbol', 'Exchange', 'Transaction Type', 'Quantity', 'Price', 
-              'Trigger Price', 'Order Type', 'Product Type', 'Order ID', 'Status', 'Time']
-    writer.writerow(headers)
-    
-    # Write data in the same order as the headers
-    for order in order_data:
-        row = [
-            order.get('symbol', ''),
-            order.get('exchange', ''),
-            order.get('action', ''),
-            order.get('quantity', ''),
-            order.get('price', ''),
-            order.get('trigger_price', ''),
-            order.get('pricetype', ''),
-            order.get('product', ''),
-            order.get('orderid', ''),
-            order.get('order_status', ''),
-            order.get('timestamp', '')
-        ]
-        writer.writerow(row)
-    
-    return output.getvalue()
 
-def generate_tradebook_csv(trade_data):
-    """Generate CSV file from tradebook data"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers
-    headers = ['Trading Symbol', 'Exchange', 'Product Type', 'Transaction Type', 'Fill Size', 
-              'Fill Price', 'Trade Value', 'Order ID', 'Fill Time']
-    writer.writerow(headers)
-    
-    # Write data
-    for trade in trade_data:
-        row = [
-            trade.get('symbol', ''),
-            trade.get('exchange', ''),
-            trade.get('product', ''),
-            trade.get('action', ''),
-            trade.get('quantity', ''),
-            trade.get('average_price', ''),
-            trade.get('trade_value', ''),
-            trade.get('orderid', ''),
-            trade.get('timestamp', '')
-        ]
-        writer.writerow(row)
-    
-    return output.getvalue()
-
-def generate_positions_csv(positions_data):
-    """Generate CSV file from positions data"""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write headers - updated to match terminal output exactly
-    headers = ['Symbol', 'Exchange', 'Product Type', 'Net Qty', 'Avg Price', 'LTP', 'P&L']
+def _broker_functions(broker, module_name, function_names):
+    """
+    Broker functions pre-resolved at startup (app.config['BROKER_MODULES']),
+    falling back to dynamic_import for brokers that were not pre-loaded
+    """
+    funcs = current_app.config.get('BROKER_MODULES', {}).get(broker, {}).get(module_name, {})
+    if all(name in funcs for name in function_names):
+        return funcs
+    return dynamic_import(broker, module_name, function_names)
+
+# CSV export layouts: header labels and the record keys feeding each column
+_ORDER_CSV_HEADERS = ('Trading Symbol', 'Exchange', 'Transaction Type', 'Quantity', 'Price',
+                      'Trigger Price', 'Order Type', 'Product Type', 'Order ID', 'Status', 'Time')
+_ORDER_COLS = ('symbol', 'exchange', 'action', 'quantity', 'price',
+               'trigger_price', 'pricetype', 'product', 'orderid', 'order_status', 'timestamp')
+_TRADE_CSV_HEADERS = ('Trading Symbol', 'Exchange', 'Product Type', 'Transaction Type', 'Fill Size',
+                      'Fill Price', 'Trade Value', 'Order ID', 'Fill Time')
+_TRADE_COLS = ('symbol', 'exchange', 'product', 'action', 'quantity',
+               'average_price', 'trade_value', 'orderid', 'timestamp')
+_POSITION_CSV_HEADERS = ('Symbol', 'Exchange', 'Product Type', 'Net Qty', 'Avg Price', 'LTP', 'P&L')
+_POSITION_COLS = ('symbol', 'exchange', 'product', 'quantity', 'average_price', 'ltp', 'pnl')
+
+CSV_CHUNK_ROWS = 500  # rows formatted per writerows() call / yielded chunk
+
+def _csv_header_bytes(headers):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(headers)
+    return buffer.getvalue().encode()
+
+# "No positions" is the common export case; serve the header line without building a writer
+_EMPTY_POSITIONS_CSV = _csv_header_bytes(_POSITION_CSV_HEADERS)
+
+def _stream_csv(headers, columns, records):
+    """
+    Yield CSV text in chunks of CSV_CHUNK_ROWS rows, formatting each chunk with one writerows() call
+    into a buffer that is reused across chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
     writer.writerow(headers)
-    
-    # Write data
-    for position in positions_data:
-        row = [
-            position.get('symbol', ''),
-            position.get('exchange', ''),
-            position.get('product', ''),
-            position.get('quantity', ''),
-            position.get('average_price', ''),
-            position.get('ltp', ''),
-            position.get('pnl', '')
-        ]
-        writer.writerow(row)
-    
-    return output.getvalue()
+    yield buffer.getvalue()
+
+    records = iter(records)
+    while True:
+        batch = list(islice(records, CSV_CHUNK_ROWS))
+        if not batch:
+            break
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([record.get(col, '') for col in columns] for record in batch)
+        yield buffer.getvalue()
+
+def _export_rows(records):
+    """
+    Materialize and check export rows up front, while the route's try/except can still
+    turn a bad broker/mapping result into an error response instead of a truncated 200
+    """
+    rows = list(records or ())
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"Unexpected export row of type {type(row).__name__}")
+    return rows
+
+def stream_orderbook_csv(order_data):
+    """Stream the orderbook as CSV"""
+    return _stream_csv(_ORDER_CSV_HEADERS, _ORDER_COLS, _export_rows(order_data))
+
+def stream_tradebook_csv(trade_data):
+    """Stream the tradebook as CSV"""
+    return _stream_csv(_TRADE_CSV_HEADERS, _TRADE_COLS, _export_rows(trade_data))
+
+def stream_positions_csv(positions_data):
+    """Stream positions as CSV"""
+    return _stream_csv(_POSITION_CSV_HEADERS, _POSITION_COLS, _export_rows(positions_data))
+
+def _gzip_chunks(chunks):
+    """Gzip a stream of text chunks incrementally, so compressed bytes go out while rows are still being formatted"""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _logged_stream(chunks, filename):
+    """Stop a streamed download cleanly (and log why) if formatting fails after the 200 is sent"""
+    try:
+        yield from chunks
+    except Exception as e:
+        logger.error(f"Error streaming {filename}, download truncated: {e}", exc_info=True)
+
+def _csv_response(chunks, filename):
+    """Streamed CSV download, gzip-encoded on the fly for clients that accept it"""
+    chunks = _logged_stream(chunks, filename)
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    # accept_encodings honours q-values, so "gzip;q=0" is a refusal
+    if request.accept_encodings['gzip']:
+        headers['Content-Encoding'] = 'gzip'
+        chunks = _gzip_chunks(chunks)
+    response = Response(chunks, mimetype='text/csv', headers=headers)
+    response.vary.add('Accept-Encoding')
+    return response
 
 @orders_bp.route('/orderbook')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def orderbook():
     login_username = session['user']
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
         logger.warning(f"No auth token found for user {login_username}")
@@ -507,37 +587,33 @@ def orderbook():
         return "Broker not set in session", 400
 
     # Check if in analyze mode and route accordingly
-    if get_analyze_mode():
+    api_key = None
+    if _analyze_mode():
         # Get API key for sandbox mode
-        api_key = get_api_key_for_tradingview(login_username)
-        if api_key:
-            success, response, status_code = get_orderbook(api_key=api_key)
-        else:
+        api_key = _api_key(login_username)
+        if not api_key:
             logger.error("No API key found for analyze mode")
             return "API key required for analyze mode", 400
-    else:
-        # Use live broker
-        success, response, status_code = get_orderbook(auth_token=auth_token, broker=broker)
+
+    success, data, status_code = _fetch_orders(login_username, auth_token, broker, api_key)
 
     if not success:
-        logger.error(f"Failed to get orderbook data: {response.get('message', 'Unknown error')}")
+        logger.error(f"Failed to get orderbook data: {data.get('message', 'Unknown error')}")
         if status_code == 404:
             return "Failed to import broker module", 500
         return redirect(url_for('auth.logout'))
 
-    data = response.get('data', {})
     order_data = data.get('orders', [])
-    order_data = enrich_orders_with_ltp(order_data, login_username, auth_token, broker)
     order_stats = data.get('statistics', {})
 
     return render_template('orderbook.html', order_data=order_data, order_stats=order_stats)
 
 @orders_bp.route('/tradebook')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def tradebook():
     login_username = session['user']
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
         logger.warning(f"No auth token found for user {login_username}")
@@ -549,35 +625,30 @@ def tradebook():
         return "Broker not set in session", 400
 
     # Check if in analyze mode and route accordingly
-    if get_analyze_mode():
+    api_key = None
+    if _analyze_mode():
         # Get API key for sandbox mode
-        api_key = get_api_key_for_tradingview(login_username)
-        if api_key:
-            success, response, status_code = get_tradebook(api_key=api_key)
-        else:
+        api_key = _api_key(login_username)
+        if not api_key:
             logger.error("No API key found for analyze mode")
             return "API key required for analyze mode", 400
-    else:
-        # Use live broker
-        success, response, status_code = get_tradebook(auth_token=auth_token, broker=broker)
+
+    success, tradebook_data, status_code = _fetch_trades(login_username, auth_token, broker, api_key)
 
     if not success:
-        logger.error(f"Failed to get tradebook data: {response.get('message', 'Unknown error')}")
+        logger.error(f"Failed to get tradebook data: {tradebook_data.get('message', 'Unknown error')}")
         if status_code == 404:
             return "Failed to import broker module", 500
         return redirect(url_for('auth.logout'))
 
-    tradebook_data = response.get('data', [])
-    # tradebook_data = enrich_trades_with_ltp(tradebook_data, login_username, auth_token, broker) # Removed
-
     return render_template('tradebook.html', tradebook_data=tradebook_data)
 
 @orders_bp.route('/positions')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def positions():
     login_username = session['user']
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
         logger.warning(f"No auth token found for user {login_username}")
@@ -589,35 +660,30 @@ def positions():
         return "Broker not set in session", 400
 
     # Check if in analyze mode and route accordingly
-    if get_analyze_mode():
+    api_key = None
+    if _analyze_mode():
         # Get API key for sandbox mode
-        api_key = get_api_key_for_tradingview(login_username)
-        if api_key:
-            success, response, status_code = get_positionbook(api_key=api_key)
-        else:
+        api_key = _api_key(login_username)
+        if not api_key:
             logger.error("No API key found for analyze mode")
             return "API key required for analyze mode", 400
-    else:
-        # Use live broker
-        success, response, status_code = get_positionbook(auth_token=auth_token, broker=broker)
+
+    success, positions_data, status_code = _fetch_positions(login_username, auth_token, broker, api_key)
 
     if not success:
-        logger.error(f"Failed to get positions data: {response.get('message', 'Unknown error')}")
+        logger.error(f"Failed to get positions data: {positions_data.get('message', 'Unknown error')}")
         if status_code == 404:
             return "Failed to import broker module", 500
         return redirect(url_for('auth.logout'))
 
-    positions_data = response.get('data', [])
-    positions_data = enrich_positions_with_monitor(positions_data)
-
     return render_template('positions.html', positions_data=positions_data)
 
 @orders_bp.route('/holdings')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def holdings():
     login_username = session['user']
-    auth_token = get_auth_token(login_username)
+    auth_token = _auth_token(login_username)
 
     if auth_token is None:
         logger.warning(f"No auth token found for user {login_username}")
@@ -629,9 +695,9 @@ def holdings():
         return "Broker not set in session", 400
 
     # Check if in analyze mode and route accordingly
-    if get_analyze_mode():
+    if _analyze_mode():
         # Get API key for sandbox mode
-        api_key = get_api_key_for_tradingview(login_username)
+        api_key = _api_key(login_username)
         if api_key:
             success, response, status_code = get_holdings(api_key=api_key)
         else:
@@ -655,11 +721,11 @@ def holdings():
 
 @orders_bp.route('/orderbook/export')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def export_orderbook():
     try:
         login_username = session['user']
-        auth_token = get_auth_token(login_username)
+        auth_token = _auth_token(login_username)
         broker = session.get('broker')
 
         if auth_token is None:
@@ -667,9 +733,9 @@ def export_orderbook():
             return redirect(url_for('auth.logout'))
 
         # Check if in analyze mode and route accordingly
-        if get_analyze_mode():
+        if _analyze_mode():
             # Get API key for sandbox mode
-            api_key = get_api_key_for_tradingview(login_username)
+            api_key = _api_key(login_username)
             if api_key:
                 success, response, status_code = get_orderbook(api_key=api_key)
                 if not success:
@@ -686,8 +752,8 @@ def export_orderbook():
                 logger.error("Broker not set in session")
                 return "Broker not set in session", 400
 
-            api_funcs = dynamic_import(broker, 'api.order_api', ['get_order_book'])
-            mapping_funcs = dynamic_import(broker, 'mapping.order_data', ['map_order_data', 'transform_order_data'])
+            api_funcs = _broker_functions(broker, 'api.order_api', ('get_order_book',))
+            mapping_funcs = _broker_functions(broker, 'mapping.order_data', ('map_order_data', 'transform_order_data'))
 
             if not api_funcs or not mapping_funcs:
                 logger.error(f"Error loading broker-specific modules for {broker}")
@@ -701,23 +767,18 @@ def export_orderbook():
             order_data = mapping_funcs['map_order_data'](order_data=order_data)
             order_data = mapping_funcs['transform_order_data'](order_data)
 
-        csv_data = generate_orderbook_csv(order_data)
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=orderbook.csv'}
-        )
+        return _csv_response(stream_orderbook_csv(order_data), 'orderbook.csv')
     except Exception as e:
         logger.error(f"Error exporting orderbook: {str(e)}")
         return "Error exporting orderbook", 500
 
 @orders_bp.route('/tradebook/export')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def export_tradebook():
     try:
         login_username = session['user']
-        auth_token = get_auth_token(login_username)
+        auth_token = _auth_token(login_username)
         broker = session.get('broker')
 
         if auth_token is None:
@@ -725,9 +786,9 @@ def export_tradebook():
             return redirect(url_for('auth.logout'))
 
         # Check if in analyze mode and route accordingly
-        if get_analyze_mode():
+        if _analyze_mode():
             # Get API key for sandbox mode
-            api_key = get_api_key_for_tradingview(login_username)
+            api_key = _api_key(login_username)
             if api_key:
                 success, response, status_code = get_tradebook(api_key=api_key)
                 if not success:
@@ -743,8 +804,8 @@ def export_tradebook():
                 logger.error("Broker not set in session")
                 return "Broker not set in session", 400
 
-            api_funcs = dynamic_import(broker, 'api.order_api', ['get_trade_book'])
-            mapping_funcs = dynamic_import(broker, 'mapping.order_data', ['map_trade_data', 'transform_tradebook_data'])
+            api_funcs = _broker_functions(broker, 'api.order_api', ('get_trade_book',))
+            mapping_funcs = _broker_functions(broker, 'mapping.order_data', ('map_trade_data', 'transform_tradebook_data'))
 
             if not api_funcs or not mapping_funcs:
                 logger.error(f"Error loading broker-specific modules for {broker}")
@@ -758,23 +819,18 @@ def export_tradebook():
             tradebook_data = mapping_funcs['map_trade_data'](tradebook_data)
             tradebook_data = mapping_funcs['transform_tradebook_data'](tradebook_data)
 
-        csv_data = generate_tradebook_csv(tradebook_data)
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=tradebook.csv'}
-        )
+        return _csv_response(stream_tradebook_csv(tradebook_data), 'tradebook.csv')
     except Exception as e:
         logger.error(f"Error exporting tradebook: {str(e)}")
         return "Error exporting tradebook", 500
 
 @orders_bp.route('/positions/export')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def export_positions():
     try:
         login_username = session['user']
-        auth_token = get_auth_token(login_username)
+        auth_token = _auth_token(login_username)
         broker = session.get('broker')
 
         if auth_token is None:
@@ -782,9 +838,9 @@ def export_positions():
             return redirect(url_for('auth.logout'))
 
         # Check if in analyze mode and route accordingly
-        if get_analyze_mode():
+        if _analyze_mode():
             # Get API key for sandbox mode
-            api_key = get_api_key_for_tradingview(login_username)
+            api_key = _api_key(login_username)
             if api_key:
                 success, response, status_code = get_positionbook(api_key=api_key)
                 if not success:
@@ -800,10 +856,10 @@ def export_positions():
                 logger.error("Broker not set in session")
                 return "Broker not set in session", 400
 
-            api_funcs = dynamic_import(broker, 'api.order_api', ['get_positions'])
-            mapping_funcs = dynamic_import(broker, 'mapping.order_data', [
+            api_funcs = _broker_functions(broker, 'api.order_api', ('get_positions',))
+            mapping_funcs = _broker_functions(broker, 'mapping.order_data', (
                 'map_position_data', 'transform_positions_data'
-            ])
+            ))
 
             if not api_funcs or not mapping_funcs:
                 logger.error(f"Error loading broker-specific modules for {broker}")
@@ -817,19 +873,17 @@ def export_positions():
             positions_data = mapping_funcs['map_position_data'](positions_data)
             positions_data = mapping_funcs['transform_positions_data'](positions_data)
 
-        csv_data = generate_positions_csv(positions_data)
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=positions.csv'}
-        )
+        if not positions_data:
+            return Response(_EMPTY_POSITIONS_CSV, mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=positions.csv'})
+        return _csv_response(stream_positions_csv(positions_data), 'positions.csv')
     except Exception as e:
         logger.error(f"Error exporting positions: {str(e)}")
         return "Error exporting positions", 500
 
 @orders_bp.route('/close_position', methods=['POST'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def close_position():
     """Close a specific position - uses broker API in live mode, placesmartorder service in analyze mode"""
     try:
@@ -847,13 +901,13 @@ def close_position():
 
         # Get auth token from session
         login_username = session['user']
-        auth_token = get_auth_token(login_username)
+        auth_token = _auth_token(login_username)
         broker_name = session.get('broker')
 
         # Check if in analyze mode
-        if get_analyze_mode():
+        if _analyze_mode():
             # In analyze mode, use placesmartorder service with quantity=0 and position_size=0
-            api_key = get_api_key_for_tradingview(login_username)
+            api_key = _api_key(login_username)
 
             if not api_key:
                 return jsonify({
@@ -877,8 +931,6 @@ def close_position():
             }
 
             # Use placesmartorder service for analyze mode
-            from services.place_smart_order_service import place_smart_order
-
             # Pass api_key as a separate parameter for analyze mode
             success, response_data, status_code = place_smart_order(
                 order_data=order_data,
@@ -894,7 +946,7 @@ def close_position():
             }), 401
 
         # Dynamically import broker-specific modules for API
-        api_funcs = dynamic_import(broker_name, 'api.order_api', ['place_smartorder_api', 'get_open_position'])
+        api_funcs = _broker_functions(broker_name, 'api.order_api', ('place_smartorder_api', 'get_open_position'))
 
         if not api_funcs:
             logger.error(f"Error loading broker-specific modules for {broker_name}")
@@ -954,13 +1006,13 @@ def close_position():
 
 @orders_bp.route('/close_all_positions', methods=['POST'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def close_all_positions():
     """Close all open positions using the broker API"""
     try:
         # Get auth token from session
         login_username = session['user']
-        auth_token = get_auth_token(login_username)
+        auth_token = _auth_token(login_username)
         broker_name = session.get('broker')
 
         if not auth_token or not broker_name:
@@ -969,15 +1021,10 @@ def close_all_positions():
                 'message': 'Authentication error'
             }), 401
 
-        # Import necessary functions
-        from services.close_position_service import close_position
-        from database.auth_db import get_api_key_for_tradingview
-        from database.settings_db import get_analyze_mode
-
         # Get API key for analyze mode
         api_key = None
-        if get_analyze_mode():
-            api_key = get_api_key_for_tradingview(login_username)
+        if _analyze_mode():
+            api_key = _api_key(login_username)
 
         # Call the service with appropriate parameters
         success, response_data, status_code = close_position(
@@ -1005,13 +1052,13 @@ def close_all_positions():
 
 @orders_bp.route('/cancel_all_orders', methods=['POST'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def cancel_all_orders_ui():
     """Cancel all open orders using the broker API from UI"""
     try:
         # Get auth token from session
         login_username = session['user']
-        auth_token = get_auth_token(login_username)
+        auth_token = _auth_token(login_username)
         broker_name = session.get('broker')
 
         if not auth_token or not broker_name:
@@ -1020,15 +1067,10 @@ def cancel_all_orders_ui():
                 'message': 'Authentication error'
             }), 401
 
-        # Import necessary functions
-        from services.cancel_all_order_service import cancel_all_orders
-        from database.auth_db import get_api_key_for_tradingview
-        from database.settings_db import get_analyze_mode
-
         # Get API key for analyze mode
         api_key = None
-        if get_analyze_mode():
-            api_key = get_api_key_for_tradingview(login_username)
+        if _analyze_mode():
+            api_key = _api_key(login_username)
 
         # Call the service with appropriate parameters
         success, response_data, status_code = cancel_all_orders(
@@ -1070,7 +1112,7 @@ def cancel_all_orders_ui():
 
 @orders_bp.route('/action-center')
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def action_center():
     """
     Action Center - Manage pending semi-automated orders
@@ -1082,8 +1124,6 @@ def action_center():
     status_filter = request.args.get('status', 'pending')  # pending, approved, rejected, all
 
     # Get action center data
-    from services.action_center_service import get_action_center_data
-
     if status_filter == 'all':
         success, response, status_code = get_action_center_data(login_username, status_filter=None)
     else:
@@ -1107,17 +1147,22 @@ def action_center():
                          current_filter=status_filter,
                          login_username=login_username)
 
+def _emit_async(event, payload, to=None):
+    """Emit on a background task so fan-out isn't charged to the HTTP response"""
+    socketio.start_background_task(socketio.emit, event, payload, to=to)
+
+def _emit_pending_count(login_username):
+    """Push the user's pending count so the navbar badge doesn't have to poll"""
+    _emit_async('pending_count', {'count': get_pending_count(login_username)},
+                to=f'user_{login_username}')
+
 @orders_bp.route('/action-center/approve/<int:order_id>', methods=['POST'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def approve_pending_order_route(order_id):
     """Approve a pending order and execute it"""
     login_username = session['user']
 
-    from database.action_center_db import approve_pending_order
-    from services.pending_order_execution_service import execute_approved_order
-    from extensions import socketio
-
     # Approve the order
     success = approve_pending_order(order_id, approved_by=login_username, user_id=login_username)
 
@@ -1126,11 +1171,12 @@ def approve_pending_order_route(order_id):
         exec_success, response_data, status_code = execute_approved_order(order_id)
 
         # Emit socket event to notify about order approval
-        socketio.emit('pending_order_updated', {
+        _emit_async('pending_order_updated', {
             'action': 'approved',
             'order_id': order_id,
             'user_id': login_username
         })
+        _emit_pending_count(login_username)
 
         if exec_success:
             return jsonify({
@@ -1149,25 +1195,23 @@ def approve_pending_order_route(order_id):
 
 @orders_bp.route('/action-center/reject/<int:order_id>', methods=['POST'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def reject_pending_order_route(order_id):
     """Reject a pending order"""
     login_username = session['user']
     data = request.json
     reason = data.get('reason', 'No reason provided')
 
-    from database.action_center_db import reject_pending_order
-    from extensions import socketio
-
     success = reject_pending_order(order_id, reason=reason, rejected_by=login_username, user_id=login_username)
 
     if success:
         # Emit socket event to notify about order rejection
-        socketio.emit('pending_order_updated', {
+        _emit_async('pending_order_updated', {
             'action': 'rejected',
             'order_id': order_id,
             'user_id': login_username
         })
+        _emit_pending_count(login_username)
 
         return jsonify({
             'status': 'success',
@@ -1178,23 +1222,21 @@ def reject_pending_order_route(order_id):
 
 @orders_bp.route('/action-center/delete/<int:order_id>', methods=['DELETE'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def delete_pending_order_route(order_id):
     """Delete a pending order (only if not pending)"""
     login_username = session['user']
 
-    from database.action_center_db import delete_pending_order
-    from extensions import socketio
-
     success = delete_pending_order(order_id, user_id=login_username)
 
     if success:
         # Emit socket event to notify about order deletion
-        socketio.emit('pending_order_updated', {
+        _emit_async('pending_order_updated', {
             'action': 'deleted',
             'order_id': order_id,
             'user_id': login_username
         })
+        _emit_pending_count(login_username)
 
         return jsonify({'status': 'success', 'message': 'Order deleted successfully'})
     else:
@@ -1206,23 +1248,32 @@ def action_center_count():
     """Get count of pending orders for badge"""
     login_username = session['user']
 
-    from database.action_center_db import get_pending_count
-
     count = get_pending_count(login_username)
 
-    return jsonify({'count': count})
+    # Polled badge: ETag lets an unchanged count come back as a bodiless 304
+    return _json_response({'count': count})
+
+# Bounded fan-out for approve-all; the semaphore is shared across a user's requests.
+# Idle users' semaphores expire, and each use re-inserts the entry to keep it alive.
+APPROVE_CONCURRENCY = 8
+_APPROVE_SEMAPHORES = TTLCache(maxsize=1024, ttl=300)
+_APPROVE_SEMAPHORES_LOCK = threading.Lock()
+
+def _approve_semaphore(user):
+    with _APPROVE_SEMAPHORES_LOCK:
+        sem = _APPROVE_SEMAPHORES.get(user)
+        if sem is None:
+            sem = threading.BoundedSemaphore(APPROVE_CONCURRENCY)
+        _APPROVE_SEMAPHORES[user] = sem
+        return sem
 
 @orders_bp.route('/action-center/approve-all', methods=['POST'])
 @check_session_validity
-@limiter.limit(API_RATE_LIMIT)
+@limiter.limit(API_RATE_LIMIT, key_func=get_user_or_remote_address)
 def approve_all_pending_orders():
     """Approve and execute all pending orders"""
     login_username = session['user']
 
-    from database.action_center_db import get_pending_orders, approve_pending_order
-    from services.pending_order_execution_service import execute_approved_order
-    from extensions import socketio
-
     # Get all pending orders for this user
     pending_orders = get_pending_orders(login_username, status='pending')
 
@@ -1232,36 +1283,50 @@ def approve_all_pending_orders():
             'message': 'No pending orders to approve'
         }), 200
 
-    # Track results
-    approved_count = 0
+    # Approve in one UPDATE, then fan out the broker executions
+    approved_ids = bulk_approve_pending_orders([order.id for order in pending_orders],
+                                               approved_by=login_username, user_id=login_username)
+    approved_count = len(approved_ids)
     executed_count = 0
     failed_executions = []
 
-    # Approve and execute each order
-    for order in pending_orders:
-        # Approve the order
-        success = approve_pending_order(order.id, approved_by=login_username)
-
-        if success:
-            approved_count += 1
-
-            # Execute the order
-            exec_success, response_data, status_code = execute_approved_order(order.id)
-
-            if exec_success:
-                executed_count += 1
-            else:
-                failed_executions.append({
-                    'order_id': order.id,
-                    'error': response_data.get('message', 'Unknown error')
-                })
+    if approved_ids:
+        app = current_app._get_current_object()
+
+        def _execute(pending_order_id):
+            # Per-user gate keeps concurrent batch requests within broker rate limits
+            with _approve_semaphore(login_username), app.app_context():
+                return execute_approved_order(pending_order_id)
+
+        with ThreadPoolExecutor(max_workers=min(APPROVE_CONCURRENCY, approved_count),
+                                thread_name_prefix='approve-all') as executor:
+            futures = {executor.submit(_execute, oid): oid for oid in approved_ids}
+            for future in as_completed(futures):
+                order_id = futures[future]
+                try:
+                    exec_success, response_data, status_code = future.result()
+                except Exception as e:
+                    logger.exception(f"Error executing approved order {order_id}: {e}")
+                    exec_success, response_data = False, {'message': str(e)}
+
+                if exec_success:
+                    executed_count += 1
+                else:
+                    failed_executions.append({
+                        'order_id': order_id,
+                        'error': response_data.get('message', 'Unknown error')
+                    })
+        # Completion order is arbitrary; report failures in approval order
+        approval_rank = {oid: rank for rank, oid in enumerate(approved_ids)}
+        failed_executions.sort(key=lambda f: approval_rank[f['order_id']])
 
     # Emit socket event to notify about batch approval
-    socketio.emit('pending_order_updated', {
+    _emit_async('pending_order_updated', {
         'action': 'batch_approved',
         'user_id': login_username,
         'count': approved_count
     })
+    _emit_pending_count(login_username)
 
     # Prepare response message
     if approved_count == executed_count:
@@ -1298,65 +1363,52 @@ def update_position_api():
             return jsonify({'status': 'error', 'message': 'Missing symbol, exchange or product'}), 400
 
         # Find the order_id for this position
-        active_monitored = position_monitor.get_active_positions()
-        target_order_id = None
-        
-        # DEBUG: Log what we're searching for
-        logger.info(f"🔍 Searching for position: symbol={symbol}, exchange={exchange}, product={product}")
-        logger.info(f"📊 Monitored positions count: {len(active_monitored)}")
-        
-        for pid, pdata in active_monitored.items():
-            logger.info(f"   Checking {pid}: symbol={pdata.get('symbol')}, exchange={pdata.get('exchange')}, product={pdata.get('product')}")
-            if (pdata.get('symbol') == symbol and 
-                pdata.get('exchange') == exchange and 
-                pdata.get('product') == product):
-                target_order_id = pid
-                logger.info(f"✅ MATCH FOUND: {pid}")
-                break
-        
+        target_order_id = position_monitor.get_by_key(symbol, exchange, product)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Position lookup %s/%s/%s -> %s", symbol, exchange, product, target_order_id)
+
         if not target_order_id:
             logger.error(f"❌ Position not found in monitor. Searched for: {symbol}/{exchange}/{product}")
-            logger.error(f"Available positions: {[(p.get('symbol'), p.get('exchange'), p.get('product')) for p in active_monitored.values()]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                active_monitored = position_monitor.get_active_positions()
+                logger.debug("Available positions: %s",
+                             [(p.get('symbol'), p.get('exchange'), p.get('product')) for p in active_monitored.values()])
             return jsonify({'status': 'error', 'message': 'Position not found in monitor'}), 404
 
-        updates = []
-        
-        # Update SL
-        if new_sl is not None:
-            try:
+        # Parse everything up front so the monitor is updated (and persisted) once
+        sl_val = tgt_val = valid_targets = None
+        try:
+            if new_sl is not None:
                 sl_val = float(new_sl)
-                if position_monitor.update_sl(target_order_id, sl_val):
-                    updates.append(f"SL updated to {sl_val}")
-            except ValueError:
-                return jsonify({'status': 'error', 'message': 'Invalid SL value'}), 400
-
-        # Update Target(s)
-        if new_target is not None:
-             # Backward compatibility for single target
-             try:
+        except (TypeError, ValueError):
+            return jsonify({'status': 'error', 'message': 'Invalid SL value'}), 400
+        try:
+            if new_target is not None:
+                # Backward compatibility for single target
                 tgt_val = float(new_target)
-                if position_monitor.update_target(target_order_id, tgt_val):
-                    updates.append(f"Target updated to {tgt_val}")
-             except ValueError:
-                return jsonify({'status': 'error', 'message': 'Invalid Target value'}), 400
-        
-        # New: Update Targets List (T1, T2, T3)
+        except (TypeError, ValueError):
+            return jsonify({'status': 'error', 'message': 'Invalid Target value'}), 400
+
+        # New: Update Targets List (T1, T2, T3); final_target becomes max of targets
         new_targets = data.get('targets')
         if new_targets is not None and isinstance(new_targets, list):
             try:
                 # Filter valid numbers
                 valid_targets = [float(t) for t in new_targets if t is not None and t != '']
-                if position_monitor.update_targets(target_order_id, valid_targets):
-                     updates.append(f"Targets updated to {valid_targets}")
-                     
-                     # Also update final_target (max of targets)
-                     if valid_targets:
-                         final = max(valid_targets)
-                         position_monitor.update_target(target_order_id, final)
             except Exception as e:
-                logger.error(f"Error updating targets list: {e}")
+                logger.error(f"Invalid targets list: {e}")
                 return jsonify({'status': 'error', 'message': 'Invalid Targets list'}), 400
 
+        updates = []
+        if position_monitor.update_fields(target_order_id, sl=sl_val, target=tgt_val, targets=valid_targets):
+            if sl_val is not None:
+                updates.append(f"SL updated to {sl_val}")
+            if tgt_val is not None:
+                updates.append(f"Target updated to {tgt_val}")
+            if valid_targets is not None:
+                updates.append(f"Targets updated to {valid_targets}")
+
         if not updates:
              return jsonify({'status': 'error', 'message': 'No valid updates provided'}), 400
 
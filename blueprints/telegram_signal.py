@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request, render_template, session
 from services.telegram_listener_service import telegram_listener
+from database.telegram_db import get_listener_config, update_listener_config
 from utils.session import check_session_validity
 from utils.logging import get_logger
 import os
@@ -11,29 +12,22 @@ telegram_signal_bp = Blueprint('telegram_signal_bp', __name__, url_prefix='/tele
 @check_session_validity
 def config():
     if request.method == 'GET':
+        saved = get_listener_config()
         return render_template('telegram/listener_config.html', 
-                             api_id=os.getenv("TELEGRAM_API_ID", ""),
-                             target_channel=os.getenv("TELEGRAM_TARGET_CHANNEL", ""),
+                             api_id=saved.get('api_id') or os.getenv("TELEGRAM_API_ID", ""),
+                             target_channel=saved.get('target_channel') or os.getenv("TELEGRAM_TARGET_CHANNEL", ""),
                              is_connected=telegram_listener.is_running)
     
-    # Update Config
+    # Update Config: persist once to the Telegram DB, then apply to the running listener
     data = request.json
-    # In a real app, write to .env or DB. 
-    # For this session, we set env vars in memory or print instructions.
-    # Since we can't easily write .env, we'll try to update the in-memory os.environ
-    # and maybe the user has to restart for full persistence if we don't write to file.
-    
-    if 'api_id' in data:
-        os.environ['TELEGRAM_API_ID'] = data['api_id']
-        telegram_listener.api_id = data['api_id']
-    if 'api_hash' in data:
-        os.environ['TELEGRAM_API_HASH'] = data['api_hash']
-        telegram_listener.api_hash = data['api_hash']
-    if 'target_channel' in data:
-        os.environ['TELEGRAM_TARGET_CHANNEL'] = data['target_channel']
-        telegram_listener.target_channel = data['target_channel']
+    updates = {key: data[key] for key in ('api_id', 'api_hash', 'target_channel') if key in data}
+
+    if updates:
+        if not update_listener_config(updates):
+            return jsonify({'status': 'error', 'message': 'Failed to save configuration'}), 500
+        telegram_listener.apply_config(updates)
         
-    return jsonify({'status': 'success', 'message': 'Configuration updated (Session only)'})
+    return jsonify({'status': 'success', 'message': 'Configuration updated'})
 
 @telegram_signal_bp.route('/login', methods=['POST'])
 @check_session_validity
@@ -71,10 +65,15 @@ async def verify_otp():
 @telegram_signal_bp.route('/status')
 @check_session_validity
 def status():
-    return jsonify({
+    # Polled by the UI; an unchanged status is answered with a bodiless 304
+    response = jsonify({
         'is_running': telegram_listener.is_running,
         'target_channel': telegram_listener.target_channel
     })
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.max_age = 2
+    return response.make_conditional(request)
 
 @telegram_signal_bp.route('/history')
 @check_session_validity
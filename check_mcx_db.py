@@ -9,13 +9,15 @@ load_dotenv(dotenv_path=env_path, override=True)
 # Add current dir to sys.path
 sys.path.append(os.path.dirname(__file__))
 
+from sqlalchemy import func
 from database.symbol import SymToken, db_session
 
 def check_mcx():
     print("Checking MCX Symbols in DB...")
     
     # 1. Check count
-    count = db_session.query(SymToken).filter(SymToken.exchange == 'MCX').count()
+    # Plain COUNT(*) instead of Query.count()'s subquery over every column
+    count = db_session.query(func.count(SymToken.id)).filter(SymToken.exchange == 'MCX').scalar()
     print(f"Total MCX Symbols: {count}")
     
     if count == 0:
@@ -23,32 +25,34 @@ def check_mcx():
         return
 
     # 2. Check Instrument Types
-    from sqlalchemy import distinct
-    types = db_session.query(distinct(SymToken.instrumenttype)).filter(SymToken.exchange == 'MCX').all()
+    # Rows are streamed in batches of 500 rather than loaded into one list
+    types = db_session.query(SymToken.instrumenttype).filter(SymToken.exchange == 'MCX').distinct().yield_per(500)
     print(f"MCX Instrument Types: {[t[0] for t in types]}")
 
     # 3. Check specific FUTCOM for CRUDEOIL
     print("\nChecking CRUDEOIL FUTCOM:")
-    futcoms = db_session.query(SymToken).filter(
+    futcoms = db_session.query(SymToken.symbol, SymToken.expiry).filter(
         SymToken.exchange == 'MCX',
         SymToken.instrumenttype == 'FUTCOM',
         SymToken.symbol.like('CRUDEOIL%')
-    ).limit(5).all()
+    ).limit(5).yield_per(500)
     
-    if not futcoms:
+    found = False
+    for s in futcoms:
+        found = True
+        print(f"FUTCOM Found -> Symbol: {s.symbol}, Expiry: {s.expiry}")
+
+    if not found:
         print("No CRUDEOIL FUTCOM found with current filters!")
         # Broaden search to see what IS there for futures
         print("\nBroad search for CRUDEOIL non-options:")
-        others = db_session.query(SymToken).filter(
+        others = db_session.query(SymToken.symbol, SymToken.instrumenttype).filter(
             SymToken.exchange == 'MCX',
             SymToken.symbol.like('CRUDEOIL%'),
             ~SymToken.instrumenttype.in_(['OPTFUT', 'CE', 'PE'])
-        ).limit(10).all()
+        ).limit(10).yield_per(500)
         for s in others:
             print(f"Symbol: {s.symbol}, Instr: {s.instrumenttype}")
-    else:
-        for s in futcoms:
-            print(f"FUTCOM Found -> Symbol: {s.symbol}, Expiry: {s.expiry}")
 
 if __name__ == "__main__":
     try:
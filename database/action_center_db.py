@@ -2,12 +2,14 @@
 
 import os
 import json
+import threading
 from sqlalchemy import create_engine, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String, DateTime, Text
 from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
+from cachetools import TTLCache
 from datetime import datetime
 import pytz
 from utils.logging import get_logger
@@ -32,6 +34,14 @@ else:
         pool_timeout=10
     )
 
+# Short TTL coalesces bursts of badge lookups; writes below invalidate the user's entry
+_pending_count_cache = TTLCache(maxsize=1024, ttl=2)
+_pending_count_lock = threading.Lock()
+
+def _invalidate_pending_count(user_id):
+    with _pending_count_lock:
+        _pending_count_cache.pop(user_id, None)
+
 db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 Base = declarative_base()
 Base.query = db_session.query_property()
@@ -113,6 +123,7 @@ def create_pending_order(user_id, api_type, order_data):
 
         db_session.add(pending_order)
         db_session.commit()
+        _invalidate_pending_count(user_id)
 
         logger.info(f"Pending order created: ID={pending_order.id}, user={user_id}, type={api_type}, time={pending_order.created_at_ist}")
         return pending_order.id
@@ -183,6 +194,7 @@ def approve_pending_order(order_id, approved_by, user_id):
             pending_order.approved_at = datetime.utcnow()
             pending_order.approved_at_ist = get_ist_timestamp()
             db_session.commit()
+            _invalidate_pending_count(user_id)
 
             logger.info(f"Order approved: ID={order_id}, by={approved_by}, time={pending_order.approved_at_ist}")
             return True
@@ -195,6 +207,47 @@ def approve_pending_order(order_id, approved_by, user_id):
         db_session.rollback()
         return False
 
+def bulk_approve_pending_orders(order_ids, approved_by, user_id):
+    """
+    Approve several pending orders with a single UPDATE and commit
+
+    Args:
+        order_ids: Order IDs to approve
+        approved_by: Username of approver
+        user_id: ID of the user who owns the orders (for security)
+
+    Returns:
+        list: IDs that were pending and are now approved (empty on failure)
+    """
+    if not order_ids:
+        return []
+
+    try:
+        # Lock the rows still pending so the UPDATE below covers exactly the returned IDs
+        approved_ids = [row.id for row in db_session.query(PendingOrder.id).filter(
+            PendingOrder.id.in_(order_ids),
+            PendingOrder.user_id == user_id,
+            PendingOrder.status == 'pending'
+        ).with_for_update().all()]
+
+        if approved_ids:
+            db_session.query(PendingOrder).filter(PendingOrder.id.in_(approved_ids)).update({
+                PendingOrder.status: 'approved',
+                PendingOrder.approved_by: approved_by,
+                PendingOrder.approved_at: datetime.utcnow(),
+                PendingOrder.approved_at_ist: get_ist_timestamp()
+            }, synchronize_session=False)
+        db_session.commit()
+        _invalidate_pending_count(user_id)
+
+        logger.info(f"Orders approved in bulk: count={len(approved_ids)}, by={approved_by}")
+        return approved_ids
+
+    except Exception as e:
+        logger.error(f"Error bulk approving orders: {e}")
+        db_session.rollback()
+        return []
+
 def reject_pending_order(order_id, reason, rejected_by, user_id):
     """
     Reject a pending order with IST timestamp
@@ -218,6 +271,7 @@ def reject_pending_order(order_id, reason, rejected_by, user_id):
             pending_order.rejected_at = datetime.utcnow()
             pending_order.rejected_at_ist = get_ist_timestamp()
             db_session.commit()
+            _invalidate_pending_count(user_id)
 
             logger.info(f"Order rejected: ID={order_id}, by={rejected_by}, time={pending_order.rejected_at_ist}, reason={reason}")
             return True
@@ -304,8 +358,15 @@ def get_pending_count(user_id):
     Returns:
         int: Count of pending orders
     """
+    # Single locked lookup: an entry can expire between `in` and `[]`
+    with _pending_count_lock:
+        cached = _pending_count_cache.get(user_id)
+    if cached is not None:
+        return cached
     try:
         count = PendingOrder.query.filter_by(user_id=user_id, status='pending').count()
+        with _pending_count_lock:
+            _pending_count_cache[user_id] = count
         return count
     except Exception as e:
         logger.error(f"Error getting pending count: {e}")
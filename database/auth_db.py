@@ -2,6 +2,7 @@
 
 import os
 import base64
+import threading
 from sqlalchemy import create_engine, UniqueConstraint, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
@@ -104,6 +105,10 @@ broker_cache = TTLCache(maxsize=1024, ttl=3000)
 verified_api_key_cache = TTLCache(maxsize=1024, ttl=36000)  # 10 hours
 # Define a cache for invalid API keys with shorter 5-minute TTL (prevent cache poisoning)
 invalid_api_key_cache = TTLCache(maxsize=512, ttl=300)  # 5 minutes
+# Define a cache for users' encrypted API keys (decrypted on each read, like auth_cache)
+# Invalidated on key regeneration via invalidate_user_cache
+api_key_cache = TTLCache(maxsize=1024, ttl=3600)  # 1 hour
+api_key_cache_lock = threading.RLock()
 
 # Conditionally create engine based on DB type
 if DATABASE_URL and 'sqlite' in DATABASE_URL:
@@ -216,28 +221,34 @@ def upsert_auth(name, auth_token, broker, feed_token=None, user_id=None, revoke=
 
     return auth_obj.id
 
-def get_auth_token(name):
-    """Get decrypted auth token"""
+def get_cached_auth(name):
+    """Get the active (non-revoked) Auth row for a user, served from auth_cache when possible"""
     # Handle None or empty name gracefully
     if not name:
-        logger.debug("get_auth_token called with empty/None name, returning None")
+        logger.debug("get_cached_auth called with empty/None name, returning None")
         return None
         
     cache_key = f"auth-{name}"
-    if cache_key in auth_cache:
-        auth_obj = auth_cache[cache_key]
-        if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
-            return decrypt_token(auth_obj.auth)
-        else:
-            del auth_cache[cache_key]
-            return None
-    else:
-        auth_obj = get_auth_token_dbquery(name)
+    # Single get()/pop() so an entry expiring between a membership test and the read can't raise
+    auth_obj = auth_cache.get(cache_key)
+    if auth_obj is not None:
         if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
-            auth_cache[cache_key] = auth_obj
-            return decrypt_token(auth_obj.auth)
+            return auth_obj
+        auth_cache.pop(cache_key, None)
         return None
 
+    auth_obj = get_auth_token_dbquery(name)
+    if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
+        auth_cache[cache_key] = auth_obj
+        return auth_obj
+    return None
+
+def get_auth_token(name):
+    """Get decrypted auth token"""
+    # Only the encrypted row is cached; the token is decrypted on each read
+    auth_obj = get_cached_auth(name)
+    return decrypt_token(auth_obj.auth) if auth_obj else None
+
 def get_auth_token_dbquery(name):
     try:
         # Handle None or empty name gracefully
@@ -327,6 +338,8 @@ def invalidate_user_cache(user_id):
     feed_token_cache.clear()
     verified_api_key_cache.clear()
     invalid_api_key_cache.clear()
+    with api_key_cache_lock:
+        api_key_cache.clear()
     logger.info(f"Cleared all caches for user_id: {user_id}")
 
 def upsert_api_key(user_id, api_key):
@@ -367,9 +380,17 @@ def get_api_key(user_id):
 
 def get_api_key_for_tradingview(user_id):
     """Get decrypted API key for TradingView configuration"""
+    cache_key = f"apikey-{user_id}"
+    # Single locked lookup: an entry can expire between `in` and `[]`
+    with api_key_cache_lock:
+        encrypted = api_key_cache.get(cache_key)
+    if encrypted is not None:
+        return decrypt_token(encrypted)
     try:
         api_key_obj = ApiKeys.query.filter_by(user_id=user_id).first()
         if api_key_obj and api_key_obj.api_key_encrypted:
+            with api_key_cache_lock:
+                api_key_cache[cache_key] = api_key_obj.api_key_encrypted
             return decrypt_token(api_key_obj.api_key_encrypted)
         return None
     except Exception as e:
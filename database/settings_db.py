@@ -88,9 +88,10 @@ def get_analyze_mode():
     """Get current analyze mode setting (cached for 1 hour)"""
     cache_key = 'analyze_mode'
 
-    # Check cache first
-    if cache_key in _settings_cache:
-        return _settings_cache[cache_key]
+    # Check cache first (single lookup: an entry can expire between `in` and `[]`)
+    cached = _settings_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     # Cache miss - query database
     settings = Settings.query.first()
@@ -49,6 +49,7 @@ class SymToken(Base):
         Index('idx_symbol_exchange', 'symbol', 'exchange'),
         Index('idx_symbol_name', 'symbol', 'name'),
         Index('idx_brsymbol_exchange', 'brsymbol', 'exchange'),
+        Index('idx_exchange_instrumenttype_symbol', 'exchange', 'instrumenttype', 'symbol'),
     )
 
 def enhanced_search_symbols(query: str, exchange: str = None) -> List[SymToken]:
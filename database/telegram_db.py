@@ -26,6 +26,7 @@ _telegram_user_cache = TTLCache(maxsize=10000, ttl=1800)  # 30 minutes TTL
 _telegram_username_cache = TTLCache(maxsize=10000, ttl=1800)  # 30 minutes TTL
 _user_preferences_cache = TTLCache(maxsize=10000, ttl=1800)  # 30 minutes TTL
 _user_credentials_cache = TTLCache(maxsize=10000, ttl=1800)  # 30 minutes TTL
+_listener_config_cache = TTLCache(maxsize=1, ttl=1800)  # 30 minutes TTL
 
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///db/telegram.db')
@@ -117,6 +118,17 @@ class BotConfig(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
 
+class ListenerConfig(Base):
+    """Signal listener (Telethon) credentials and target channel"""
+    __tablename__ = 'telegram_listener_config'
+
+    id = Column(Integer, primary_key=True, default=1)
+    api_id = Column(String(50))
+    encrypted_api_hash = Column(Text)  # Encrypted API hash for secure storage
+    target_channel = Column(String(255))
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
 class CommandLog(Base):
     """Command logs table for analytics"""
     __tablename__ = 'command_logs'
@@ -476,6 +488,60 @@ def update_bot_config(config: Dict) -> bool:
         db_session.remove()
 
 
+def get_listener_config() -> Dict:
+    """Get saved signal listener configuration (empty dict if never saved)"""
+    cache_key = 'listener_config'
+    if cache_key in _listener_config_cache:
+        return _listener_config_cache[cache_key]
+
+    try:
+        config = db_session.query(ListenerConfig).filter_by(id=1).first()
+        result = {}
+        if config:
+            result = {
+                'api_id': config.api_id,
+                'api_hash': fernet.decrypt(config.encrypted_api_hash.encode()).decode() if config.encrypted_api_hash else None,
+                'target_channel': config.target_channel
+            }
+        _listener_config_cache[cache_key] = result
+        return result
+
+    except Exception as e:
+        logger.error(f"Failed to get listener config: {str(e)}")
+        return {}
+    finally:
+        db_session.remove()
+
+
+def update_listener_config(config: Dict) -> bool:
+    """Save signal listener configuration (only the keys present in config)"""
+    try:
+        listener_config = db_session.query(ListenerConfig).filter_by(id=1).first()
+
+        if not listener_config:
+            listener_config = ListenerConfig(id=1)
+            db_session.add(listener_config)
+
+        if 'api_id' in config:
+            listener_config.api_id = config['api_id']
+        if 'api_hash' in config:
+            listener_config.encrypted_api_hash = fernet.encrypt(config['api_hash'].encode()).decode() if config['api_hash'] else None
+        if 'target_channel' in config:
+            listener_config.target_channel = config['target_channel']
+
+        db_session.commit()
+        _listener_config_cache.clear()
+        logger.debug("Listener configuration updated")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to update listener config: {str(e)}")
+        db_session.rollback()
+        return False
+    finally:
+        db_session.remove()
+
+
 # Command Logging Functions
 
 def log_command(telegram_id: int, command: str, chat_id: int = None, parameters: Dict = None):
@@ -787,6 +853,7 @@ def clear_telegram_cache():
     _telegram_username_cache.clear()
     _user_preferences_cache.clear()
     _user_credentials_cache.clear()
+    _listener_config_cache.clear()
     logger.info("Telegram cache cleared")
 
 
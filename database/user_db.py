@@ -62,6 +62,9 @@ Base.query = db_session.query_property()
 # Define a cache for the usernames with a max size and a 30-second TTL
 username_cache = TTLCache(maxsize=1024, ttl=30)
 
+# Username -> User map for lookups that don't authenticate (single entry, 60-second TTL)
+_users_by_username_cache = TTLCache(maxsize=1, ttl=60)
+
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True)
@@ -149,6 +152,14 @@ def find_user_by_username():
     """Find admin user"""
     return User.query.filter_by(is_admin=True).first()
 
+def get_users_by_username():
+    """Get all users keyed by username (insertion order follows id), cached for 60 seconds"""
+    users = _users_by_username_cache.get('users')
+    if users is None:
+        users = {user.username: user for user in User.query.order_by(User.id).all()}
+        _users_by_username_cache['users'] = users
+    return users
+
 def rehash_all_passwords():
     """
     Utility function to rehash all existing passwords with Argon2.
@@ -12,8 +12,7 @@ test_messages = [
 
 print("Valid Symbols Loaded:", len(classifier.valid_symbols))
 
-for msg in test_messages:
-    is_signal, confidence, extracted = classifier.classify(msg)
+for msg, (is_signal, confidence, extracted) in zip(test_messages, classifier.classify_batch(test_messages)):
     print(f"Message: {msg}")
     print(f"Is Signal: {is_signal} (Confidence: {confidence:.2f})")
     print(f"Extracted: {extracted}")
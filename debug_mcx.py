@@ -11,7 +11,10 @@ with app.app_context():
     from database.symbol import SymToken
     
     print("Checking MCX Symbols in DB:")
-    samples = SymToken.query.filter_by(exchange='MCX').limit(5).all()
+    # Only the printed columns are selected (plain rows, no ORM objects)
+    samples = SymToken.query.with_entities(
+        SymToken.symbol, SymToken.name, SymToken.instrumenttype, SymToken.expiry
+    ).filter_by(exchange='MCX').limit(5).all()
     for s in samples:
         print(f"Symbol: {s.symbol}, Name: {s.name}, Instr: {s.instrumenttype}, Expiry: {s.expiry}")
         
@@ -20,6 +23,8 @@ with app.app_context():
     # Let's try direct DB query similar to what valid_symbol_search does if cache fails
     
     # Verify what 'instrumenttype' looks like for MCX Futures
-    crude = SymToken.query.filter(SymToken.symbol.like('CRUDEOIL%')).first()
+    crude = SymToken.query.with_entities(
+        SymToken.symbol, SymToken.instrumenttype, SymToken.exchange
+    ).filter(SymToken.symbol.like('CRUDEOIL%')).first()
     if crude:
         print(f"Sample CRUDE: {crude.symbol} {crude.instrumenttype} {crude.exchange}")
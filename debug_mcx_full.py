@@ -10,7 +10,7 @@ load_dotenv(dotenv_path=env_path, override=True)
 # Add current dir to sys.path
 sys.path.append(os.path.dirname(__file__))
 
-from database.symbol import db_session
+from sqlalchemy import case
 from database.user_db import User
 from database.auth_db import get_auth_token
 from blueprints.dashboard import get_dashboard_symbols
@@ -19,11 +19,11 @@ from services.quotes_service import get_multiquotes
 def debug_full_flow():
     # 1. Get User
     # Try 'admin' first, then 'aravind', then first
-    user = db_session.query(User).filter(User.username == 'admin').first()
-    if not user:
-        user = db_session.query(User).filter(User.username == 'aravind').first()
-    if not user:
-        user = db_session.query(User).first()
+    # One query: preferred names sort first, any other user after them (by id)
+    user = User.query.order_by(
+        case((User.username == 'admin', 0), (User.username == 'aravind', 1), else_=2),
+        User.id
+    ).first()
         
     if not user:
         print("No user found in DB")
@@ -1,6 +1,14 @@
 import asyncio
 import os
 import logging
+
+# Optional faster event loop; the default asyncio loop is used when uvloop isn't installed
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 from services.signal_execution_service import signal_executor
 
 # Setup logging
@@ -43,5 +51,4 @@ async def test_signal():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(test_signal())
+    asyncio.run(test_signal())
@@ -1,4 +1,5 @@
-from flask_socketio import SocketIO
+from flask import session
+from flask_socketio import SocketIO, join_room
 
 # Disable eventlet to prevent greenlet threading errors
 # This fixes concurrent order placement issues in Docker
@@ -11,3 +12,11 @@ socketio = SocketIO(
     logger=False,  # Disable built-in logging to avoid noise from disconnection errors
     engineio_logger=False  # Disable engine.io logging
 )
+
+
+@socketio.on('connect')
+def join_user_room(auth=None):
+    """Put each logged-in socket in its user's room so per-user events (e.g. pending_count) aren't broadcast"""
+    username = session.get('user')
+    if username:
+        join_room(f'user_{username}')
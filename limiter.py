@@ -1,11 +1,23 @@
 # limiter.py
 
+import os
+
+from flask import session
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+
+def get_user_or_remote_address():
+    """Rate limit key for session routes: the logged-in user, falling back to the client address"""
+    user = session.get('user')
+    return f"user:{user}" if user else get_remote_address()
+
+
 # Initialize Flask-Limiter without the app object
+# Point RATELIMIT_STORAGE_URI at a shared backend (e.g. redis://) when running
+# several workers, otherwise each process keeps its own counters
 limiter = Limiter(
         key_func=get_remote_address,
-        storage_uri="memory://",
+        storage_uri=os.getenv("RATELIMIT_STORAGE_URI", "memory://"),
         strategy="moving-window"
         )
@@ -10,21 +10,25 @@ def add_column():
         return
 
     conn = sqlite3.connect(DB_PATH)
+    # Per-connection only: one fsync at commit is enough for this DDL
+    conn.execute('PRAGMA synchronous=NORMAL')
     cursor = conn.cursor()
     
     tables = ['sandbox_orders', 'sandbox_positions']
     
-    for table in tables:
-        try:
-            cursor.execute(f"ALTER TABLE {table} ADD COLUMN signal_data TEXT")
-            print(f"Added signal_data column to {table}")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
+    # Single transaction: both ALTERs commit together
+    with conn:
+        cursor.execute('BEGIN')  # sqlite3 doesn't open a transaction implicitly for DDL
+        for table in tables:
+            columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+            if not columns:
+                print(f"Table {table} not found")
+            elif 'signal_data' in columns:
                 print(f"Column signal_data already exists in {table}")
             else:
-                print(f"Error altering {table}: {e}")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN signal_data TEXT")
+                print(f"Added signal_data column to {table}")
                 
-    conn.commit()
     conn.close()
 
 if __name__ == "__main__":
@@ -1,6 +1,68 @@
 import shutil
 import os
 import datetime
+import glob
+import re
+import fnmatch
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Ignore patterns (shared by the rsync and copytree paths)
+IGNORE = [
+    'venv', 
+    '__pycache__', 
+    '.git', 
+    'node_modules', 
+    '*.pyc', 
+    '.DS_Store',
+    'test_output.log',
+    'test_output_2.log',
+    'app.log' # Optional: Skip large logs
+]
+
+# Ignore matcher built once: set lookup for plain names, one regex for the globs
+_IGNORE_NAMES = {p for p in IGNORE if not any(c in p for c in '*?[')}
+_IGNORE_GLOB = re.compile('|'.join(fnmatch.translate(p) for p in IGNORE if p not in _IGNORE_NAMES) or r'(?!)')
+
+def _is_ignored(name):
+    return name in _IGNORE_NAMES or _IGNORE_GLOB.match(name) is not None
+
+def _latest_backup(backup_root):
+    """Most recent existing backup directory, used as the rsync hardlink base"""
+    backups = sorted(glob.glob(os.path.join(backup_root, 'backup_*')))
+    return backups[-1] if backups else None
+
+def _rsync_backup(source_dir, backup_dir, prev_backup):
+    # Unchanged files are hardlinked against the previous backup instead of copied
+    cmd = ['rsync', '-a'] + [f'--exclude={p}' for p in IGNORE]
+    if prev_backup:
+        cmd.append(f'--link-dest={prev_backup}')
+    cmd += [source_dir + '/', backup_dir + '/']
+    subprocess.run(cmd, check=True)
+
+def _walk_copy(src, dst, pool, futures):
+    # scandir's DirEntry answers is_dir() from the directory listing, so the
+    # walk needs no extra stat per entry (copytree does listdir + stat)
+    os.makedirs(dst)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            if _is_ignored(entry.name):
+                continue
+            target = os.path.join(dst, entry.name)
+            if entry.is_dir():
+                _walk_copy(entry.path, target, pool, futures)
+            else:
+                futures.append(pool.submit(shutil.copy2, entry.path, target))
+    shutil.copystat(src, dst)
+
+def _parallel_copy(source_dir, backup_dir):
+    # Directories are created during the walk; file copies (sendfile-backed
+    # shutil.copy2 on Linux) run on a pool
+    with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4) as pool:
+        futures = []
+        _walk_copy(source_dir, backup_dir, pool, futures)
+        for future in futures:
+            future.result()  # Re-raise the first copy error, if any
 
 def create_backup():
     # Configuration
@@ -16,24 +78,14 @@ def create_backup():
     print(f"Source: {source_dir}")
     print(f"Destination: {backup_dir}")
     
-    # Ignore patterns
-    ignore_patterns = shutil.ignore_patterns(
-        'venv', 
-        '__pycache__', 
-        '.git', 
-        'node_modules', 
-        '*.pyc', 
-        '.DS_Store',
-        'test_output.log',
-        'test_output_2.log',
-        'app.log' # Optional: Skip large logs
-    )
-    
     try:
         if not os.path.exists(backup_root):
             os.makedirs(backup_root)
             
-        shutil.copytree(source_dir, backup_dir, ignore=ignore_patterns)
+        if shutil.which('rsync'):
+            _rsync_backup(source_dir, backup_dir, _latest_backup(backup_root))
+        else:
+            _parallel_copy(source_dir, backup_dir)
         print(f"✅ Backup created successfully at: {backup_dir}")
         return backup_dir
     except Exception as e:
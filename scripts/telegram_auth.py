@@ -1,5 +1,14 @@
 import os
 import asyncio
+
+# Optional faster event loop; installed before the client is created so
+# Telethon and main() share it. Falls back to the default asyncio loop.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 from telethon import TelegramClient
 from telethon.sessions import StringSession
 from dotenv import load_dotenv
@@ -1,7 +1,7 @@
 import os
-import requests
 import json
-from database.auth_db import get_auth_token_dbquery, decrypt_token
+from database.auth_db import get_cached_auth, decrypt_token
+from utils.httpx_client import get_httpx_client
 from dotenv import load_dotenv
 
 # Load env
@@ -17,7 +17,7 @@ def test_auth():
     # 2. Get Auth Token for 'aravind'
     username = 'aravind'
     try:
-        auth_obj = get_auth_token_dbquery(username)
+        auth_obj = get_cached_auth(username)
         if not auth_obj:
             print(f"CRITICAL: No auth entry found for user '{username}' in DB.")
             return
@@ -51,7 +51,9 @@ def test_auth():
     
     print(f"\nMaking GET request to {url}...")
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        # Shared pooled client (same one the broker modules use), so repeated checks reuse the TLS connection
+        client = get_httpx_client()
+        response = client.get(url, headers=headers, timeout=10)
         print(f"HTTP Status: {response.status_code}")
         print(f"Raw Response: {response.text}")
         
@@ -1,6 +1,7 @@
 import importlib
 import traceback
 import copy
+from functools import lru_cache
 from typing import Tuple, Dict, Any, Optional
 
 from database.auth_db import get_auth_token_broker
@@ -53,22 +54,26 @@ def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dic
     
     return error_response
 
+@lru_cache(maxsize=64)
+def _load_broker_module(broker_name: str) -> Any:
+    """Memoized import; raises on failure so a failed import is never cached"""
+    return importlib.import_module(f'broker.{broker_name}.api.order_api')
+
 def import_broker_module(broker_name: str) -> Optional[Any]:
     """
     Dynamically import the broker-specific order API module.
+    Memoized per broker so repeat close-all requests skip the import machinery.
     
     Args:
         broker_name: Name of the broker
         
     Returns:
-        The imported module or None if import fails
+        The imported module or None if import fails (the next call retries)
     """
     try:
-        module_path = f'broker.{broker_name}.api.order_api'
-        broker_module = importlib.import_module(module_path)
-        return broker_module
+        return _load_broker_module(broker_name)
     except ImportError as error:
-        logger.error(f"Error importing broker module '{module_path}': {error}")
+        logger.error(f"Error importing broker module 'broker.{broker_name}.api.order_api': {error}")
         return None
 
 def close_position_with_auth(
@@ -9,9 +9,14 @@ Free Tier Limits: 15 requests/minute, 1M tokens/day
 """
 
 import os
+import re
 import json
+import hashlib
 import logging
-from typing import Dict, Optional
+import threading
+import orjson
+from typing import Dict, List, Optional
+from cachetools import LRUCache
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -23,6 +28,95 @@ except ImportError:
     GENAI_AVAILABLE = False
     logger.warning("google-generativeai not installed. LLM parsing will be disabled.")
 
+# Messages sent per Gemini request by parse_signals (output tokens scale with it)
+LLM_BATCH_SIZE = int(os.getenv('LLM_BATCH_SIZE', '10'))
+
+# Shared by the single-message and batch prompts
+_SIGNAL_FIELDS = """{
+  "is_signal": true/false,
+  "action": "BUY" or "SELL" (if is_signal is true),
+  "symbol": "symbol name" (e.g., "NIFTY", "BANKNIFTY"),
+  "strike": "strike price as string",
+  "option_type": "CE" or "PE",
+  "price": entry price as number (See rules below),
+  "sl": stop loss as number (null if not mentioned),
+  "tgt": first target as number (null if not mentioned),
+  "targets": [list of all targets found as numbers],
+  "confidence": 0.0 to 1.0
+}"""
+
+_PARSE_RULES = """RULES:
+1. Entry Price specific: If a range is given like "370-390" or "above 370-390", ALWAYS select the LOWER BOUND (e.g., 370) as the 'price'. Valid entry is specific point or lower bound of range.
+2. Targets: Parse multiple targets separated by dashes ("410-420-430") or spaces. Return all in "targets" array.
+3. Stop Loss: If missing, set "sl" to null.
+
+examples:
+- "SENSEX 85400 PE above 370-390 Target- 410-420-430" → {"is_signal": true, "symbol": "SENSEX", "strike": "85400", "option_type": "PE", "price": 370, "targets": [410, 420, 430], "sl": None, "action": "BUY"}
+- "BUY NIFTY 22000 CE @ 150 SL 120 TGT 200" → {"is_signal": true, "price": 150, "sl": 120, "targets": [200]}"""
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _cache_key(text: str) -> bytes:
+    """Key reposts and forwards alike: lowercase, whitespace collapsed (emoji kept, they can carry the side)"""
+    normalized = _WHITESPACE.sub(' ', text.lower()).strip()
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+# Prompt pieces around the message text, built once at import
+_PROMPT_PRE = """You are a trading signal parser. Analyze this message and determine if it contains a trading signal.
+
+Message: \""""
+
+_PROMPT_POST = f""""
+
+Return ONLY a JSON object with these fields (no markdown, no extra text):
+{_SIGNAL_FIELDS}
+
+{_PARSE_RULES}
+
+Return ONLY the JSON."""
+
+_BATCH_PROMPT_PRE = """You are a trading signal parser. Analyze each message in this JSON array and determine if it contains a trading signal.
+
+Messages: """
+
+_BATCH_PROMPT_POST = f""", one per message in the same order, each with these fields:
+{_SIGNAL_FIELDS}
+
+{_PARSE_RULES}
+
+Return ONLY the JSON array."""
+
+_GENERATION_CONFIG = {
+    'temperature': 0.1,  # Low temperature for consistent parsing
+    'top_p': 0.95,
+    'max_output_tokens': 256,
+    'response_mime_type': 'application/json',  # Native JSON mode, no markdown fences
+}
+
+
+def _strip_code_fence(result_text: str) -> str:
+    """Remove a markdown code block around a JSON response, if present"""
+    if result_text.startswith('```'):
+        result_text = result_text.split('```')[1]
+        if result_text.startswith('json'):
+            result_text = result_text[4:]
+        result_text = result_text.strip()
+    return result_text
+
+
+def _load_json(response_text: str):
+    """
+    Decode a Gemini JSON-mode response with orjson; a reply that still comes
+    back fenced (older SDKs ignore response_mime_type) goes through the
+    markdown-strip path instead
+    """
+    try:
+        return orjson.loads(response_text)
+    except orjson.JSONDecodeError:
+        return json.loads(_strip_code_fence(response_text.strip()))
+
 
 class LLMSignalParser:
     """Intelligent signal parser using Gemini Flash"""
@@ -30,6 +124,9 @@ class LLMSignalParser:
     def __init__(self):
         self.enabled = False
         self.model = None
+        # Successful parses by normalized message, so duplicates skip the Gemini call
+        self._cache = LRUCache(maxsize=4096)
+        self._cache_lock = threading.Lock()
         
         if not GENAI_AVAILABLE:
             logger.warning("GenAI library not available")
@@ -73,58 +170,24 @@ class LLMSignalParser:
         if not self.enabled:
             return {"is_signal": False, "error": "LLM parser not available"}
         
+        key = _cache_key(text)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = f"""You are a trading signal parser. Analyze this message and determine if it contains a trading signal.
-
-Message: "{text}"
-
-Return ONLY a JSON object with these fields (no markdown, no extra text):
-{{
-  "is_signal": true/false,
-  "action": "BUY" or "SELL" (if is_signal is true),
-  "symbol": "symbol name" (e.g., "NIFTY", "BANKNIFTY"),
-  "strike": "strike price as string",
-  "option_type": "CE" or "PE",
-  "price": entry price as number (See rules below),
-  "sl": stop loss as number (null if not mentioned),
-  "tgt": first target as number (null if not mentioned),
-  "targets": [list of all targets found as numbers],
-  "confidence": 0.0 to 1.0
-}}
-
-RULES:
-1. Entry Price specific: If a range is given like "370-390" or "above 370-390", ALWAYS select the LOWER BOUND (e.g., 370) as the 'price'. Valid entry is specific point or lower bound of range.
-2. Targets: Parse multiple targets separated by dashes ("410-420-430") or spaces. Return all in "targets" array.
-3. Stop Loss: If missing, set "sl" to null.
-
-examples:
-- "SENSEX 85400 PE above 370-390 Target- 410-420-430" → {{"is_signal": true, "symbol": "SENSEX", "strike": "85400", "option_type": "PE", "price": 370, "targets": [410, 420, 430], "sl": None, "action": "BUY"}}
-- "BUY NIFTY 22000 CE @ 150 SL 120 TGT 200" → {{"is_signal": true, "price": 150, "sl": 120, "targets": [200]}}
-
-Return ONLY the JSON."""
+            # Only the message varies; the rest of the prompt is prebuilt
+            prompt = _PROMPT_PRE + text + _PROMPT_POST
 
             response = self.model.generate_content(
                 prompt,
-                generation_config={
-                    'temperature': 0.1,  # Low temperature for consistent parsing
-                    'top_p': 0.95,
-                    'max_output_tokens': 256,
-                }
+                generation_config=_GENERATION_CONFIG
             )
             
-            # Extract and parse JSON from response
-            result_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if result_text.startswith('```'):
-                result_text = result_text.split('```')[1]
-                if result_text.startswith('json'):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            result = json.loads(result_text)
+            result = _load_json(response.text)
             
-            logger.info(f"LLM parsed signal (confidence: {result.get('confidence', 0)}): {result}")
+            logger.info("LLM parsed signal (confidence: %s): %s", result.get('confidence', 0), result)
+            self._store(key, result)
             return result
             
         except json.JSONDecodeError as e:
@@ -133,6 +196,83 @@ Return ONLY the JSON."""
         except Exception as e:
             logger.error(f"LLM parsing error: {e}")
             return {"is_signal": False, "error": str(e)}
+    
+    def parse_signals(self, texts: List[str]) -> List[Dict[str, any]]:
+        """
+        Parse several messages, sending up to LLM_BATCH_SIZE of them per Gemini request
+        
+        Args:
+            texts: Raw message texts from Telegram
+            
+        Returns:
+            list of dicts in the same order as texts, each shaped like parse_signal()'s result
+        """
+        if not self.enabled:
+            return [{"is_signal": False, "error": "LLM parser not available"} for _ in texts]
+        
+        keys = [_cache_key(text) for text in texts]
+        results = [self._cached(key) for key in keys]
+        
+        # Only messages not seen before go to Gemini; each distinct one is sent once
+        pending = {}
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                pending.setdefault(key, []).append(i)
+        misses = [texts[indexes[0]] for indexes in pending.values()]
+        
+        parsed = []
+        for start in range(0, len(misses), LLM_BATCH_SIZE):
+            parsed.extend(self._parse_batch(misses[start:start + LLM_BATCH_SIZE]))
+        
+        for (key, indexes), result in zip(pending.items(), parsed):
+            if not isinstance(result, dict):
+                logger.error(f"LLM batch returned a non-object result: {result!r}")
+                result = {"is_signal": False, "error": "Invalid result"}
+            self._store(key, result)
+            for i in indexes:
+                results[i] = dict(result)
+        return results
+    
+    def _cached(self, key: bytes) -> Optional[Dict[str, any]]:
+        """Return a copy of a cached parse, or None"""
+        with self._cache_lock:
+            result = self._cache.get(key)
+        return dict(result) if result is not None else None
+    
+    def _store(self, key: bytes, result) -> None:
+        """Cache a parse; failures are not cached so they are retried"""
+        if isinstance(result, dict) and 'error' not in result:
+            with self._cache_lock:
+                self._cache[key] = dict(result)
+    
+    def _parse_batch(self, texts: List[str]) -> List[Dict[str, any]]:
+        """Parse one batch of messages with a single Gemini request"""
+        try:
+            prompt = (
+                _BATCH_PROMPT_PRE + json.dumps(texts, ensure_ascii=False)
+                + f"\n\nReturn ONLY a JSON array with exactly {len(texts)} objects" + _BATCH_PROMPT_POST
+            )
+
+            response = self.model.generate_content(
+                prompt,
+                generation_config={**_GENERATION_CONFIG, 'max_output_tokens': 256 * len(texts)}
+            )
+            
+            results = _load_json(response.text)
+            
+            if not isinstance(results, list) or len(results) != len(texts):
+                logger.error(f"LLM batch returned {len(results) if isinstance(results, list) else 'non-list'} results for {len(texts)} messages")
+                return [{"is_signal": False, "error": "Batch size mismatch"} for _ in texts]
+            
+            logger.info(f"LLM parsed batch of {len(texts)} messages")
+            return results
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse LLM batch response as JSON: {e}. Response: {response.text if 'response' in locals() else 'N/A'}")
+            return [{"is_signal": False, "error": "JSON parse error"} for _ in texts]
+        except Exception as e:
+            logger.error(f"LLM batch parsing error: {e}")
+            return [{"is_signal": False, "error": str(e)} for _ in texts]
 
 
 # Global instance
@@ -2,7 +2,7 @@
 
 from typing import Tuple, Dict, Any, Optional
 from database.auth_db import verify_api_key, get_order_mode
-from database.action_center_db import create_pending_order
+from database.action_center_db import create_pending_order, get_pending_count
 from extensions import socketio
 from utils.logging import get_logger
 
@@ -112,6 +112,12 @@ def queue_order(api_key: str, order_data: Dict[str, Any], api_type: str) -> Tupl
                     'message': f'New {api_type} order queued for approval'
                 }
             )
+            socketio.start_background_task(
+                socketio.emit,
+                'pending_count',
+                {'count': get_pending_count(user_id)},
+                to=f'user_{user_id}'
+            )
 
             return True, {
                 'status': 'success',
@@ -11,19 +11,48 @@ This service integrates with the trailing SL and auto-exit systems.
 """
 
 import asyncio
-from typing import Dict, List, Optional
+import atexit
+import json
+import threading
+import orjson
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
 from datetime import datetime
+from sqlalchemy import or_, update
+from database.settings_db import get_analyze_mode
+from database.sandbox_db import SandboxPositions, SandboxOrders, db_session
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds to coalesce signal_data updates before writing them to the Sandbox DB
+PERSIST_DELAY = 0.5
+
 
 class PositionMonitor:
     """Monitor and track active trading positions"""
     
     def __init__(self):
         self.active_positions = {}  # {order_id: position_data}
-        self.position_history = []  # Completed positions
+        self.position_history = deque(maxlen=100)  # Last 100 completed positions
+        
+        # (symbol, product, exchange) / (symbol, exchange) -> position_data, kept in
+        # step with active_positions so readers don't rebuild them per request
+        self._lookup_maps = ({}, {})
+        self._by_key = {}
+        # Per-key {order_id: position} buckets behind the three maps above, in insertion
+        # order, so a remove can promote the next match without rescanning every position
+        self._lookup_buckets = ({}, {}, {})
+        # Bumped whenever the lookup maps or SL/targets change; readers key caches on it
+        self.lookup_version = 0
+        
+        # Write-behind for signal_data persistence: (username, symbol) -> position
+        self._pending_persist = {}
+        self._persist_lock = threading.Lock()
+        self._persist_timer = None
+        # Don't drop the last PERSIST_DELAY window of SL/target updates on shutdown
+        atexit.register(self.flush_pending_persist)
         
         logger.info("Position Monitor Service initialized")
         self.restore_from_sandbox()
@@ -31,13 +60,10 @@ class PositionMonitor:
     def restore_from_sandbox(self):
         """Restore active positions from Sandbox DB if in Analyze Mode"""
         try:
-            from database.settings_db import get_analyze_mode
             if not get_analyze_mode():
                 return
 
-            from database.sandbox_db import SandboxPositions, SandboxOrders, db_session
             from database.auth_db import get_api_key_for_tradingview 
-            import json
 
             # Fetch all OPEN sandbox positions (quantity != 0)
             positions = SandboxPositions.query.filter(SandboxPositions.quantity != 0).all()
@@ -45,17 +71,38 @@ class PositionMonitor:
             # Date Check: Close positions from previous days (Daily Reset)
             today_date = datetime.now().date()
             
+            # One query for every SL / open order the positions below may need, instead
+            # of 2-3 queries per position. Newest first, so the first row seen per key
+            # is the one .first() used to return.
+            active_sl_by_key = {}      # (user_id, symbol, exchange, product, action) -> open SL order
+            historical_sl_by_key = {}  # same key -> latest SL order of any status
+            open_orders_by_symbol = {} # (user_id, symbol) -> open orders (diagnostic log)
+            live = [p for p in positions if not (p.created_at and p.created_at.date() < today_date)]
+            if live:
+                candidate_orders = SandboxOrders.query.filter(
+                    SandboxOrders.user_id.in_({p.user_id for p in live}),
+                    SandboxOrders.symbol.in_({p.symbol for p in live}),
+                    or_(SandboxOrders.price_type.in_(['SL', 'SL-M']), SandboxOrders.order_status == 'open')
+                ).order_by(SandboxOrders.order_timestamp.desc()).all()
+                
+                for o in candidate_orders:
+                    if o.order_status == 'open':
+                        open_orders_by_symbol.setdefault((o.user_id, o.symbol), []).append(o)
+                    if o.price_type in ('SL', 'SL-M'):
+                        key = (o.user_id, o.symbol, o.exchange, o.product, o.action)
+                        historical_sl_by_key.setdefault(key, o)
+                        if o.order_status == 'open':
+                            active_sl_by_key.setdefault(key, o)
+            
             restored_count = 0
+            stale_ids = []
             for pos in positions:
                 try:
                     # Check if position is from a previous day (Intraday/Daily Refresh logic)
                     # We treat all monitored positions as daily sessions for now per user request
                     if pos.created_at and pos.created_at.date() < today_date:
                         logger.info(f"🧹 Expiring stale position {pos.symbol} from {pos.created_at.date()} (Qty: {pos.quantity})")
-                        pos.quantity = 0
-                        pos.updated_at = datetime.now()
-                        db_session.add(pos)
-                        db_session.commit()
+                        stale_ids.append(pos.id)  # Zeroed in one UPDATE after the loop
                         continue
 
                     # Parse signal data
@@ -75,30 +122,16 @@ class PositionMonitor:
                     action = 'BUY' if pos.quantity > 0 else 'SELL'
                     exit_action = 'SELL' if action == 'BUY' else 'BUY'
                     
-                    active_sl_order = SandboxOrders.query.filter_by(
-                        user_id=pos.user_id,
-                        symbol=pos.symbol,
-                        exchange=pos.exchange,
-                        product=pos.product,
-                        action=exit_action,
-                        order_status='open'
-                    ).filter(SandboxOrders.price_type.in_(['SL', 'SL-M'])).order_by(SandboxOrders.order_timestamp.desc()).first()
+                    sl_key = (pos.user_id, pos.symbol, pos.exchange, pos.product, exit_action)
+                    active_sl_order = active_sl_by_key.get(sl_key)
                     
                     if not active_sl_order:
                         # Check what IS there
-                        all_open = SandboxOrders.query.filter_by(
-                             user_id=pos.user_id, symbol=pos.symbol, order_status='open'
-                        ).all()
+                        all_open = open_orders_by_symbol.get((pos.user_id, pos.symbol), [])
                         logger.info(f"   ⚠️ No Active SL Order found for {pos.symbol}. Open Orders: {[o.orderid + '(' + o.price_type + ')' for o in all_open]}")
                         
                         # Fallback: Look for ANY recent SL order (status doesn't matter, maybe it was cancelled/rejected but represents intent)
-                        historical_sl = SandboxOrders.query.filter_by(
-                            user_id=pos.user_id,
-                            symbol=pos.symbol,
-                            exchange=pos.exchange,
-                            product=pos.product,
-                            action=exit_action
-                        ).filter(SandboxOrders.price_type.in_(['SL', 'SL-M'])).order_by(SandboxOrders.order_timestamp.desc()).first()
+                        historical_sl = historical_sl_by_key.get(sl_key)
                         
                         if historical_sl and historical_sl.trigger_price:
                              sl = float(historical_sl.trigger_price)
@@ -147,6 +180,7 @@ class PositionMonitor:
                         'username': pos.user_id,
                         'product': pos.product,
                         'sl_order_id': sl_order_id, # Link the SL order
+                        'sandbox_position_id': pos.id, # Row to persist SL/target updates to
                         'trailing_enabled': True,
                         'highest_price': float(pos.average_price), # Initialize highest price to entry
                         't1_exit_done': False # Initialize T1 State
@@ -160,6 +194,20 @@ class PositionMonitor:
                 except Exception as e:
                     logger.error(f"Failed to restore position {pos.symbol}: {e}")
             
+            if stale_ids:
+                try:
+                    db_session.execute(
+                        update(SandboxPositions)
+                        .where(SandboxPositions.id.in_(stale_ids))
+                        .values(quantity=0, updated_at=datetime.now())
+                    )
+                    db_session.commit()
+                except Exception as e:
+                    db_session.rollback()
+                    logger.error(f"Failed to expire {len(stale_ids)} stale positions: {e}")
+            
+            self._rebuild_lookup_maps()
+            
             if restored_count > 0:
                 logger.info(f"♻️ Restored {restored_count} active positions from Sandbox DB.")
                 
@@ -214,8 +262,6 @@ class PositionMonitor:
             'targets': targets,
             'final_target': final_target,
             'highest_price': entry_price,  # Track highest price reached
-            'final_target': final_target,
-            'highest_price': entry_price,  # Track highest price reached
             'status': 'pending_open', # Start as pending, wait for fill
             'created_at': datetime.now(),
             'signal_data': signal_data,
@@ -234,7 +280,12 @@ class PositionMonitor:
             't3_plus_10_start_time': None, # Track T3+10 timer start (legacy field)
         }
         
+        # A re-added order_id moves to the end, matching its place in the lookup buckets
+        previous = self.active_positions.pop(order_id, None)
+        if previous is not None:
+            self._index_remove(order_id, previous)
         self.active_positions[order_id] = position
+        self._index_add(order_id, position)
         logger.info(f"Position added (Pending): {order_id} - {symbol} {action} @ {entry_price}")
     
     def update_sl(self, order_id: str, new_sl: float, sl_order_id: Optional[str] = None):
@@ -243,35 +294,13 @@ class PositionMonitor:
             position = self.active_positions[order_id]
             old_sl = position['current_sl']
             position['current_sl'] = new_sl
+            self.lookup_version += 1
             
             if sl_order_id:
                 position['sl_order_id'] = sl_order_id
             
-            # Persist to Sandbox DB if Analyze Mode
-            try:
-                from database.settings_db import get_analyze_mode
-                if get_analyze_mode():
-                     symbol = position.get('symbol')
-                     username = position.get('username')
-                     
-                     from database.sandbox_db import SandboxPositions, db_session
-                     import json
-                     
-                     db_pos = SandboxPositions.query.filter_by(user_id=username, symbol=symbol).filter(SandboxPositions.quantity != 0).first()
-                     if db_pos:
-                         sig_data = {}
-                         if db_pos.signal_data:
-                             try:
-                                sig_data = json.loads(db_pos.signal_data)
-                             except: pass
-                         
-                         sig_data['stop_loss'] = new_sl
-                         db_pos.signal_data = json.dumps(sig_data)
-                         
-                         db_session.commit()
-                         logger.info(f"💾 Persisted SL {new_sl} to Sandbox DB for {symbol}")
-            except Exception as e:
-                logger.error(f"Failed to persist SL update: {e}")
+            # Persist to Sandbox DB if Analyze Mode (write-behind, see _persist_signal_fields)
+            self._persist_signal_fields(position, stop_loss=new_sl)
             
             logger.info(f"Position {order_id} SL updated: {old_sl} → {new_sl}")
             return True
@@ -283,32 +312,10 @@ class PositionMonitor:
             position = self.active_positions[order_id]
             old_target = position.get('final_target')
             position['final_target'] = new_target
+            self.lookup_version += 1
             
-            # Persist to Sandbox DB if Analyze Mode
-            try:
-                from database.settings_db import get_analyze_mode
-                if get_analyze_mode():
-                     symbol = position.get('symbol')
-                     username = position.get('username')
-                     
-                     from database.sandbox_db import SandboxPositions, db_session
-                     import json
-                     
-                     db_pos = SandboxPositions.query.filter_by(user_id=username, symbol=symbol).filter(SandboxPositions.quantity != 0).first()
-                     if db_pos:
-                         sig_data = {}
-                         if db_pos.signal_data:
-                             try:
-                                sig_data = json.loads(db_pos.signal_data)
-                             except: pass
-                         
-                         sig_data['target'] = new_target
-                         db_pos.signal_data = json.dumps(sig_data)
-                         
-                         db_session.commit()
-                         logger.info(f"💾 Persisted Target {new_target} to Sandbox DB for {symbol}")
-            except Exception as e:
-                logger.error(f"Failed to persist Target update: {e}")
+            # Persist to Sandbox DB if Analyze Mode (write-behind, see _persist_signal_fields)
+            self._persist_signal_fields(position, target=new_target)
 
             logger.info(f"Position {order_id} Target updated: {old_target} → {new_target}")
             return True
@@ -320,37 +327,51 @@ class PositionMonitor:
             position = self.active_positions[order_id]
             old_targets = position.get('targets', [])
             position['targets'] = targets
+            self.lookup_version += 1
             
-            # Persist to Sandbox DB if Analyze Mode
-            try:
-                from database.settings_db import get_analyze_mode
-                if get_analyze_mode():
-                     symbol = position.get('symbol')
-                     username = position.get('username')
-                     
-                     from database.sandbox_db import SandboxPositions, db_session
-                     import json
-                     
-                     db_pos = SandboxPositions.query.filter_by(user_id=username, symbol=symbol).filter(SandboxPositions.quantity != 0).first()
-                     if db_pos:
-                         sig_data = {}
-                         if db_pos.signal_data:
-                             try:
-                                sig_data = json.loads(db_pos.signal_data)
-                             except: pass
-                         
-                         sig_data['targets'] = targets
-                         db_pos.signal_data = json.dumps(sig_data)
-                         
-                         db_session.commit()
-                         logger.info(f"💾 Persisted Targets {targets} to Sandbox DB for {symbol}")
-            except Exception as e:
-                logger.error(f"Failed to persist Targets update: {e}")
+            # Persist to Sandbox DB if Analyze Mode (write-behind, see _persist_signal_fields)
+            self._persist_signal_fields(position, targets=targets)
 
             logger.info(f"Position {order_id} Targets updated: {old_targets} → {targets}")
             return True
         return False
 
+    def update_fields(self, order_id: str, sl: Optional[float] = None, target: Optional[float] = None,
+                      targets: Optional[List[float]] = None):
+        """
+        Update SL, target and/or targets for a position and persist them in one write.
+        
+        A non-empty targets list also sets final_target to its max, overriding target.
+        """
+        if order_id not in self.active_positions:
+            return False
+        
+        position = self.active_positions[order_id]
+        sig_updates = {}
+        
+        if sl is not None:
+            position['current_sl'] = sl
+            sig_updates['stop_loss'] = sl
+        if target is not None:
+            position['final_target'] = target
+            sig_updates['target'] = target
+        if targets is not None:
+            position['targets'] = targets
+            sig_updates['targets'] = targets
+            if targets:
+                position['final_target'] = max(targets)
+                sig_updates['target'] = position['final_target']
+        
+        if not sig_updates:
+            return False
+        self.lookup_version += 1
+        
+        # Persist to Sandbox DB if Analyze Mode (write-behind, see _persist_signal_fields)
+        self._persist_signal_fields(position, **sig_updates)
+        
+        logger.info(f"Position {order_id} updated: {sig_updates}")
+        return True
+
     def update_t3_timer(self, order_id: str, start_time: datetime):
         """Update T3+10 timer start time"""
         if order_id in self.active_positions:
@@ -408,30 +429,8 @@ class PositionMonitor:
             self.active_positions[order_id]['remaining_quantity'] = new_quantity
             logger.info(f"Position {order_id} remaining quantity: {old_qty} → {new_quantity}")
             
-            # Persist to Sandbox DB if in analyze mode
-            try:
-                from database.settings_db import get_analyze_mode
-                if get_analyze_mode():
-                    symbol = self.active_positions[order_id].get('symbol')
-                    username = self.active_positions[order_id].get('username')
-                    
-                    from database.sandbox_db import SandboxPositions, db_session
-                    import json
-                    
-                    db_pos = SandboxPositions.query.filter_by(user_id=username, symbol=symbol).filter(SandboxPositions.quantity != 0).first()
-                    if db_pos:
-                        sig_data = {}
-                        if db_pos.signal_data:
-                            try:
-                                sig_data = json.loads(db_pos.signal_data)
-                            except: pass
-                        
-                        sig_data['remaining_quantity'] = new_quantity
-                        db_pos.signal_data = json.dumps(sig_data)
-                        db_session.commit()
-                        logger.debug(f"Persisted remaining_quantity={new_quantity} to Sandbox DB")
-            except Exception as e:
-                logger.error(f"Failed to persist remaining_quantity: {e}")
+            # Persist to Sandbox DB if in analyze mode (write-behind, see _persist_signal_fields)
+            self._persist_signal_fields(self.active_positions[order_id], remaining_quantity=new_quantity)
             
             return True
         return False
@@ -442,56 +441,168 @@ class PositionMonitor:
             self.active_positions[order_id][flag_name] = value
             logger.info(f"Position {order_id} {flag_name} = {value}")
             
-            # Persist to Sandbox DB if in analyze mode
-            try:
-                from database.settings_db import get_analyze_mode
-                if get_analyze_mode():
-                    symbol = self.active_positions[order_id].get('symbol')
-                    username = self.active_positions[order_id].get('username')
-                    
-                    from database.sandbox_db import SandboxPositions, db_session
-                    import json
-                    
-                    db_pos = SandboxPositions.query.filter_by(user_id=username, symbol=symbol).filter(SandboxPositions.quantity != 0).first()
-                    if db_pos:
-                        sig_data = {}
-                        if db_pos.signal_data:
-                            try:
-                                sig_data = json.loads(db_pos.signal_data)
-                            except: pass
-                        
-                        sig_data[flag_name] = value
-                        db_pos.signal_data = json.dumps(sig_data)
-                        db_session.commit()
-                        logger.debug(f"Persisted {flag_name}={value} to Sandbox DB")
-            except Exception as e:
-                logger.error(f"Failed to persist {flag_name}: {e}")
+            # Persist to Sandbox DB if in analyze mode (write-behind, see _persist_signal_fields)
+            self._persist_signal_fields(self.active_positions[order_id], **{flag_name: value})
             
             return True
         return False
     
+    def _persist_signal_fields(self, position: Dict, **fields):
+        """
+        Queue signal_data fields for the position's Sandbox DB row (Analyze Mode only).
+        
+        Updates within PERSIST_DELAY seconds are merged and written by one flush,
+        so an SL + target + quantity change in the same tick costs a single
+        query/dump/commit instead of three. The in-memory signal_data dict is the
+        source of truth, so the stored JSON is never parsed back.
+        """
+        try:
+            if not get_analyze_mode():
+                return
+        except Exception as e:
+            logger.error(f"Failed to persist position update: {e}")
+            return
+        
+        key = (position.get('username'), position.get('symbol'))
+        with self._persist_lock:
+            # Copy-on-write so the dict shared with the originating signal isn't mutated
+            position['signal_data'] = {**(position.get('signal_data') or {}), **fields}
+            self._pending_persist[key] = position
+            if self._persist_timer is None:
+                self._persist_timer = threading.Timer(PERSIST_DELAY, self._flush_from_timer)
+                self._persist_timer.daemon = True
+                self._persist_timer.start()
+    
+    def flush_pending_persist(self):
+        """Write all queued signal_data fields to the Sandbox DB with one commit"""
+        with self._persist_lock:
+            pending, self._pending_persist = self._pending_persist, {}
+            timer, self._persist_timer = self._persist_timer, None
+        if timer is not None:
+            timer.cancel()  # No-op when called from the timer itself
+        if not pending:
+            return
+        
+        try:
+            for (username, symbol), position in pending.items():
+                # Primary-key lookup once the row id is known; search by user/symbol otherwise.
+                # The cached row is written even if already closed, so the final updates land.
+                sandbox_id = position.get('sandbox_position_id')
+                db_pos = db_session.get(SandboxPositions, sandbox_id) if sandbox_id else None
+                if db_pos is None:
+                    db_pos = SandboxPositions.query.filter_by(user_id=username, symbol=symbol).filter(SandboxPositions.quantity != 0).first()
+                    if not db_pos:
+                        continue
+                    position['sandbox_position_id'] = db_pos.id
+                db_pos.signal_data = orjson.dumps(position['signal_data'], default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+                logger.info(f"💾 Persisted signal_data to Sandbox DB for {symbol}")
+            db_session.commit()
+        except Exception as e:
+            db_session.rollback()
+            logger.error(f"Failed to persist position updates: {e}")
+    
+    def _flush_from_timer(self):
+        try:
+            self.flush_pending_persist()
+        finally:
+            db_session.remove()  # Release the timer thread's scoped session
+    
     def get_position(self, order_id: str) -> Optional[Dict]:
         """Get position details"""
         return self.active_positions.get(order_id)
     
-    def get_active_positions(self) -> Dict:
-        """Get all active positions"""
+    def get_active_positions(self) -> Mapping:
+        """Get a live, read-only view of all active positions (no copy)"""
+        return MappingProxyType(self.active_positions)
+    
+    def snapshot(self) -> Dict:
+        """Get a copy of active positions, safe to iterate while positions are added/removed"""
         return self.active_positions.copy()
     
+    def get_lookup_maps(self):
+        """
+        Get (strict, relaxed) lookup maps of active positions.
+        
+        strict is keyed by (symbol, product, exchange); relaxed by (symbol, exchange)
+        and holds the first position seen for that pair. Values are the live
+        position dicts. Treat both maps as read-only.
+        """
+        return self._lookup_maps
+    
+    def get_by_key(self, symbol: str, exchange: str, product: str) -> Optional[str]:
+        """
+        Get the order_id of the first active position matching (symbol, exchange, product).
+        
+        Hash lookup in the index maintained on add/remove, so cost does not grow with portfolio size.
+        """
+        return self._by_key.get((symbol, exchange, product))
+    
+    @staticmethod
+    def _lookup_keys(pdata):
+        sym = pdata.get('symbol')
+        exc = pdata.get('exchange')
+        return (sym, pdata.get('product', 'MIS'), exc), (sym, exc), (sym, exc, pdata.get('product'))
+    
+    def _index_add(self, pid, pdata):
+        """Add one position to the lookup maps: strict keeps the latest match, relaxed/by_key the first"""
+        strict_key, relaxed_key, by_key_key = self._lookup_keys(pdata)
+        strict_buckets, relaxed_buckets, by_key_buckets = self._lookup_buckets
+        strict, relaxed = self._lookup_maps
+        strict_buckets.setdefault(strict_key, {})[pid] = pdata
+        strict[strict_key] = pdata
+        relaxed_buckets.setdefault(relaxed_key, {})[pid] = pdata
+        relaxed.setdefault(relaxed_key, pdata)
+        by_key_buckets.setdefault(by_key_key, {})[pid] = pdata
+        self._by_key.setdefault(by_key_key, pid)
+        self.lookup_version += 1
+    
+    def _index_remove(self, pid, pdata):
+        """Drop one position from the lookup maps, promoting the next match for its keys"""
+        strict, relaxed = self._lookup_maps
+        keys = self._lookup_keys(pdata)
+        for buckets, view, key, pick in zip(
+            self._lookup_buckets,
+            (strict, relaxed, self._by_key),
+            keys,
+            (lambda b: b[next(reversed(b))], lambda b: b[next(iter(b))], lambda b: next(iter(b))),
+        ):
+            bucket = buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(pid, None)
+            if bucket:
+                view[key] = pick(bucket)
+            else:
+                del buckets[key]
+                view.pop(key, None)
+        self.lookup_version += 1
+    
+    def _rebuild_lookup_maps(self):
+        """Recompute the lookup maps from scratch (bulk restore only; add/remove are incremental)"""
+        self._lookup_maps = ({}, {})
+        self._by_key = {}
+        self._lookup_buckets = ({}, {}, {})
+        for pid, pdata in self.active_positions.items():
+            self._index_add(pid, pdata)
+    
     def remove_position(self, order_id: str, reason: str = "closed"):
         """Remove position from active monitoring"""
         if order_id in self.active_positions:
             position = self.active_positions.pop(order_id)
+            self._index_remove(order_id, position)
+            
+            # Write its queued SL/target updates now rather than on the timer
+            with self._persist_lock:
+                has_pending = any(p is position for p in self._pending_persist.values())
+            if has_pending:
+                self.flush_pending_persist()
+            
             position['status'] = reason
             position['closed_at'] = datetime.now()
             
-            # Add to history
+            # Add to history (deque drops the oldest beyond 100)
             self.position_history.append(position)
             
-            # Keep only last 100 in history
-            if len(self.position_history) > 100:
-                self.position_history.pop(0)
-            
             logger.info(f"Position removed: {order_id} - Reason: {reason}")
             return position
         return None
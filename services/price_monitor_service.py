@@ -69,7 +69,8 @@ class PriceMonitorService:
             logger.info("📍 _check_all_positions() called")
             from services.position_monitor_service import position_monitor
             try:
-                positions = position_monitor.get_active_positions()
+                # Snapshot: _check_position may close positions while we iterate
+                positions = position_monitor.snapshot()
                 logger.info(f"📊 Retrieved {len(positions)} positions from monitor")
                 
                 # DEBUG LOOP
@@ -111,7 +112,7 @@ class PriceMonitorService:
             
             # Determine Mode and Credentials
             from database.settings_db import get_analyze_mode
-            from database.auth_db import get_auth_token_dbquery, decrypt_token, get_api_key_for_tradingview
+            from database.auth_db import get_cached_auth, decrypt_token, get_api_key_for_tradingview
             
             is_analyze = get_analyze_mode()
             auth_token = None
@@ -122,13 +123,14 @@ class PriceMonitorService:
                 api_key = get_api_key_for_tradingview(username)
                 # Fallback: Can also try to get live broker token for data if available
                 if not api_key:
-                     auth_obj = get_auth_token_dbquery(username)
-                     if auth_obj and not auth_obj.is_revoked:
+                     auth_obj = get_cached_auth(username)
+                     if auth_obj:
                         auth_token = decrypt_token(auth_obj.auth)
                         broker = auth_obj.broker
             else:
-                auth_obj = get_auth_token_dbquery(username)
-                if not auth_obj or auth_obj.is_revoked:
+                # Cached per user (auth_cache) - this runs on every price tick
+                auth_obj = get_cached_auth(username)
+                if not auth_obj:
                      logger.error(f"Cannot process position {order_id}: No active session for user '{username}'")
                      return
                 auth_token = decrypt_token(auth_obj.auth)
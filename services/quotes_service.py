@@ -1,5 +1,8 @@
 import importlib
+import os
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Dict, Any, Optional, Union, List
 from database.auth_db import get_auth_token_broker, invalidate_broker_token_cache
 from database.token_db import get_token
@@ -9,6 +12,10 @@ from utils.logging import get_logger
 # Initialize logger
 logger = get_logger(__name__)
 
+# Concurrent per-symbol quote requests for brokers without a multiquotes endpoint.
+# Kept low by default since each request counts against the broker's rate limit
+QUOTE_FETCH_WORKERS = max(1, int(os.getenv('QUOTE_FETCH_WORKERS', '3')))
+
 
 def validate_symbol_exchange(symbol: str, exchange: str) -> Tuple[bool, Optional[str]]:
     """
@@ -259,18 +266,19 @@ def get_multiquotes_with_auth(auth_token: str, feed_token: Optional[str], broker
             'message': 'Broker-specific module not found'
         }, 404
 
-    try:
+    def create_data_handler():
         # Initialize broker's data handler based on broker's requirements
         if hasattr(broker_module.BrokerData.__init__, '__code__'):
             # Check number of parameters the broker's __init__ accepts
             param_count = broker_module.BrokerData.__init__.__code__.co_argcount
             if param_count > 2:  # More than self and auth_token
-                data_handler = broker_module.BrokerData(auth_token, feed_token)
-            else:
-                data_handler = broker_module.BrokerData(auth_token)
-        else:
-            # Fallback to just auth token if we can't inspect
-            data_handler = broker_module.BrokerData(auth_token)
+                return broker_module.BrokerData(auth_token, feed_token)
+            return broker_module.BrokerData(auth_token)
+        # Fallback to just auth token if we can't inspect
+        return broker_module.BrokerData(auth_token)
+
+    try:
+        data_handler = create_data_handler()
 
         # Build results list starting with invalid symbols (marked as errors)
         results = []
@@ -285,21 +293,38 @@ def get_multiquotes_with_auth(auth_token: str, feed_token: Optional[str], broker
         if not hasattr(data_handler, 'get_multiquotes'):
             # Fallback: fetch quotes one by one for valid symbols only
             logger.debug(f"Broker {broker} doesn't support multiquotes, falling back to individual quotes")
-            for item in valid_symbols:
+
+            # Broker data handlers aren't documented as thread-safe: each worker thread gets its own
+            worker_state = threading.local()
+
+            def worker_handler():
+                handler = getattr(worker_state, 'handler', None)
+                if handler is None:
+                    handler = worker_state.handler = create_data_handler()
+                return handler
+
+            def fetch_quote(item, handler=None):
                 try:
-                    quote = data_handler.get_quotes(item['symbol'], item['exchange'])
-                    results.append({
+                    quote = (handler if handler is not None else worker_handler()).get_quotes(item['symbol'], item['exchange'])
+                    return {
                         'symbol': item['symbol'],
                         'exchange': item['exchange'],
                         'data': quote
-                    })
+                    }
                 except Exception as e:
                     logger.error(f"Error fetching quote for {item['exchange']}:{item['symbol']}: {e}")
-                    results.append({
+                    return {
                         'symbol': item['symbol'],
                         'exchange': item['exchange'],
                         'error': str(e)
-                    })
+                    }
+
+            # Requests run concurrently (wall time ~ slowest quote, not the sum); map keeps input order
+            if len(valid_symbols) == 1 or QUOTE_FETCH_WORKERS == 1:
+                results.extend(fetch_quote(item, data_handler) for item in valid_symbols)
+            else:
+                with ThreadPoolExecutor(max_workers=min(QUOTE_FETCH_WORKERS, len(valid_symbols))) as executor:
+                    results.extend(executor.map(fetch_quote, valid_symbols))
 
             return True, {
                 'status': 'success',
@@ -21,20 +21,94 @@ COMMENTARY Examples (should NOT detect):
 """
 
 import re
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from utils.logging import get_logger
 
 import os
 import csv
 logger = get_logger(__name__)
 
+# Patterns are compiled once at import and shared by every SignalClassifier instance,
+# so classify() only ever runs .search()/.findall() on prebuilt regex objects
+
+# Regex patterns for numbers (prices, strikes, etc.)
+_PRICE_PATTERN = re.compile(r'\b\d{2,6}(?:\.\d{1,2})?\b')
+_STRIKE_PATTERN = re.compile(r'\b\d{3,6}\b')  # 3-6 digit strikes (supports stocks/MCX)
+
+# Signal structure patterns - Strong indicators
+_SIGNAL_PATTERNS = (
+    # BUY/SELL SYMBOL STRIKE CE/PE @ PRICE SL X TGT Y
+    re.compile(r'(buy|sell|long|short)\s+\w+\s+\d+\s+(ce|pe)', re.I),
+    
+    # Has both SL and TARGET (critical for real signals)
+    re.compile(r'(?:sl|stoploss|stop).*(?:tgt|target|tp)', re.I),
+    re.compile(r'(?:tgt|target|tp).*(?:sl|stoploss|stop)', re.I),
+    
+    # Entry + SL/TGT format
+    re.compile(r'(?:entry|above|below|cmp|ltp)[:-]*\s+\d+.*(?:sl|target)', re.I),
+    
+    # SYMBOL STRIKE TYPE ABOVE/BELOW SL TARGET
+    re.compile(r'\w+\s+\d{3,6}\s+(ce|pe)\s+(?:above|below|near|@|cmp).*sl.*target', re.I),
+    re.compile(r'\w+\s+\d{3,6}\s+(ce|pe).*above', re.I),
+    
+    # Stock format: "Stock: XYZ Long/Short Price: X SL: Y TP: Z"
+    re.compile(r'stock:.*(?:long|short).*price:.*(?:sl|tp)', re.I),
+)
+
+# Anti-patterns - Strong signals this is NOT a trading call
+_ANTI_PATTERNS = (
+    # Questions
+    re.compile(r'\?', re.I),
+    
+    # Wait/watch for something
+    re.compile(r'wait\s+for', re.I),
+    re.compile(r'watch\s+(?:for|out)', re.I),
+    
+    # Multiple instruments without specific action
+    re.compile(r'(?:both|all).*(?:nifty|sensex|banknifty)', re.I),
+    
+    # News/updates
+    re.compile(r'(?:breaking|latest)\s+(?:news|update)', re.I),
+    
+    # Educational
+    re.compile(r'(?:learn|guide|tutorial|tips|strategy)', re.I),
+)
+
+# Extraction patterns used by _extract_signal_data
+_WORD_PATTERN = re.compile(r'\b[A-Z]{3,15}\b')
+_SYMBOL_PATTERN = re.compile(
+    r'\b(nifty|banknifty|finnifty|midcpnifty|sensex|bankex|crude\s*oil|crude|gold|silver|natural\s*gas|tcs|infy|reliance|hdfc\s*bank|icici\s*bank|sbine?)\b',
+    re.I
+)
+_PAREN_SYMBOL_PATTERN = re.compile(r'\(([A-Z]+)\)')
+_GENERIC_SYMBOL_PATTERN = re.compile(r'\b([A-Z]{3,15})\s+(\d{3,6})\s+(?:CE|PE)', re.I)
+_STRIKE_GROUP_PATTERN = re.compile(r'\b(\d{3,6})\b')
+_OPTION_TYPE_PATTERN = re.compile(r'\b(CE|PE|Call|Put)\b', re.I)
+_MONTH = r'(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)[a-z]*'
+_SPECIFIC_EXPIRY_PATTERN = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s*' + _MONTH, re.I)
+_MONTH_EXPIRY_PATTERN = re.compile(r'\b' + _MONTH + r'\b', re.I)
+_ENTRY_PRICE_PATTERNS = (
+    re.compile(r'\b(above|below|around|near|@|at|cmp|price|entry)\b(?:[:-]*)\s*[^0-9\n]*\s*(\d+(?:\.\d+)?)', re.I),
+)
+_NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SL_PATTERN = re.compile(r'(?:stop\s*loss|sl|stop)\s*(?:[:-]*)\s*[₹]?\s*(\d+(?:\.\d+)?)', re.I)
+_TARGET_SECTION_PATTERN = re.compile(
+    r'(?:target|tgt|tp)s?\s*[:\s-]*([\d\s,./+]+?)(?=sl|stop|above|below|\n|$)',
+    re.I
+)
+_TARGET_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+_TARGET_FALLBACK_PATTERN = re.compile(
+    r'(?:target|tgt|tp|t)\s*(?:\d+)?\s*[:\s-]*[₹]?\s*(\d+(?:\.\d+)?)',
+    re.I
+)
+
 
 class SignalClassifier:
     """Intelligent rule-based classifier for trading signals"""
     
     def __init__(self):
-        # Load valid symbols from CSV
-        self.valid_symbols = set()
+        # Load valid symbols from CSV (frozen once loaded: membership checks only)
+        valid_symbols = set()
         try:
             csv_path = os.path.join(os.path.dirname(__file__), 'symbols.csv')
             if os.path.exists(csv_path):
@@ -43,12 +117,13 @@ class SignalClassifier:
                     next(reader, None)  # Skip header
                     for row in reader:
                         if row:
-                            self.valid_symbols.add(row[0].strip().upper())
-                logger.info(f"Loaded {len(self.valid_symbols)} symbols from CSV")
+                            valid_symbols.add(row[0].strip().upper())
+                logger.info(f"Loaded {len(valid_symbols)} symbols from CSV")
             else:
                 logger.warning(f"Symbols file not found at {csv_path}")
         except Exception as e:
             logger.error(f"Failed to load symbols: {e}")
+        self.valid_symbols = frozenset(valid_symbols)
 
         # Action keywords (highest weight) - MUST HAVE for signals
         self.action_keywords = {
@@ -118,48 +193,29 @@ class SignalClassifier:
             'market': -1  # Weak negative - appears in both
         }
         
-        # Regex patterns for numbers (prices, strikes, etc.)
-        self.price_pattern = re.compile(r'\b\d{2,6}(?:\.\d{1,2})?\b')
-        self.strike_pattern = re.compile(r'\b\d{3,6}\b')  # 3-6 digit strikes (supports stocks/MCX)
+        # Shared module-level compiled patterns
+        self.price_pattern = _PRICE_PATTERN
+        self.strike_pattern = _STRIKE_PATTERN
+        self.signal_patterns = _SIGNAL_PATTERNS
+        self.anti_patterns = _ANTI_PATTERNS
+        
+        # Single whole-word scanner over every keyword table: one pass per message
+        # instead of one search per keyword. The lookahead keeps overlapping hits
+        # (e.g. 'market' inside 'pre-market') just like independent searches did.
+        words = set(self.action_keywords) | set(self.instrument_keywords) | \
+            set(self.param_keywords) | set(self.noise_keywords)
+        words.discard('?')  # Not a word; checked as a plain substring
+        self._keyword_scanner = re.compile(
+            r'(?=\b(' + '|'.join(map(re.escape, sorted(words, key=len, reverse=True))) + r')\b)'
+        )
         
-        # Signal structure patterns - Strong indicators
-        self.signal_patterns = [
-            # BUY/SELL SYMBOL STRIKE CE/PE @ PRICE SL X TGT Y
-            re.compile(r'(buy|sell|long|short)\s+\w+\s+\d+\s+(ce|pe)', re.I),
-            
-            # Has both SL and TARGET (critical for real signals)
-            re.compile(r'(?:sl|stoploss|stop).*(?:tgt|target|tp)', re.I),
-            re.compile(r'(?:tgt|target|tp).*(?:sl|stoploss|stop)', re.I),
-            
-            # Entry + SL/TGT format
-            re.compile(r'(?:entry|above|below|cmp|ltp)[:-]*\s+\d+.*(?:sl|target)', re.I),
-            
-            # SYMBOL STRIKE TYPE ABOVE/BELOW SL TARGET
-            re.compile(r'\w+\s+\d{3,6}\s+(ce|pe)\s+(?:above|below|near|@|cmp).*sl.*target', re.I),
-            re.compile(r'\w+\s+\d{3,6}\s+(ce|pe).*above', re.I),
-            
-            # Stock format: "Stock: XYZ Long/Short Price: X SL: Y TP: Z"
-            re.compile(r'stock:.*(?:long|short).*price:.*(?:sl|tp)', re.I),
-        ]
-        
-        # Anti-patterns - Strong signals this is NOT a trading call
-        self.anti_patterns = [
-            # Questions
-            re.compile(r'\?', re.I),
-            
-            # Wait/watch for something
-            re.compile(r'wait\s+for', re.I),
-            re.compile(r'watch\s+(?:for|out)', re.I),
-            
-            # Multiple instruments without specific action
-            re.compile(r'(?:both|all).*(?:nifty|sensex|banknifty)', re.I),
-            
-            # News/updates
-            re.compile(r'(?:breaking|latest)\s+(?:news|update)', re.I),
-            
-            # Educational
-            re.compile(r'(?:learn|guide|tutorial|tips|strategy)', re.I),
-        ]
+        # Tripwire for the fast path: without any of these the best possible score is
+        # price bonus (8) + structure pattern (10) = 18, below the signal threshold of 20
+        self._positive_keywords = frozenset(
+            keyword
+            for table in (self.action_keywords, self.instrument_keywords, self.param_keywords)
+            for keyword, weight in table.items() if weight > 0
+        )
     
     def classify(self, text: str) -> Tuple[bool, float, Optional[Dict]]:
         """
@@ -170,17 +226,24 @@ class SignalClassifier:
         """
         text_lower = text.lower()
         score = 0
+        found = set(self._keyword_scanner.findall(text_lower))
         
-        # Check anti-patterns first (quick rejection)
-        for anti_pattern in self.anti_patterns:
-            if anti_pattern.search(text):
-                score -= 10
-                logger.debug(f"Anti-pattern detected: {anti_pattern.pattern}")
+        # Fast path: most channel chatter has no trading keyword at all and cannot
+        # reach the signal threshold. Only the price/structure bonuses can still give it
+        # a (sub-threshold) confidence, so skip the penalty scans when those are zero.
+        if found.isdisjoint(self._positive_keywords):
+            bonus = self._pattern_bonus(text)
+            if bonus <= 0:
+                return False, 0.0, None
+            score = bonus + self._penalty_score(text, found)
+            return False, min(1.0, max(0.0, score / 35)), None
+        
+        score += self._penalty_score(text, found)
         
         # 1. Check action keywords
         action_found = None
         for keyword, weight in self.action_keywords.items():
-            if re.search(r'\b' + keyword + r'\b', text_lower):
+            if keyword in found:
                 score += weight
                 if not action_found and keyword in ['buy', 'sell', 'long', 'short']:
                     action_found = keyword.upper()
@@ -189,14 +252,14 @@ class SignalClassifier:
         
         # 2. Check instrument keywords
         for keyword, weight in self.instrument_keywords.items():
-            if re.search(r'\b' + keyword + r'\b', text_lower):
+            if keyword in found:
                 score += weight
         
         # 3. Check parameter keywords (SL/TGT are CRITICAL)
         has_sl = False
         has_tgt = False
         for keyword, weight in self.param_keywords.items():
-            if re.search(r'\b' + keyword + r'\b', text_lower):
+            if keyword in found:
                 score += weight
                 if keyword in ['sl', 'stoploss', 'stop']:
                     has_sl = True
@@ -208,30 +271,10 @@ class SignalClassifier:
             score += 12
             logger.debug("Has both SL and TGT - strong signal indicator")
         
-        # 4. Check noise keywords (subtract score)
-        for keyword, weight in self.noise_keywords.items():
-            if keyword == '?':
-                if keyword in text:
-                    score += weight
-            else:
-                if re.search(r'\b' + keyword + r'\b', text_lower):
-                    score += weight  # weight is negative
+        # 4. Anti-pattern and noise penalties were added up front (_penalty_score)
         
         # 5. Pattern bonuses
-        prices = self.price_pattern.findall(text)
-        if len(prices) >= 3:  # Entry + SL + TGT
-            score += 8
-        elif len(prices) >= 2:
-            score += 4
-        
-        # Check for signal structure patterns
-        pattern_matched = False
-        for pattern in self.signal_patterns:
-            if pattern.search(text):
-                score += 10
-                pattern_matched = True
-                logger.debug(f"Pattern matched: {pattern.pattern}")
-                break
+        score += self._pattern_bonus(text)
         
         # 6. Calculate confidence
         # Normalize score to 0-1 range
@@ -253,17 +296,56 @@ class SignalClassifier:
             )
             
             if not has_meaningful_data:
-                logger.debug(f"Signal downgraded - insufficient data: {extracted}")
+                logger.debug("Signal downgraded - insufficient data: %s", extracted)
                 is_signal = False
                 confidence = confidence * 0.5
                 extracted = None
         
-        logger.debug(f"Classification score: {score}, confidence: {confidence:.2f}, is_signal: {is_signal}")
+        logger.debug("Classification score: %s, confidence: %.2f, is_signal: %s", score, confidence, is_signal)
         return is_signal, confidence, extracted
     
+    def _penalty_score(self, text: str, found: set) -> int:
+        """Anti-pattern and noise-keyword penalties (zero or negative)"""
+        score = 0
+        # Anti-patterns (quick rejection)
+        for anti_pattern in self.anti_patterns:
+            if anti_pattern.search(text):
+                score -= 10
+                logger.debug("Anti-pattern detected: %s", anti_pattern.pattern)
+        
+        # Noise keywords (weights are negative)
+        for keyword, weight in self.noise_keywords.items():
+            if keyword == '?':
+                if keyword in text:
+                    score += weight
+            elif keyword in found:
+                score += weight
+        return score
+    
+    def _pattern_bonus(self, text: str) -> int:
+        """Price-count and signal-structure bonuses (zero or positive)"""
+        score = 0
+        prices = self.price_pattern.findall(text)
+        if len(prices) >= 3:  # Entry + SL + TGT
+            score += 8
+        elif len(prices) >= 2:
+            score += 4
+        
+        # Check for signal structure patterns
+        for pattern in self.signal_patterns:
+            if pattern.search(text):
+                score += 10
+                logger.debug("Pattern matched: %s", pattern.pattern)
+                break
+        return score
+    
+    def classify_batch(self, texts: List[str]) -> List[Tuple[bool, float, Optional[Dict]]]:
+        """Classify several messages; results are in input order"""
+        return [self.classify(text) for text in texts]
+    
     def _extract_signal_data(self, text: str, action: str) -> Dict:
         """Extract structured data from signal using advanced regex patterns"""
-        logger.info(f"DEBUG EXTRACT: Processing text: {text!r}")
+        logger.debug("DEBUG EXTRACT: Processing text: %r", text)
         data = {}
         
         if action:
@@ -280,7 +362,7 @@ class SignalClassifier:
         # This allows capturing "BUY ACC" or "SELL TATASTEEL"
         if self.valid_symbols:
             # Tokenize text (uppercase)
-            words = re.findall(r'\b[A-Z]{3,15}\b', text.upper())
+            words = _WORD_PATTERN.findall(text.upper())
             for w in words:
                 if w in self.valid_symbols or w in common_indices:
                     # Preference: If we find a symbol that is near "BUY" or "SELL" or matches Generic Pattern
@@ -289,12 +371,11 @@ class SignalClassifier:
         
         # Fallback to regex for complex cases (like "NIFTY DEC FUT") if not simple match
         # Handles: "RELIANCE", "HDFC BANK (HDFCBANK)", "BANKNIFTY", "NIFTY DEC FUT", "NATURAL GAS"
-        symbol_pattern = r'\b(nifty|banknifty|finnifty|midcpnifty|sensex|bankex|crude\s*oil|crude|gold|silver|natural\s*gas|tcs|infy|reliance|hdfc\s*bank|icici\s*bank|sbine?)\b'
-        symbol_match = re.search(symbol_pattern, text, re.I)
+        symbol_match = _SYMBOL_PATTERN.search(text)
         
         # Check for symbol inside parentheses if not found initially (e.g., "HDFC BANK (HDFCBANK)")
         if not symbol_match:
-             paren_symbol = re.search(r'\(([A-Z]+)\)', text)
+             paren_symbol = _PAREN_SYMBOL_PATTERN.search(text)
              if paren_symbol:
                  data['symbol'] = paren_symbol.group(1).upper()
         elif symbol_match:
@@ -311,18 +392,18 @@ class SignalClassifier:
         # Matches: "DALBHARAT 2180 PE", "MARUTI 16700 CE"
         if 'symbol' not in data:
             # Look for Word followed by Number followed by CE/PE
-            generic_match = re.search(r'\b([A-Z]{3,15})\s+(\d{3,6})\s+(?:CE|PE)', text, re.I)
+            generic_match = _GENERIC_SYMBOL_PATTERN.search(text)
             if generic_match:
                 data['symbol'] = generic_match.group(1).upper()
                 # We can also capture strike here if we want, but letting step 2 handle it is safer
                 # data['strike'] = generic_match.group(2)
 
         # 2. Extract Option Details (Strike & Type)
-        strike_match = re.search(r'\b(\d{3,6})\b', text)
+        strike_match = _STRIKE_GROUP_PATTERN.search(text)
         if strike_match:
             data['strike'] = strike_match.group(1)
         
-        option_match = re.search(r'\b(CE|PE|Call|Put)\b', text, re.I)
+        option_match = _OPTION_TYPE_PATTERN.search(text)
         if option_match:
             otype = option_match.group(1).upper()
             data['option_type'] = 'CE' if otype in ['CE', 'CALL'] else 'PE'
@@ -332,15 +413,13 @@ class SignalClassifier:
         # Regex captures: (Day)(Ordinal?)(Month) OR (Month)
         # Note: We prioritize specific dates (25 JAN) over just Month (JAN) if both exist
         
-        month_pattern = r'(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)[a-z]*'
-        
         # Pattern A: Specific Date (25 JAN, 25th JAN, 25JAN)
         # Group 1: Day, Group 3: Month
-        specific_expiry = re.search(r'(\d{1,2})(?:st|nd|rd|th)?\s*' + month_pattern, text, re.I)
+        specific_expiry = _SPECIFIC_EXPIRY_PATTERN.search(text)
         
         # Pattern B: Month Only (FEB Future)
         # Group 1: Month
-        month_expiry = re.search(r'\b' + month_pattern + r'\b', text, re.I)
+        month_expiry = _MONTH_EXPIRY_PATTERN.search(text)
         
         if specific_expiry:
             day = specific_expiry.group(1)
@@ -355,12 +434,8 @@ class SignalClassifier:
         # 3. Extract Entry Price and Condition
         # Robust pattern: Keyword (captured) + optional separator (:- or :) + optional junk + currency + number (captured)
         # Matches: "above 2500", "above:- 24", "Entry: 350", "at ₹1400", "Buy @ 1650"
-        price_patterns = [
-            r'\b(above|below|around|near|@|at|cmp|price|entry)\b(?:[:-]*)\s*[^0-9\n]*\s*(\d+(?:\.\d+)?)'
-        ]
-        
-        for p in price_patterns:
-            match = re.search(p, text, re.I)
+        for p in _ENTRY_PRICE_PATTERNS:
+            match = p.search(text)
             if match:
                 condition_word = match.group(1).lower()
                 data['price'] = match.group(2)
@@ -373,7 +448,7 @@ class SignalClassifier:
         # Fallback: If still no price, using the logic of finding the first number that isn't a strike
         if 'price' not in data:
              # Find all potential prices (floats or integers)
-             all_nums = re.findall(r'\b\d+(?:\.\d+)?\b', text)
+             all_nums = _NUMBER_PATTERN.findall(text)
              
              # Get strike price to exclude
              strike_exclude = str(data.get('strike', ''))
@@ -393,87 +468,68 @@ class SignalClassifier:
         
         # 4. Extract Stop Loss (SL)
         # Matches: "SL 2485", "SL:- 18", "Stop Loss: 320"
-        sl_match = re.search(r'(?:stop\s*loss|sl|stop)\s*(?:[:-]*)\s*[₹]?\s*(\d+(?:\.\d+)?)', text, re.I)
+        sl_match = _SL_PATTERN.search(text)
         if sl_match:
             data['sl'] = sl_match.group(1)
             data['stop_loss'] = sl_match.group(1)
 
         # 5. Extract Targets
         # Matches: "Target: 200,201,202", "TGT: 200/201/202", "T1 380 T2 385 T3 390"
-        targets = []
+        # Parsed values keyed by the raw string (dict keeps first-seen order and
+        # dedups); price/SL are parsed once rather than per candidate number
+        targets = {}
+        price_val = float(data.get('price', 0))
+        sl_val = float(data.get('sl', 0))
         
         # Strategy: First capture the section after TARGET keyword, then parse numbers from it
         # Pattern: Find "target/tgt/tp" followed by colon/dash, then capture everything until next keyword or newline
-        target_section_match = re.search(
-            r'(?:target|tgt|tp)s?\s*[:\s-]*([\d\s,./+]+?)(?=sl|stop|above|below|\n|$)',
-            text,
-            re.I
-        )
+        target_section_match = _TARGET_SECTION_PATTERN.search(text)
         
-        logger.info(f"DEBUG TARGETS: target_section_match = {target_section_match}")
+        logger.debug("DEBUG TARGETS: target_section_match = %s", target_section_match)
         if target_section_match:
             # Extract all numbers from the captured section
             target_str = target_section_match.group(1)
-            logger.info(f"DEBUG TARGETS: target_str = '{target_str}'")
+            logger.debug("DEBUG TARGETS: target_str = '%s'", target_str)
             # Split by common delimiters: comma, slash, space, plus
             # Then extract numbers from each part
-            potential_targets = re.findall(r'\d+(?:\.\d+)?', target_str)
-            logger.info(f"DEBUG TARGETS: potential_targets from regex = {potential_targets}")
+            potential_targets = _TARGET_NUMBER_PATTERN.findall(target_str)
+            logger.debug("DEBUG TARGETS: potential_targets from regex = %s", potential_targets)
             
             for t in potential_targets:
-                try:
-                    val = float(t)
-                    price_val = float(data.get('price', 0))
-                    sl_val = float(data.get('sl', 0))
-                    
-                    # Exclude if it equals Price or SL
-                    # Also exclude small numbers that look like labels (1, 2, 3)
-                    if val != price_val and val != sl_val and val > 5:
-                        targets.append(t)
-                        logger.info(f"DEBUG TARGETS: Added target {t} (val={val}, price={price_val}, sl={sl_val})")
-                    else:
-                        logger.info(f"DEBUG TARGETS: SKIPPED target {t} (val={val}, price={price_val}, sl={sl_val})")
-                except:
-                    continue
+                val = float(t)
+                
+                # Exclude if it equals Price or SL
+                # Also exclude small numbers that look like labels (1, 2, 3)
+                if val != price_val and val != sl_val and val > 5:
+                    targets.setdefault(t, val)
+                    logger.debug("DEBUG TARGETS: Added target %s (val=%s, price=%s, sl=%s)", t, val, price_val, sl_val)
+                else:
+                    logger.debug("DEBUG TARGETS: SKIPPED target %s (val=%s, price=%s, sl=%s)", t, val, price_val, sl_val)
         
         # Fallback: Try individual target patterns if section-based didn't work
         if not targets:
             # Pattern: "T1: 200" or "Target 1: 200"
-            t_matches = re.findall(
-                r'(?:target|tgt|tp|t)\s*(?:\d+)?\s*[:\s-]*[₹]?\s*(\d+(?:\.\d+)?)',
-                text,
-                re.I
-            )
+            t_matches = _TARGET_FALLBACK_PATTERN.findall(text)
             
             for t in t_matches:
-                try:
-                    val = float(t)
-                    price_val = float(data.get('price', 0))
-                    sl_val = float(data.get('sl', 0))
-                    
-                    if val != price_val and val != sl_val and val > 5:
-                        targets.append(t)
-                except:
-                    continue
-        
-        # Clean duplicates preserving order
-        targets = list(dict.fromkeys(targets))
-        logger.info(f"DEBUG TARGETS: Extracted targets after dedup: {targets}")
+                val = float(t)
+                
+                if val != price_val and val != sl_val and val > 5:
+                    targets.setdefault(t, val)
+        
+        logger.debug("DEBUG TARGETS: Extracted targets after dedup: %s", list(targets))
         
         # Set targets and determine final target
         if targets:
-            data['targets'] = targets
-            logger.info(f"DEBUG TARGETS: Set data['targets'] = {targets}")
+            data['targets'] = list(targets)
+            logger.debug("DEBUG TARGETS: Set data['targets'] = %s", data['targets'])
             # Logic: If BUY, max is final target. If SELL, min is final target.
-            try:
-                nums = [float(x) for x in targets]
-                if data.get('action') == 'SELL':
-                    data['tgt'] = str(min(nums))
-                else:
-                    data['tgt'] = str(max(nums))
-                logger.info(f"DEBUG TARGETS: Computed final tgt={data['tgt']} from {nums}")
-            except:
-                data['tgt'] = targets[-1]
+            nums = list(targets.values())
+            if data.get('action') == 'SELL':
+                data['tgt'] = str(min(nums))
+            else:
+                data['tgt'] = str(max(nums))
+            logger.debug("DEBUG TARGETS: Computed final tgt=%s from %s", data['tgt'], nums)
         
         return data
 
@@ -20,7 +20,7 @@ from sqlalchemy import and_, func
 from sqlalchemy import and_, func
 from sqlalchemy import and_, func
 from datetime import datetime
-from database.auth_db import get_auth_token_dbquery, decrypt_token, get_api_key_for_tradingview
+from database.auth_db import get_cached_auth, decrypt_token, get_api_key_for_tradingview
 from services.quotes_service import get_quotes
 
 logger = get_logger(__name__)
@@ -213,9 +213,9 @@ class SignalExecutionService:
             # Retrieve auth token and broker for the default user
             # TODO: Make this configurable or multi-user aware
             username = 'aravind' 
-            auth_obj = get_auth_token_dbquery(username)
+            auth_obj = get_cached_auth(username)
             
-            if not auth_obj or auth_obj.is_revoked:
+            if not auth_obj:
                  logger.error(f"Cannot execute signal: No active session for user '{username}'")
                  return False, "No active broker session"
                  
@@ -3,12 +3,22 @@ import re
 import logging
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
-from database.telegram_db import get_bot_config, update_bot_config
+from database.telegram_db import get_bot_config, update_bot_config, get_listener_config
 from utils.logging import get_logger
 import os
+import threading
 
 logger = get_logger(__name__)
 
+
+def _warm_classifier():
+    """Import the classifier (symbols CSV load + regex compile) ahead of the first message"""
+    try:
+        import services.signal_classifier  # noqa: F401
+    except Exception as e:
+        logger.warning(f"Classifier warm-up failed: {e}")
+
+
 class TelegramSignalListener:
     def __init__(self):
         self.client = None
@@ -17,6 +27,7 @@ class TelegramSignalListener:
         self.api_id = None
         self.api_hash = None
         self.session_string = None
+        self._config_lock = threading.Lock()
         
         # Regex for generic signal parsing (Buy/Sell)
         # Matches: BUY/SELL [SYMBOL] [STRIKE] [TYPE] [PRICE] [SL] [TARGET]
@@ -32,13 +43,24 @@ class TelegramSignalListener:
             re.IGNORECASE
         )
 
+    def apply_config(self, config):
+        """Apply saved api_id / api_hash / target_channel values (only the keys present)"""
+        with self._config_lock:
+            if 'api_id' in config:
+                self.api_id = config['api_id']
+            if 'api_hash' in config:
+                self.api_hash = config['api_hash']
+            if 'target_channel' in config:
+                self.target_channel = config['target_channel']
+
     async def initialize(self):
         """Initialize the client from config"""
         try:
-            # Load config from env or db
-            self.api_id = os.getenv("TELEGRAM_API_ID")
-            self.api_hash = os.getenv("TELEGRAM_API_HASH")
-            self.target_channel = os.getenv("TELEGRAM_TARGET_CHANNEL")
+            # Load config from db (saved via the config page), falling back to env
+            saved = get_listener_config()
+            self.api_id = saved.get('api_id') or os.getenv("TELEGRAM_API_ID")
+            self.api_hash = saved.get('api_hash') or os.getenv("TELEGRAM_API_HASH")
+            self.target_channel = saved.get('target_channel') or os.getenv("TELEGRAM_TARGET_CHANNEL")
             
             # Support multiple channels
             channels_env = os.getenv("TELEGRAM_CHANNELS", "")
@@ -87,6 +109,9 @@ class TelegramSignalListener:
             if not self.client:
                 await self.initialize()
             
+            # Load the classifier while the Telegram handshake is in flight
+            threading.Thread(target=_warm_classifier, name="classifier_warmup", daemon=True).start()
+            
             await self.client.connect()
             
             if not await self.client.is_user_authorized():
@@ -335,9 +335,24 @@ document.addEventListener('DOMContentLoaded', function() {
     var alertSound = document.getElementById('alert-sound');
     var isOnAnalyzerPage = window.location.pathname.includes('/analyzer');
 
-    socket.on('connect', function() {});
+    socket.on('connect', function() {
+        // Catch up on any badge pushes missed while disconnected
+        if (typeof updateActionCenterBadge === 'function') updateActionCenterBadge();
+    });
     socket.on('disconnect', function() {});
 
+    // Action Center badge count, pushed only to this user's room
+    socket.on('pending_count', function(data) {
+        const badge = document.getElementById('action-center-badge');
+        if (!badge) return;
+        if (data.count > 0) {
+            badge.textContent = data.count;
+            badge.style.display = 'inline-block';
+        } else {
+            badge.style.display = 'none';
+        }
+    });
+
     // Password change notification
     socket.on('password_change', function(data) {
         playAlertSound('password_change', { message: data.message });
@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import database.action_center_db as acdb
+
+
+class TestPendingCountCache(unittest.TestCase):
+    def setUp(self):
+        acdb._pending_count_cache.clear()
+        self.query = MagicMock()
+        self.query.filter_by.return_value.count.return_value = 3
+        patcher = patch.object(acdb.PendingOrder, 'query', self.query)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(acdb._pending_count_cache.clear)
+
+    def test_count_is_cached_per_user(self):
+        self.assertEqual(acdb.get_pending_count('alice'), 3)
+        self.assertEqual(acdb.get_pending_count('alice'), 3)
+        self.query.filter_by.assert_called_once_with(user_id='alice', status='pending')
+
+    def test_invalidate_forces_requery(self):
+        acdb.get_pending_count('alice')
+        acdb._invalidate_pending_count('alice')
+        self.query.filter_by.return_value.count.return_value = 2
+        self.assertEqual(acdb.get_pending_count('alice'), 2)
+
+    def test_zero_count_is_cached(self):
+        self.query.filter_by.return_value.count.return_value = 0
+        acdb.get_pending_count('bob')
+        acdb.get_pending_count('bob')
+        self.assertEqual(self.query.filter_by.call_count, 1)
+
+    def test_query_error_returns_zero_and_is_not_cached(self):
+        self.query.filter_by.side_effect = RuntimeError('db down')
+        self.assertEqual(acdb.get_pending_count('alice'), 0)
+        self.assertNotIn('alice', acdb._pending_count_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import patch
+
+import database.auth_db as auth_db
+
+
+class _ExpiringCache(dict):
+    """Reports a key as present, then loses it before it can be read, like a TTLCache entry expiring"""
+
+    def __contains__(self, key):
+        return True
+
+    def get(self, key, default=None):
+        return default
+
+
+class TestGetCachedAuth(unittest.TestCase):
+    def setUp(self):
+        auth_db.auth_cache.clear()
+        self.addCleanup(auth_db.auth_cache.clear)
+
+    def _auth(self, revoked=False):
+        return auth_db.Auth(name='alice', auth='enc', broker='zerodha', is_revoked=revoked)
+
+    def test_row_is_cached(self):
+        auth = self._auth()
+        with patch.object(auth_db, 'get_auth_token_dbquery', return_value=auth) as mock_query:
+            self.assertIs(auth_db.get_cached_auth('alice'), auth)
+            self.assertIs(auth_db.get_cached_auth('alice'), auth)
+        mock_query.assert_called_once_with('alice')
+
+    def test_revoked_row_is_evicted(self):
+        auth_db.auth_cache['auth-alice'] = self._auth(revoked=True)
+        self.assertIsNone(auth_db.get_cached_auth('alice'))
+        self.assertNotIn('auth-alice', auth_db.auth_cache)
+
+    def test_entry_expiring_mid_lookup_falls_back_to_db(self):
+        auth = self._auth()
+        with patch.object(auth_db, 'auth_cache', _ExpiringCache()), \
+             patch.object(auth_db, 'get_auth_token_dbquery', return_value=auth):
+            self.assertIs(auth_db.get_cached_auth('alice'), auth)
+
+
+if __name__ == '__main__':
+    unittest.main()
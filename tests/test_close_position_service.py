@@ -0,0 +1,29 @@
+import types
+import unittest
+from unittest.mock import patch
+
+import services.close_position_service as close_position_service
+
+
+class TestImportBrokerModule(unittest.TestCase):
+    def setUp(self):
+        close_position_service._load_broker_module.cache_clear()
+        self.addCleanup(close_position_service._load_broker_module.cache_clear)
+
+    def test_success_is_memoized(self):
+        module = types.SimpleNamespace()
+        with patch.object(close_position_service.importlib, 'import_module', return_value=module) as mock_import:
+            self.assertIs(close_position_service.import_broker_module('zerodha'), module)
+            self.assertIs(close_position_service.import_broker_module('zerodha'), module)
+        mock_import.assert_called_once_with('broker.zerodha.api.order_api')
+
+    def test_failure_is_not_cached(self):
+        module = types.SimpleNamespace()
+        with patch.object(close_position_service.importlib, 'import_module',
+                          side_effect=[ImportError('boom'), module]):
+            self.assertIsNone(close_position_service.import_broker_module('zerodha'))
+            self.assertIs(close_position_service.import_broker_module('zerodha'), module)
+
+
+if __name__ == '__main__':
+    unittest.main()
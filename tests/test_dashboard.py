@@ -0,0 +1,75 @@
+import inspect
+import threading
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, session
+
+import blueprints.dashboard as dashboard
+
+
+class TestDashboardFunds(unittest.TestCase):
+    def setUp(self):
+        dashboard._FUNDS_CACHE.clear()
+        dashboard._FUNDS_INFLIGHT.clear()
+        self.addCleanup(dashboard._FUNDS_CACHE.clear)
+
+    def test_concurrent_lookups_share_one_broker_call(self):
+        release = threading.Event()
+        calls = []
+
+        def get_funds(**kwargs):
+            calls.append(kwargs)
+            release.wait(5)
+            return True, {'data': {'availablecash': '100.00'}}, 200
+
+        with patch.object(dashboard, 'get_funds', side_effect=get_funds):
+            first = dashboard._submit_margin_data('alice', 'token', 'zerodha', False)
+            second = dashboard._submit_margin_data('alice', 'token', 'zerodha', False)
+            self.assertIs(first, second)
+            release.set()
+            self.assertEqual(first.result(timeout=5), {'availablecash': '100.00'})
+
+        self.assertEqual(len(calls), 1)
+        # Served from the cache once the lookup has finished
+        self.assertEqual(dashboard._submit_margin_data('alice', 'token', 'zerodha', False),
+                         {'availablecash': '100.00'})
+
+    def test_failed_lookup_is_not_cached(self):
+        with patch.object(dashboard, 'get_funds', return_value=(False, {}, 500)):
+            self.assertEqual(dashboard._submit_margin_data('alice', 'token', 'zerodha', False).result(timeout=5), {})
+        self.assertNotIn(('alice', 'zerodha', False), dashboard._FUNDS_CACHE)
+
+
+class TestDashboardRender(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.view = inspect.unwrap(dashboard.dashboard)
+
+    def _render(self, funds):
+        with patch.object(dashboard, 'get_auth_token', return_value='token'), \
+             patch.object(dashboard, 'get_analyze_mode', return_value=False), \
+             patch.object(dashboard, '_submit_margin_data', return_value=funds), \
+             patch.object(dashboard, '_fetch_dashboard_quotes', return_value=None), \
+             patch.object(dashboard, 'render_template', return_value='ok') as mock_render:
+            with self.app.test_request_context('/dashboard'):
+                session['user'] = 'alice'
+                session['broker'] = 'zerodha'
+                self.view()
+        return mock_render.call_args.kwargs['margin_data']
+
+    def test_cached_margin_is_rendered(self):
+        self.assertEqual(self._render({'availablecash': '100.00'}), {'availablecash': '100.00'})
+
+    def test_finished_lookup_is_rendered(self):
+        future = dashboard.Future()
+        future.set_result({'availablecash': '50.00'})
+        self.assertEqual(self._render(future), {'availablecash': '50.00'})
+
+    def test_pending_lookup_renders_empty_panel(self):
+        self.assertEqual(self._render(dashboard.Future()), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
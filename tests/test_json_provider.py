@@ -0,0 +1,44 @@
+import json
+import unittest
+from datetime import datetime, timezone
+
+from flask import Flask, jsonify, request
+
+from utils.json_provider import OrjsonProvider
+
+
+class TestOrjsonProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
+
+    def test_round_trip(self):
+        payload = {'symbol': 'NIFTY', 'ltp': 24000.5, 'data': [1, None, True]}
+        self.assertEqual(self.app.json.loads(self.app.json.dumps(payload)), payload)
+        self.assertEqual(self.app.json.loads(b'{"a": 1}'), {'a': 1})
+
+    def test_sort_keys_and_indent(self):
+        # Flask's default provider sorts keys; orjson must keep that
+        self.assertEqual(self.app.json.dumps({'b': 1, 'a': 2}), '{"a":2,"b":1}')
+        self.assertEqual(self.app.json.dumps({'b': 1, 'a': 2}, sort_keys=False), '{"b":1,"a":2}')
+        self.assertEqual(self.app.json.dumps({'a': 1}, indent=2), '{\n  "a": 1\n}')
+
+    def test_non_str_keys(self):
+        self.assertEqual(json.loads(self.app.json.dumps({1: 'x', 2: 'y'})), {'1': 'x', '2': 'y'})
+
+    def test_wide_ints_fall_back_to_stdlib(self):
+        self.assertEqual(self.app.json.dumps({'n': 2 ** 70}), '{"n": %d}' % 2 ** 70)
+
+    def test_datetimes_keep_flask_http_date_format(self):
+        moment = datetime(2024, 12, 19, 9, 15, tzinfo=timezone.utc)
+        self.assertEqual(self.app.json.loads(self.app.json.dumps({'at': moment})),
+                         {'at': 'Thu, 19 Dec 2024 09:15:00 GMT'})
+
+    def test_jsonify_and_request_json(self):
+        with self.app.test_request_context('/', method='POST', json={'qty': 5}):
+            self.assertEqual(request.get_json(), {'qty': 5})
+            self.assertEqual(jsonify(status='success').get_json(), {'status': 'success'})
+
+
+if __name__ == '__main__':
+    unittest.main()
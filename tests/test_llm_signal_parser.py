@@ -0,0 +1,42 @@
+import json
+import types
+import unittest
+from unittest.mock import MagicMock
+
+from services.llm_signal_parser import LLMSignalParser, _cache_key
+
+
+class TestParseSignals(unittest.TestCase):
+    def setUp(self):
+        self.parser = LLMSignalParser()
+        self.parser.enabled = True
+        self.parser.model = MagicMock()
+
+    def _reply(self, results):
+        self.parser.model.generate_content.return_value = types.SimpleNamespace(text=json.dumps(results))
+
+    def test_non_object_elements_become_errors(self):
+        self._reply([{'is_signal': True, 'symbol': 'NIFTY'}, None, 'oops'])
+        results = self.parser.parse_signals(['BUY NIFTY 24000 CE @ 99', 'hello', 'hi there'])
+        self.assertEqual(results[0], {'is_signal': True, 'symbol': 'NIFTY'})
+        for result in results[1:]:
+            self.assertFalse(result['is_signal'])
+            self.assertIn('error', result)
+
+        # Only the good parse is cached; the bad ones are retried
+        self._reply([{'is_signal': False}, {'is_signal': False}])
+        self.parser.parse_signals(['BUY NIFTY 24000 CE @ 99', 'hello', 'hi there'])
+        prompt = self.parser.model.generate_content.call_args.args[0]
+        self.assertEqual(json.loads(prompt.split('Messages: ')[1].split('\n')[0]), ['hello', 'hi there'])
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_whitespace_and_case_are_normalized(self):
+        self.assertEqual(_cache_key('BUY  NIFTY\n24000 CE '), _cache_key('buy nifty 24000 ce'))
+
+    def test_emoji_keep_messages_apart(self):
+        self.assertNotEqual(_cache_key('🟢 NIFTY 24000 CE 120'), _cache_key('🔴 NIFTY 24000 CE 120'))
+
+
+if __name__ == '__main__':
+    unittest.main()
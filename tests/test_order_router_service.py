@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, session
+
+import extensions
+import services.order_router_service as order_router_service
+
+
+class TestQueueOrderEvents(unittest.TestCase):
+    def test_pending_count_goes_only_to_the_users_room(self):
+        with patch.object(order_router_service, 'verify_api_key', return_value='alice'), \
+             patch.object(order_router_service, 'create_pending_order', return_value=11), \
+             patch.object(order_router_service, 'get_pending_count', return_value=3), \
+             patch.object(order_router_service, 'socketio') as mock_socketio:
+            success, data, status_code = order_router_service.queue_order(
+                'key', {'apikey': 'key', 'symbol': 'SBIN'}, 'placeorder')
+
+        self.assertEqual((success, status_code, data['pending_order_id']), (True, 200, 11))
+        counts = [c for c in mock_socketio.start_background_task.call_args_list if c.args[1] == 'pending_count']
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(counts[0].args[2], {'count': 3})
+        self.assertEqual(counts[0].kwargs, {'to': 'user_alice'})
+
+
+class TestJoinUserRoom(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+
+    def test_logged_in_socket_joins_its_room(self):
+        with patch.object(extensions, 'join_room') as mock_join, self.app.test_request_context('/'):
+            session['user'] = 'alice'
+            extensions.join_user_room()
+        mock_join.assert_called_once_with('user_alice')
+
+    def test_anonymous_socket_joins_nothing(self):
+        with patch.object(extensions, 'join_room') as mock_join, self.app.test_request_context('/'):
+            extensions.join_user_room()
+        mock_join.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+import csv
+import gzip
+import inspect
+import io
+import threading
+import types
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, session
+
+import blueprints.orders as orders
+
+
+class TestDynamicImport(unittest.TestCase):
+    def setUp(self):
+        orders._load_broker_functions.cache_clear()
+
+    def tearDown(self):
+        orders._load_broker_functions.cache_clear()
+
+    def test_success_is_memoized(self):
+        module = types.SimpleNamespace(get_order_book=lambda token: 'book')
+        with patch.object(orders, 'import_module', return_value=module) as mock_import:
+            first = orders.dynamic_import('zerodha', 'api.order_api', ('get_order_book',))
+            second = orders.dynamic_import('zerodha', 'api.order_api', ('get_order_book',))
+        self.assertIs(first, second)
+        self.assertEqual(first['get_order_book']('t'), 'book')
+        mock_import.assert_called_once()
+
+    def test_failure_is_not_cached(self):
+        module = types.SimpleNamespace(get_order_book=lambda token: 'book')
+        with patch.object(orders, 'import_module', side_effect=[ImportError('boom'), module]):
+            self.assertIsNone(orders.dynamic_import('zerodha', 'api.order_api', ('get_order_book',)))
+            funcs = orders.dynamic_import('zerodha', 'api.order_api', ('get_order_book',))
+        self.assertIn('get_order_book', funcs)
+
+    def test_missing_function_returns_none(self):
+        with patch.object(orders, 'import_module', return_value=types.SimpleNamespace()):
+            self.assertIsNone(orders.dynamic_import('zerodha', 'api.order_api', ('get_order_book',)))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        orders.API_CACHE.clear()
+        orders._INFLIGHT.clear()
+        self.addCleanup(orders.API_CACHE.clear)
+
+    def _run_concurrently(self, loader, count):
+        results = [None] * count
+        def call(i):
+            results[i] = orders._single_flight(('alice', 'orders'), loader)
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+        for t in threads:
+            t.start()
+        return threads, results
+
+    def test_concurrent_misses_share_one_load(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return True, {'data': [1]}, 200
+
+        leader = threading.Thread(target=orders._single_flight, args=(('alice', 'orders'), loader))
+        leader.start()
+        started.wait(5)
+        threads, results = self._run_concurrently(loader, 3)
+        release.set()
+        for t in threads + [leader]:
+            t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [(True, {'data': [1]}, 200)] * 3)
+        # Served from the cache afterwards
+        self.assertEqual(orders._single_flight(('alice', 'orders'), loader), (True, {'data': [1]}, 200))
+        self.assertEqual(len(calls), 1)
+
+    def test_failure_is_not_cached(self):
+        results = iter([(False, {'message': 'down'}, 500), (True, {'data': []}, 200)])
+        loader = lambda: next(results)
+        self.assertEqual(orders._single_flight(('alice', 'orders'), loader), (False, {'message': 'down'}, 500))
+        self.assertEqual(orders._single_flight(('alice', 'orders'), loader), (True, {'data': []}, 200))
+        self.assertEqual(orders._INFLIGHT, {})
+
+    def test_waiter_fetches_itself_when_leader_fails(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                started.set()
+                release.wait(5)
+                return False, {'message': 'down'}, 500
+            return True, {'data': [2]}, 200
+
+        leader = threading.Thread(target=orders._single_flight, args=(('alice', 'orders'), loader))
+        leader.start()
+        started.wait(5)
+        threads, results = self._run_concurrently(loader, 1)
+        release.set()
+        for t in threads + [leader]:
+            t.join(5)
+        self.assertEqual(results, [(True, {'data': [2]}, 200)])
+        self.assertEqual(len(calls), 2)
+
+
+class TestEnrichPositions(unittest.TestCase):
+    def _enrich(self, positions, ltp_map, **monitor):
+        with patch.object(orders, '_fetch_ltp_map', return_value=ltp_map), \
+             patch.object(orders, 'position_monitor', **monitor):
+            return orders.enrich_positions(positions, 'alice', 'token', 'zerodha')
+
+    def test_monitor_and_ltp_are_merged(self):
+        monitored = {'current_sl': 90.0, 'final_target': 120.0, 'targets': [110.0, 120.0]}
+        positions = self._enrich(
+            [{'symbol': 'SBIN', 'exchange': 'NSE', 'product': 'MIS'}, {'symbol': 'TCS', 'exchange': 'NSE', 'product': 'CNC'}],
+            {('SBIN', 'NSE'): 800.0},
+            **{'get_lookup_maps.return_value': ({('SBIN', 'MIS', 'NSE'): monitored}, {})})
+        self.assertEqual(positions[0], {'symbol': 'SBIN', 'exchange': 'NSE', 'product': 'MIS', 'ltp': 800.0, **monitored})
+        self.assertEqual(positions[1]['current_sl'], '-')
+        self.assertNotIn('ltp', positions[1])
+
+    def test_monitor_failure_serves_unenriched_rows(self):
+        positions = self._enrich([{'symbol': 'SBIN', 'exchange': 'NSE', 'product': 'MIS'}], {},
+                                 **{'get_lookup_maps.side_effect': RuntimeError('monitor down')})
+        self.assertEqual((positions[0]['current_sl'], positions[0]['final_target'], positions[0]['targets']),
+                         ('-', '-', []))
+
+    def test_non_str_broker_values(self):
+        positions = self._enrich([{'symbol': 500325, 'exchange': None, 'product': 'CNC'}], {('500325', ''): 1.5},
+                                 **{'get_lookup_maps.return_value': ({}, {})})
+        self.assertEqual((positions[0]['current_sl'], positions[0]['ltp']), ('-', 1.5))
+
+
+class TestApproveAllPendingOrders(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.view = inspect.unwrap(orders.approve_all_pending_orders)
+
+    def _call(self, pending_ids, approved_ids, execute):
+        pending = [types.SimpleNamespace(id=oid) for oid in pending_ids]
+        with patch.object(orders, 'get_pending_orders', return_value=pending), \
+             patch.object(orders, 'bulk_approve_pending_orders', return_value=approved_ids) as mock_bulk, \
+             patch.object(orders, 'execute_approved_order', side_effect=execute), \
+             patch.object(orders, '_emit_async'), patch.object(orders, '_emit_pending_count'):
+            with self.app.test_request_context('/action-center/approve-all', method='POST'):
+                session['user'] = 'alice'
+                response, status_code = self.view()
+                data = response.get_json()
+        return data, status_code, mock_bulk
+
+    def test_no_pending_orders(self):
+        data, status_code, mock_bulk = self._call([], [], None)
+        self.assertEqual(data['status'], 'info')
+        mock_bulk.assert_not_called()
+
+    def test_approves_for_owner_and_reports_failures_in_approval_order(self):
+        def execute(order_id):
+            if order_id in (3, 1):
+                return False, {'message': f'rejected {order_id}'}, 400
+            return True, {}, 200
+
+        data, status_code, mock_bulk = self._call([1, 2, 3, 4], [1, 2, 3, 4], execute)
+        mock_bulk.assert_called_once_with([1, 2, 3, 4], approved_by='alice', user_id='alice')
+        self.assertEqual(status_code, 200)
+        self.assertEqual(data['status'], 'warning')
+        self.assertEqual((data['approved_count'], data['executed_count']), (4, 2))
+        self.assertEqual([f['order_id'] for f in data['failed_executions']], [1, 3])
+
+    def test_execution_exception_is_reported_as_failure(self):
+        def execute(order_id):
+            raise RuntimeError('broker down')
+
+        data, _, _ = self._call([7], [7], execute)
+        self.assertEqual(data['status'], 'error')
+        self.assertEqual(data['failed_executions'], [{'order_id': 7, 'error': 'broker down'}])
+
+    def test_semaphore_is_shared_per_user(self):
+        self.assertIs(orders._approve_semaphore('alice'), orders._approve_semaphore('alice'))
+        self.assertIsNot(orders._approve_semaphore('alice'), orders._approve_semaphore('bob'))
+
+
+class TestPendingCountEmit(unittest.TestCase):
+    def test_count_is_sent_only_to_the_users_room(self):
+        with patch.object(orders, 'get_pending_count', return_value=4), \
+             patch.object(orders, 'socketio') as mock_socketio:
+            orders._emit_pending_count('alice')
+        mock_socketio.start_background_task.assert_called_once_with(
+            mock_socketio.emit, 'pending_count', {'count': 4}, to='user_alice')
+
+
+class TestResponseEncoding(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.payload = {'data': [{'symbol': f'SYM{i}', 'quantity': i} for i in range(100)]}
+
+    def _json(self, accept_encoding):
+        with self.app.test_request_context('/api/orders', headers={'Accept-Encoding': accept_encoding}):
+            return orders._json_response(self.payload)
+
+    def test_gzip_when_accepted(self):
+        response = self._json('gzip, deflate')
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(orders.orjson.loads(gzip.decompress(response.get_data())), self.payload)
+
+    def test_gzip_q0_is_a_refusal(self):
+        response = self._json('gzip;q=0, deflate')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(orders.orjson.loads(response.get_data()), self.payload)
+
+    def test_csv_response_negotiates_and_varies(self):
+        for accept, compressed in (('gzip', True), ('gzip;q=0', False), ('', False)):
+            with self.app.test_request_context('/orderbook/export', headers={'Accept-Encoding': accept}):
+                response = orders._csv_response(iter(['a,b\r\n', '1,2\r\n']), 'x.csv')
+                response.direct_passthrough = False
+                body = response.get_data()
+            self.assertIn('Accept-Encoding', response.vary)
+            self.assertEqual(gzip.decompress(body) if compressed else body, b'a,b\r\n1,2\r\n')
+
+
+class TestCsvStreaming(unittest.TestCase):
+    def _expected(self, headers, columns, records):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        writer.writerows([r.get(c, '') for c in columns] for r in records)
+        return buffer.getvalue()
+
+    def test_positions_quote_awkward_values(self):
+        records = [
+            {'symbol': 'M&M', 'exchange': 'NSE', 'product': 'MIS', 'quantity': 5,
+             'average_price': 1500.5, 'ltp': 1510.0, 'pnl': 47.5},
+            {'symbol': 'A,B', 'exchange': 'NSE', 'product': 'CNC', 'quantity': -1,
+             'average_price': None, 'ltp': '-', 'pnl': 0},
+            {'symbol': 'None', 'exchange': 'NFO', 'product': 'NRML', 'quantity': 1,
+             'average_price': 'say "hi"', 'ltp': 'x\r\ny', 'pnl': None},
+            {'symbol': 'SBIN'},
+        ]
+        text = ''.join(orders.stream_positions_csv(records))
+        self.assertEqual(text, self._expected(orders._POSITION_CSV_HEADERS, orders._POSITION_COLS, records))
+        rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(rows[2][0], 'A,B')
+        self.assertEqual(rows[3][0], 'None')
+        self.assertEqual(rows[3][5], 'x\r\ny')
+
+    def test_rows_are_chunked(self):
+        records = [{'symbol': f'S{i}', 'quantity': i} for i in range(orders.CSV_CHUNK_ROWS * 2 + 3)]
+        chunks = list(orders.stream_tradebook_csv(records))
+        self.assertEqual(len(chunks), 4)  # Header + three row chunks
+        self.assertEqual(''.join(chunks), self._expected(orders._TRADE_CSV_HEADERS, orders._TRADE_COLS, records))
+
+    def test_bad_rows_fail_before_streaming(self):
+        with self.assertRaises(ValueError):
+            orders.stream_orderbook_csv([{'symbol': 'SBIN'}, None])
+
+    def test_error_mid_stream_ends_download_cleanly(self):
+        def chunks():
+            yield 'a,b\r\n'
+            raise RuntimeError('mapping failed')
+
+        with Flask(__name__).test_request_context('/orderbook/export'):
+            response = orders._csv_response(chunks(), 'x.csv')
+            response.direct_passthrough = False
+            self.assertEqual(response.get_data(), b'a,b\r\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import json
+import random
+import types
+import unittest
+from unittest.mock import MagicMock, patch
+
+import services.position_monitor_service as pm
+
+
+def _row(row_id, signal_data='{}', quantity=10):
+    return types.SimpleNamespace(id=row_id, signal_data=signal_data, quantity=quantity)
+
+
+class TestSignalDataWriteBehind(unittest.TestCase):
+    def setUp(self):
+        with patch.object(pm, 'get_analyze_mode', return_value=False):
+            self.monitor = pm.PositionMonitor()
+        self.monitor.add_position('OID1', 'NIFTY24DEC24000CE', 'NFO', 'BUY', 50, 100.0, 90.0,
+                                  [110.0, 120.0], {'strategy': 'tg'}, username='alice', product='MIS')
+        self.db_session = MagicMock()
+        self.positions = MagicMock()
+        patches = [
+            patch.object(pm, 'get_analyze_mode', return_value=True),
+            patch.object(pm, 'db_session', self.db_session),
+            patch.object(pm, 'SandboxPositions', self.positions),
+            patch.object(pm, 'PERSIST_DELAY', 60),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.monitor.flush_pending_persist)
+
+    def _fallback_returns(self, row):
+        self.positions.query.filter_by.return_value.filter.return_value.first.return_value = row
+
+    def test_updates_are_merged_into_one_write(self):
+        row = _row(7)
+        self._fallback_returns(row)
+        signal = self.monitor.get_position('OID1')['signal_data']
+
+        self.monitor.update_sl('OID1', 95.0)
+        self.monitor.update_remaining_quantity('OID1', 25)
+        self.monitor.set_target_hit_flag('OID1', 't1_hit')
+        self.assertEqual(self.db_session.commit.call_count, 0)
+
+        self.monitor.flush_pending_persist()
+        self.db_session.commit.assert_called_once()
+        stored = json.loads(row.signal_data)
+        self.assertEqual(stored, {'strategy': 'tg', 'stop_loss': 95.0, 'remaining_quantity': 25, 't1_hit': True})
+        self.assertEqual(signal, {'strategy': 'tg'})  # Caller's dict is left untouched
+        self.assertIsNone(self.monitor._persist_timer)
+
+    def test_cached_primary_key_skips_search(self):
+        row = _row(7)
+        self._fallback_returns(row)
+        self.monitor.update_sl('OID1', 95.0)
+        self.monitor.flush_pending_persist()
+        self.assertEqual(self.monitor.get_position('OID1')['sandbox_position_id'], 7)
+
+        self.positions.query.filter_by.reset_mock()
+        self.db_session.get.return_value = row
+        self.monitor.update_sl('OID1', 97.0)
+        self.monitor.flush_pending_persist()
+        self.db_session.get.assert_called_with(self.positions, 7)
+        self.positions.query.filter_by.assert_not_called()
+        self.assertEqual(json.loads(row.signal_data)['stop_loss'], 97.0)
+
+    def test_missing_cached_row_falls_back_to_search(self):
+        row = _row(9)
+        self._fallback_returns(row)
+        self.monitor.get_position('OID1')['sandbox_position_id'] = 7
+        self.db_session.get.return_value = None
+        self.monitor.update_sl('OID1', 95.0)
+        self.monitor.flush_pending_persist()
+        self.positions.query.filter_by.assert_called_with(user_id='alice', symbol='NIFTY24DEC24000CE')
+        self.assertEqual(self.monitor.get_position('OID1')['sandbox_position_id'], 9)
+
+    def test_no_row_means_no_write(self):
+        self._fallback_returns(None)
+        self.monitor.update_sl('OID1', 95.0)
+        self.monitor.flush_pending_persist()
+        self.db_session.commit.assert_called_once()
+        self.db_session.rollback.assert_not_called()
+
+    def test_remove_position_flushes_pending_updates(self):
+        row = _row(7)
+        self._fallback_returns(row)
+        self.monitor.update_sl('OID1', 95.0)
+        self.monitor.remove_position('OID1', 'sl_hit')
+        self.assertEqual(json.loads(row.signal_data)['stop_loss'], 95.0)
+        self.assertEqual(self.monitor._pending_persist, {})
+
+    def test_update_fields_is_one_merged_write(self):
+        row = _row(7)
+        self._fallback_returns(row)
+        self.assertTrue(self.monitor.update_fields('OID1', sl=95.0, targets=[115.0, 130.0, 125.0]))
+        position = self.monitor.get_position('OID1')
+        self.assertEqual((position['current_sl'], position['final_target']), (95.0, 130.0))
+        self.assertEqual(position['targets'], [115.0, 130.0, 125.0])
+
+        self.monitor.flush_pending_persist()
+        self.db_session.commit.assert_called_once()
+        self.assertEqual(json.loads(row.signal_data), {'strategy': 'tg', 'stop_loss': 95.0,
+                                                       'targets': [115.0, 130.0, 125.0], 'target': 130.0})
+
+    def test_update_fields_target_without_targets(self):
+        row = _row(7)
+        self._fallback_returns(row)
+        self.assertTrue(self.monitor.update_fields('OID1', target=140.0))
+        self.assertEqual(self.monitor.get_position('OID1')['final_target'], 140.0)
+        self.monitor.flush_pending_persist()
+        self.assertEqual(json.loads(row.signal_data), {'strategy': 'tg', 'target': 140.0})
+
+    def test_update_fields_without_changes(self):
+        version = self.monitor.lookup_version
+        self.assertFalse(self.monitor.update_fields('OID1'))
+        self.assertFalse(self.monitor.update_fields('MISSING', sl=95.0))
+        self.assertEqual(self.monitor.lookup_version, version)
+        self.assertEqual(self.monitor._pending_persist, {})
+
+    def test_live_mode_does_not_queue(self):
+        with patch.object(pm, 'get_analyze_mode', return_value=False):
+            self.monitor.update_sl('OID1', 95.0)
+        self.assertEqual(self.monitor._pending_persist, {})
+        self.assertIsNone(self.monitor._persist_timer)
+
+
+class TestLookupMaps(unittest.TestCase):
+    def setUp(self):
+        with patch.object(pm, 'get_analyze_mode', return_value=False):
+            self.monitor = pm.PositionMonitor()
+
+    def _add(self, order_id, symbol, exchange='NFO', product='MIS'):
+        self.monitor.add_position(order_id, symbol, exchange, 'BUY', 1, 100.0, 90.0, [110.0], {},
+                                  username='alice', product=product)
+
+    def _expected(self):
+        strict, relaxed, by_key = {}, {}, {}
+        for pid, pdata in self.monitor.active_positions.items():
+            sym, exc = pdata['symbol'], pdata['exchange']
+            strict[(sym, pdata['product'], exc)] = pdata
+            relaxed.setdefault((sym, exc), pdata)
+            by_key.setdefault((sym, exc, pdata['product']), pid)
+        return strict, relaxed, by_key
+
+    def test_remove_promotes_next_match(self):
+        self._add('A', 'SBIN', product='MIS')
+        self._add('B', 'SBIN', product='NRML')
+        self._add('C', 'SBIN', product='MIS')
+        strict, relaxed = self.monitor.get_lookup_maps()
+        self.assertEqual(strict[('SBIN', 'MIS', 'NFO')]['order_id'], 'C')
+        self.assertEqual(self.monitor.get_by_key('SBIN', 'NFO', 'MIS'), 'A')
+
+        self.monitor.remove_position('A')
+        self.assertEqual(relaxed[('SBIN', 'NFO')]['order_id'], 'B')
+        self.assertEqual(self.monitor.get_by_key('SBIN', 'NFO', 'MIS'), 'C')
+
+        self.monitor.remove_position('C')
+        self.assertNotIn(('SBIN', 'MIS', 'NFO'), strict)
+        self.assertIsNone(self.monitor.get_by_key('SBIN', 'NFO', 'MIS'))
+
+    def test_incremental_maps_match_full_rebuild(self):
+        rng = random.Random(7)
+        for i in range(300):
+            if self.monitor.active_positions and rng.random() < 0.4:
+                self.monitor.remove_position(rng.choice(list(self.monitor.active_positions)))
+            else:
+                self._add(f'O{rng.randrange(60)}', rng.choice(['SBIN', 'TCS', 'INFY']),
+                          rng.choice(['NSE', 'NFO']), rng.choice(['MIS', 'NRML']))
+            strict, relaxed = self.monitor.get_lookup_maps()
+            self.assertEqual((strict, relaxed, self.monitor._by_key), self._expected())
+
+    def test_version_bumps_on_changes(self):
+        version = self.monitor.lookup_version
+        self._add('A', 'SBIN')
+        self.monitor.update_sl('A', 95.0)
+        self.monitor.remove_position('A')
+        self.assertEqual(self.monitor.lookup_version, version + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
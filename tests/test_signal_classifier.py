@@ -0,0 +1,43 @@
+import unittest
+
+from services.signal_classifier import SignalClassifier
+
+
+class TestSignalClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = SignalClassifier()
+
+    def test_full_signal(self):
+        is_signal, confidence, data = self.classifier.classify("NIFTY 24000 CE above 120 SL 100 TGT 140 160")
+        self.assertTrue(is_signal)
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual((data['symbol'], data['option_type'], data['sl']), ('NIFTY', 'CE', '100'))
+        self.assertEqual(data['targets'], ['140', '160'])
+
+    def test_chatter_without_keywords_or_prices(self):
+        self.assertEqual(self.classifier.classify("Good morning all"), (False, 0.0, None))
+
+    def test_keyword_free_message_keeps_its_pattern_confidence(self):
+        # No trading keyword, so never a signal, but price/structure bonuses still count
+        cases = {
+            "Entry zone 24000 - 24050, exit 24100 : 24150": 18 / 35,
+            "hello 100 - 200 : 300": 4 / 35,
+            "join premium 100 200 300": 8 / 35,
+        }
+        for text, expected in cases.items():
+            is_signal, confidence, data = self.classifier.classify(text)
+            self.assertFalse(is_signal, text)
+            self.assertAlmostEqual(confidence, expected, msg=text)
+            self.assertIsNone(data, text)
+
+    def test_keywords_match_whole_words_only(self):
+        found = set(self.classifier._keyword_scanner.findall("buyback of sellers, bought slow"))
+        self.assertFalse(found & {'buy', 'sell', 'sl'})
+
+    def test_classify_batch_keeps_order(self):
+        texts = ["Good morning all", "NIFTY 24000 CE above 120 SL 100 TGT 140 160"]
+        self.assertEqual(self.classifier.classify_batch(texts), [self.classifier.classify(t) for t in texts])
+
+
+if __name__ == '__main__':
+    unittest.main()
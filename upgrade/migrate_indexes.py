@@ -3,7 +3,7 @@
 Migration script for Database Performance Indexes.
 
 This script adds performance indexes to existing tables across all databases:
-1. Main DB: auth, api_keys, analyzer_logs tables
+1. Main DB: auth, api_keys, analyzer_logs, symtoken tables
 2. Logs DB: traffic_logs, error_404_tracker, invalid_api_key_tracker tables
 
 Usage:
@@ -97,7 +97,7 @@ def create_index(engine, table_name, index_name, columns, description=""):
         return False
 
 def migrate_main_db_indexes(engine):
-    """Add indexes to main database tables (auth, api_keys, analyzer_logs)"""
+    """Add indexes to main database tables (auth, api_keys, analyzer_logs, symtoken)"""
     logger.info("")
     logger.info("Main Database Indexes:")
     logger.info("-" * 40)
@@ -135,6 +135,14 @@ def migrate_main_db_indexes(engine):
     else:
         logger.info("  - Skipping analyzer_logs indexes: table not found")
 
+    # SymToken table indexes
+    if check_table_exists(engine, 'symtoken'):
+        success &= create_index(engine, 'symtoken', 'idx_exchange_instrumenttype_symbol',
+                               ['exchange', 'instrumenttype', 'symbol'],
+                               'composite for MCX futures lookups')
+    else:
+        logger.info("  - Skipping symtoken indexes: table not found")
+
     return success
 
 def migrate_logs_db_indexes(engine):
@@ -207,7 +215,7 @@ def main():
     success = True
 
     # ============================================
-    # MAIN DATABASE (auth, api_keys, analyzer_logs)
+    # MAIN DATABASE (auth, api_keys, analyzer_logs, symtoken)
     # ============================================
     database_url = get_database_url('DATABASE_URL')
     if database_url:
@@ -229,6 +237,7 @@ def main():
                 ('analyzer_logs', 'idx_analyzer_api_type'),
                 ('analyzer_logs', 'idx_analyzer_created_at'),
                 ('analyzer_logs', 'idx_analyzer_type_time'),
+                ('symtoken', 'idx_exchange_instrumenttype_symbol'),
             ]
             verify_indexes(engine, "Main DB", main_indexes)
 
@@ -288,6 +297,7 @@ def main():
         print("    - auth: broker, user_id, is_revoked")
         print("    - api_keys: order_mode, created_at")
         print("    - analyzer_logs: api_type, created_at, (api_type+created_at)")
+        print("    - symtoken: (exchange+instrumenttype+symbol)")
         print()
         print("  Logs DB:")
         print("    - traffic_logs: timestamp, client_ip, status_code, user_id, (client_ip+timestamp)")
@@ -131,13 +131,19 @@ def _create_http_client() -> httpx.Client:
         # Disable HTTP/2 in standalone/Docker environments to avoid protocol negotiation issues
         http2_enabled = not is_standalone
 
+        # Connection pool sizing (shared by all broker API calls in this process)
+        max_connections = int(os.getenv('HTTP_MAX_CONNECTIONS', '50'))
+        max_keepalive = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', str(max_connections)))
+
         client = httpx.Client(
             http2=http2_enabled,  # Disable HTTP/2 in standalone mode, enable in integrated mode
             http1=True,  # Always enable HTTP/1.1 for compatibility
             timeout=120.0,  # Increased timeout for large historical data requests
             limits=httpx.Limits(
-                max_keepalive_connections=20,  # Balanced for most broker APIs
-                max_connections=50,  # Reasonable max without overloading
+                # Keep every pooled connection alive so concurrent bursts (close-all, batch approvals)
+                # reuse TLS sessions instead of re-handshaking connections beyond the keep-alive cap
+                max_keepalive_connections=max_keepalive,
+                max_connections=max_connections,  # Reasonable max without overloading
                 keepalive_expiry=120.0  # 2 minutes - good balance
             ),
             # Add verify parameter to handle SSL/TLS issues in standalone mode
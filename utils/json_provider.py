@@ -0,0 +1,35 @@
+# utils/json_provider.py
+"""
+orjson-backed JSON provider for Flask
+Used by jsonify() and request.json/get_json(); falls back to the stdlib
+provider for anything orjson cannot encode (e.g. ints wider than 64 bits)
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's DefaultJSONProvider using orjson"""
+
+    def dumps(self, obj, **kwargs):
+        # Custom encoder classes / stdlib-only options go through the stdlib path
+        if kwargs.get('cls') is not None:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            # datetimes are passed through to Flask's default so they keep the http_date format
+            return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+        except (TypeError, orjson.JSONEncodeError):
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
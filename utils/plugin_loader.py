@@ -29,3 +29,33 @@ def load_broker_auth_functions(broker_directory='broker'):
             logger.error(f"Authentication function not found in broker plugin {broker_name}: {e}")
 
     return auth_functions
+
+# Broker order-book functions resolved once at startup for the orders blueprint
+BROKER_ORDER_FUNCTIONS = {
+    'api.order_api': ('get_order_book', 'get_trade_book', 'get_positions',
+                      'place_smartorder_api', 'get_open_position'),
+    'mapping.order_data': ('map_order_data', 'transform_order_data', 'map_trade_data',
+                           'transform_tradebook_data', 'map_position_data', 'transform_positions_data'),
+}
+
+def load_broker_order_functions(broker_directory='broker'):
+    """
+    Import the order API and mapping modules of each broker in VALID_BROKERS.
+    Returns {broker: {module_name: {function_name: function}}}; functions a
+    broker does not implement are simply absent.
+    """
+    broker_functions = {}
+    broker_names = [b.strip() for b in os.getenv('VALID_BROKERS', '').split(',') if b.strip()]
+
+    for broker_name in broker_names:
+        modules = {}
+        for module_name, function_names in BROKER_ORDER_FUNCTIONS.items():
+            try:
+                module = importlib.import_module(f"{broker_directory}.{broker_name}.{module_name}")
+            except Exception as e:
+                logger.error(f"Failed to import {module_name} for broker plugin {broker_name}: {e}")
+                continue
+            modules[module_name] = {name: getattr(module, name) for name in function_names if hasattr(module, name)}
+        broker_functions[broker_name] = modules
+
+    return broker_functions